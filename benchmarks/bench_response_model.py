@@ -0,0 +1,110 @@
+"""
+Pages per second of get_all_video_comments with the default JsonModel and with FastJsonModel.
+
+Responses are served from memory with googleapiclient's HttpMockSequence, so the numbers cover request
+building, JSON decoding and row extraction, but not the network.
+
+    pip install -e .[fast-json] msgspec
+    python benchmarks/bench_response_model.py --pages 200
+"""
+import argparse
+import json
+import random
+import time
+
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMockSequence
+from googleapiclient.model import JsonModel
+
+from yt_stats_wrangler.api.client import YouTubeDataClient
+from yt_stats_wrangler.api.models import FastJsonModel, load_json_decoder
+
+
+def _comment(comment_id, video_id, rng):
+    return {
+        "id": comment_id,
+        "snippet": {
+            "videoId": video_id,
+            "authorDisplayName": f"@user{rng.randint(0, 10 ** 6)}",
+            "textDisplay": " ".join(rng.choice(["great", "video", "thanks", "this", "helped", "a", "lot"])
+                                    for _ in range(rng.randint(5, 60))),
+            "publishedAt": f"2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T12:00:00Z",
+            "likeCount": rng.randint(0, 500),
+        },
+    }
+
+
+def make_pages(n_pages, video_id="benchVideo", seed=0):
+    """commentThreads.list pages of 100 threads, with up to 5 replies returned inline."""
+    rng = random.Random(seed)
+    pages = []
+    for page in range(n_pages):
+        items = []
+        for i in range(100):
+            reply_count = rng.choice([0, 0, 0, 1, 2, 5])
+            thread = {
+                "snippet": {"topLevelComment": _comment(f"c{page}-{i}", video_id, rng), "totalReplyCount": reply_count},
+            }
+            if reply_count:
+                thread["replies"] = {"comments": [_comment(f"c{page}-{i}.r{r}", video_id, rng) for r in range(reply_count)]}
+            items.append(thread)
+        body = {"items": items}
+        if page < n_pages - 1:
+            body["nextPageToken"] = f"page{page + 1}"
+        pages.append(({"status": "200"}, json.dumps(body).encode("utf-8")))
+    return pages
+
+
+def run(model, pages, repeats):
+    client = YouTubeDataClient(api_key="benchmark", model=model)
+    best = float("inf")
+    for _ in range(repeats):
+        client.youtube = build("youtube", "v3", developerKey="benchmark", model=model,
+                               http=HttpMockSequence(list(pages)))
+        start = time.perf_counter()
+        rows = client.get_all_video_comments("benchVideo")
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best, len(rows)
+
+
+def decode_only(model, pages, repeats):
+    """Pages per second of the model's decoding step on its own."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _, content in pages:
+            model.deserialize(content)
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages)
+    size = sum(len(content) for _, content in pages) / len(pages) / 1024
+    print(f"{args.pages} pages of 100 comment threads ({size:.0f} KiB per page), best of {args.repeats}")
+
+    print(f"{'model':<26}{'decode pages/s':>16}{'crawl pages/s':>16}{'speedup':>10}")
+    baseline_decode = decode_only(JsonModel(), pages, args.repeats)
+    baseline, rows = run(JsonModel(), pages, args.repeats)
+    print(f"{'JsonModel (stdlib json)':<26}{baseline_decode:>16.1f}{baseline:>16.1f}{'1.00x':>10}")
+    for decoder in ("orjson", "msgspec"):
+        try:
+            load_json_decoder(decoder)
+        except ImportError:
+            print(f"{'FastJsonModel(' + decoder + ')':<26}{'not installed':>16}")
+            continue
+        model = FastJsonModel(decoder)
+        decode_rate = decode_only(model, pages, args.repeats)
+        pages_per_second, _ = run(model, pages, args.repeats)
+        print(f"{'FastJsonModel(' + decoder + ')':<26}{decode_rate:>16.1f}{pages_per_second:>16.1f}"
+              f"{pages_per_second / baseline:>9.2f}x")
+    print(f"{rows} rows per crawl")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,13 @@ setup(
         "pandas": ["pandas"],
         "polars": ["polars"],
         "pyspark": ["pyspark"],
+        "duckdb": ["duckdb"],
+        "cli": ["pyyaml"],
+        "fast-json": ["orjson"],
+        "arrow": ["pyarrow"],
+    },
+    entry_points={
+        "console_scripts": ["yt-stats-wrangler=yt_stats_wrangler.cli:main"],
     },
     classifiers=[
         "Programming Language :: Python :: 3",
@@ -0,0 +1,158 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+import yt_stats_wrangler.api.client as client_module
+from yt_stats_wrangler.api.client import YouTubeDataClient
+
+
+def make_http_error(status, reason):
+    content = json.dumps({"error": {"errors": [{"reason": reason}]}}).encode("utf-8")
+    return HttpError(httplib2.Response({"status": status}), content)
+
+
+@pytest.fixture
+def http_error():
+    """Build an HttpError with an HTTP status and API reason, e.g. http_error(503, 'backendError')."""
+    return make_http_error
+
+
+class FakeYouTubeHttp:
+    """
+    Stand-in for httplib2.Http that answers YouTube Data API v3 list calls from in-memory channels, videos
+    and comments, so client methods run offline. Every call is kept in requests as (resource, params).
+    fail(resource, params) can return (status, reason) to answer that call with an API error.
+
+    Channel 'UC1' has n_videos uploads. Every video has n_threads comment threads, the first of them with
+    n_replies replies (the API inlines the first 5), and threads are newest first. Pages are capped at
+    page_size rows, so small data sets still page. clock counts the requests made, see the fake_clock fixture.
+    """
+
+    def __init__(self, n_videos=7, n_threads=4, n_replies=7, page_size=3):
+        self.page_size = page_size
+        self.requests = []
+        self.fail = None
+        self.clock = 0.0
+        self._lock = threading.Lock()
+        self.videos = {f"v{i}": _video(f"v{i}", i) for i in range(n_videos)}
+        self.threads = {}
+        self.replies = {}
+        for video_id in self.videos:
+            self.threads[video_id] = []
+            for t in range(n_threads):
+                self.add_thread(video_id, f"{video_id}c{t}", published=f"2024-01-{20 - t:02d}T00:00:00Z",
+                                n_replies=n_replies if t == 0 else 0, newest=False)
+
+    def add_thread(self, video_id, comment_id, published, n_replies=0, newest=True):
+        replies = [{"id": f"{comment_id}.r{r}", "snippet": {
+            "authorDisplayName": f"replier{r}", "textDisplay": f"reply {r}", "parentId": comment_id, "videoId": video_id,
+            "likeCount": r, "publishedAt": f"2024-02-{r + 1:02d}T00:00:00Z"}} for r in range(n_replies)]
+        self.replies[comment_id] = replies
+        thread = {"id": comment_id, "snippet": {
+            "videoId": video_id, "totalReplyCount": n_replies, "topLevelComment": {"id": comment_id, "snippet": {
+                "authorDisplayName": "author", "textDisplay": f"comment {comment_id}", "likeCount": 1,
+                "publishedAt": published, "updatedAt": published, "videoId": video_id}}}}
+        if replies:
+            thread["replies"] = {"comments": replies[:5]}
+        if newest:
+            self.threads[video_id].insert(0, thread)
+        else:
+            self.threads[video_id].append(thread)
+
+    def calls(self, resource):
+        return [params for name, params in self.requests if name == resource]
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        parsed = urlparse(uri)
+        resource = parsed.path.rsplit("/", 1)[-1]
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        with self._lock:
+            self.requests.append((resource, params))
+            self.clock += 1
+        failure = self.fail(resource, params) if self.fail else None
+        if failure:
+            status, reason = failure
+            content = {"error": {"code": status, "errors": [{"reason": reason}]}}
+            return httplib2.Response({"status": status}), json.dumps(content).encode("utf-8")
+        return httplib2.Response({"status": 200}), json.dumps(getattr(self, f"_{resource}")(params)).encode("utf-8")
+
+    def _page(self, items, params):
+        size = min(int(params.get("maxResults", 5)), self.page_size)
+        start = int(params.get("pageToken", "p0")[1:])
+        body = {"items": items[start:start + size]}
+        if start + size < len(items):
+            body["nextPageToken"] = f"p{start + size}"
+        return body
+
+    def _channels(self, params):
+        items = []
+        for channel_id in params["id"].split(","):
+            if channel_id.startswith("UC"):
+                items.append({"id": channel_id, "snippet": {"title": f"Channel {channel_id}", "publishedAt": "2020-01-01T00:00:00Z"},
+                              "statistics": {"subscriberCount": "10", "viewCount": "1000", "videoCount": str(len(self.videos))},
+                              "contentDetails": {"relatedPlaylists": {"uploads": "UU" + channel_id[2:]}}})
+        return {"items": items}
+
+    def _search(self, params):
+        if params["q"] == "@unknown":
+            return {"items": []}
+        return {"items": [{"id": {"channelId": "UC1"}}]}
+
+    def _playlistItems(self, params):
+        items = [{"snippet": {**video["snippet"], "resourceId": {"videoId": video_id}},
+                  "contentDetails": {"videoId": video_id}} for video_id, video in self.videos.items()]
+        return self._page(items, params)
+
+    def _videos(self, params):
+        return {"items": [self.videos[video_id] for video_id in params["id"].split(",") if video_id in self.videos]}
+
+    def _commentThreads(self, params):
+        threads = self.threads.get(params["videoId"])
+        if threads is None:
+            return {"items": []}
+        if "replies" not in params.get("part", ""):
+            threads = [{key: value for key, value in thread.items() if key != "replies"} for thread in threads]
+        return self._page(threads, params)
+
+    def _comments(self, params):
+        return self._page(self.replies.get(params["parentId"], []), params)
+
+
+def _video(video_id, i):
+    return {"id": video_id,
+            "snippet": {"title": f"Video {i}", "description": "About", "publishedAt": f"2024-01-{i + 1:02d}T00:00:00Z",
+                        "channelId": "UC1", "channelTitle": "Channel UC1", "tags": ["tag"], "categoryId": "10"},
+            "statistics": {"viewCount": str(100 * (i + 1)), "likeCount": str(i), "commentCount": "4"},
+            "contentDetails": {"duration": f"PT{30 + i * 20}S", "definition": "hd", "caption": "false"}}
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """A FakeYouTubeHttp that every offline client, and the worker threads of crawl_channel, send requests to."""
+    fake = FakeYouTubeHttp()
+    monkeypatch.setattr(client_module, "build_http", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def offline_client(fake_api):
+    """Build a YouTubeDataClient answered by fake_api. Keyword arguments go to the client."""
+    def make(**kwargs):
+        client = YouTubeDataClient(api_key="offline", **kwargs)
+        client.youtube._http = fake_api
+        return client
+    return make
+
+
+@pytest.fixture
+def fake_clock(monkeypatch, fake_api):
+    """Make every request to fake_api take one second of the clients' time budgets, so timeout_budget=2.5
+    runs out after the third request."""
+    monkeypatch.setattr(client_module, "time", SimpleNamespace(monotonic=lambda: fake_api.clock, sleep=time.sleep))
+    return fake_api
@@ -0,0 +1,90 @@
+import json
+import random
+import statistics
+import pytest
+from yt_stats_wrangler.utils.aggregates import QuantileSketch, RunningStats, StreamingAggregator, quantile_label
+
+def _video_rows(n, channels=3, seed=0):
+    rng = random.Random(seed)
+    return [{"videoId": f"v{i}", "channelId": f"UC{i % channels}", "viewCount": rng.randint(0, 10 ** 6),
+             "likeCount": rng.randint(0, 1000), "commentCount": rng.randint(0, 50),
+             "duration_seconds": rng.randint(5, 3600), "isShort": rng.random() < 0.3,
+             "videoStats_commit_time": "2025-01-01 00:00:00"} for i in range(n)]
+
+def test_running_stats_match_statistics_module_and_merge_exactly():
+    rng = random.Random(1)
+    values = [rng.uniform(-100, 100) for _ in range(500)]
+    left, right = RunningStats(), RunningStats()
+    for value in values[:123]:
+        left.add(value)
+    for value in values[123:]:
+        right.add(value)
+    left.merge(right)
+    assert left.count == 500 and left.total == pytest.approx(sum(values))
+    assert left.mean == pytest.approx(statistics.mean(values))
+    assert left.variance == pytest.approx(statistics.variance(values))
+    assert (left.min, left.max) == (min(values), max(values))
+    assert RunningStats.from_dict(left.to_dict()).to_dict() == left.to_dict()
+
+def test_quantile_sketch_is_exact_when_small_and_bounded_when_large():
+    small = QuantileSketch()
+    for value in range(1, 101):
+        small.add(value)
+    assert small.quantiles([0, 0.5, 0.9, 1]) == [1, 50, 90, 100]
+
+    rng = random.Random(2)
+    values = [rng.lognormvariate(8, 2) for _ in range(50000)]
+    halves = QuantileSketch(seed=1), QuantileSketch(seed=2)
+    for i, value in enumerate(values):
+        halves[i % 2].add(value)
+    sketch = halves[0].merge(halves[1])
+    assert sketch.count == 50000
+    assert sum(len(compactor) for compactor in sketch.compactors) < 3 * sketch.k
+    ordered = sorted(values)
+    for q in (0.1, 0.5, 0.9, 0.99):
+        rank = ordered.index(sketch.quantile(q)) / len(ordered)
+        assert abs(rank - q) < 0.02
+
+def test_aggregator_summary_matches_grouped_rows():
+    rows = _video_rows(3000)
+    aggregator = StreamingAggregator(group_by="channelId")
+    assert aggregator.write(rows) == 3000
+    summary = aggregator.summary()
+    assert [row["channelId"] for row in summary] == ["UC0", "UC1", "UC2"]
+    views = [row["viewCount"] for row in rows if row["channelId"] == "UC1"]
+    uc1 = summary[1]
+    assert uc1["rows"] == uc1["viewCount_count"] == len(views)
+    assert uc1["viewCount_sum"] == sum(views)
+    assert uc1["viewCount_mean"] == pytest.approx(statistics.mean(views))
+    assert uc1["viewCount_std"] == pytest.approx(statistics.stdev(views))
+    assert uc1["isShort_share"] == pytest.approx(sum(r["isShort"] for r in rows if r["channelId"] == "UC1") / len(views))
+    assert "viewCount_p99" in uc1 and quantile_label(0.999) == "p99_9"
+
+def test_aggregators_from_separate_workers_merge():
+    rows = _video_rows(2000)
+    whole = StreamingAggregator()
+    whole.write(rows)
+    first, second = StreamingAggregator(), StreamingAggregator()
+    first.write(rows[:700])
+    second.write(rows[700:])
+    # Workers can ship their aggregates as JSON
+    merged = StreamingAggregator.from_dict(json.loads(json.dumps(first.to_dict()))).merge(second)
+    for merged_row, whole_row in zip(merged.summary(), whole.summary()):
+        for key in ("rows", "viewCount_sum", "likeCount_min", "duration_seconds_max", "isShort_share"):
+            assert merged_row[key] == whole_row[key]
+        assert merged_row["viewCount_mean"] == pytest.approx(whole_row["viewCount_mean"])
+        assert merged_row["viewCount_std"] == pytest.approx(whole_row["viewCount_std"])
+
+def test_aggregator_skips_other_record_types_and_missing_values():
+    aggregator = StreamingAggregator(group_by=None, metrics=("likeCount",), shares=())
+    aggregator.write([{"likeCount": 5, "videoStats_commit_time": "t"},
+                      {"likeCount": None, "videoStats_commit_time": "t"},
+                      {"likeCount": 99, "videoAllComments_commit_time": "t"}])
+    (row,) = aggregator.summary(key_format="upper")
+    assert row["ROWS"] == 2 and row["LIKE_COUNT_COUNT"] == 1 and row["LIKE_COUNT_MAX"] == 5
+
+def test_aggregators_with_different_settings_do_not_merge():
+    with pytest.raises(ValueError, match="Cannot merge"):
+        StreamingAggregator(group_by="channelId").merge(StreamingAggregator(group_by="categoryId"))
+    with pytest.raises(ValueError, match="Invalid quantile"):
+        StreamingAggregator(quantiles=(50,))
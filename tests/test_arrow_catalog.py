@@ -0,0 +1,62 @@
+import pytest
+from yt_stats_wrangler.utils.arrow_catalog import ArrowCatalog
+
+pa = pytest.importorskip("pyarrow")
+
+def _stats(n, start=0):
+    return [{"videoId": f"v{i}", "viewCount": i, "videoStats_commit_time": "2024-01-01 00:00:00"}
+            for i in range(start, start + n)]
+
+def _comments(n):
+    return [{"commentId": f"c{i}", "videoId": "v0", "videoAllComments_commit_time": "2024-01-01 00:00:00"}
+            for i in range(n)]
+
+def test_write_splits_rows_by_record_type_and_opens_them(tmp_path):
+    catalog = ArrowCatalog(str(tmp_path))
+    catalog.write("job1", _stats(3) + _comments(2))
+    assert catalog.jobs() == ["job1"]
+    assert catalog.record_types("job1") == ["videoAllComments", "videoStats"]
+    table = catalog.open("job1", "videoStats")
+    assert table.column("viewCount").to_pylist() == [0, 1, 2]
+    assert catalog.open("job1", "videoAllComments").num_rows == 2
+
+def test_open_as_pandas_and_polars(tmp_path):
+    catalog = ArrowCatalog(str(tmp_path))
+    catalog.write("job1", _stats(2))
+    catalog.write("job1", _stats(2, start=2))
+    pd = pytest.importorskip("pandas")
+    df = catalog.open("job1", "videoStats", output_format="pandas")
+    assert isinstance(df.dtypes["viewCount"], pd.ArrowDtype)
+    assert df["viewCount"].tolist() == [0, 1, 2, 3]
+    pytest.importorskip("polars")
+    assert catalog.open("job1", "videoStats", output_format="polars")["videoId"].to_list() == ["v0", "v1", "v2", "v3"]
+    assert catalog.open("job1", "videoStats", output_format="polars_lazy").collect().height == 4
+
+def test_sink_writes_a_part_per_batch(tmp_path):
+    catalog = ArrowCatalog(str(tmp_path))
+    sink = catalog.sink("job1", batch_size=4)
+    sink.write(_stats(5))
+    sink.write(_comments(1))
+    assert len(catalog.files("job1", "videoStats")) == 1
+    sink.close()
+    assert len(catalog.files("job1", "videoStats")) == 2
+    entries = {e["record_type"]: e for e in catalog.entries()}
+    assert entries["videoStats"]["rows"] == 5
+    assert entries["videoAllComments"]["files"] == 1
+
+def test_drop_and_missing_results(tmp_path):
+    catalog = ArrowCatalog(str(tmp_path))
+    catalog.write("job1", _stats(1) + _comments(1))
+    catalog.drop("job1", "videoStats")
+    assert catalog.record_types("job1") == ["videoAllComments"]
+    with pytest.raises(KeyError):
+        catalog.open("job1", "videoStats")
+    catalog.drop("job1")
+    assert catalog.jobs() == []
+
+def test_job_ids_cannot_leave_the_catalog(tmp_path):
+    catalog = ArrowCatalog(str(tmp_path))
+    with pytest.raises(ValueError):
+        catalog.write("../elsewhere", _stats(1))
+    with pytest.raises(ValueError):
+        catalog.write("job1", pa.table({"a": [1]}))
@@ -0,0 +1,33 @@
+import time
+import pytest
+from yt_stats_wrangler.utils.cache import EntityCache
+
+def test_cache_returns_stored_values():
+    cache = EntityCache(max_size=2)
+    cache.set(("videos", "abc"), {"id": "abc"})
+    assert cache.get(("videos", "abc")) == {"id": "abc"}
+    assert cache.get(("videos", "missing")) is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+def test_cache_evicts_least_recently_used():
+    cache = EntityCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the oldest entry
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_cache_expires_stale_entries():
+    cache = EntityCache(max_size=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_cache_requires_positive_size():
+    with pytest.raises(ValueError):
+        EntityCache(max_size=0)
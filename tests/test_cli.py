@@ -0,0 +1,19 @@
+import json
+from yt_stats_wrangler.cli import main
+
+def test_dry_run_prints_estimate_without_api_key(tmp_path, capsys, monkeypatch):
+    monkeypatch.delenv("YOUTUBE_API_V3_KEY", raising=False)
+    manifest = tmp_path / "job.json"
+    manifest.write_text(json.dumps({"channels": ["UC1"], "pull": ["channel_stats", "video_details"], "quota": 1}))
+    assert main([str(manifest), "--dry-run"]) == 0
+    out = capsys.readouterr().out
+    assert "channel_stats" in out and "video_details" in out
+    assert "exceeds the quota budget" in out
+
+def test_missing_api_key_and_bad_manifest_exit_with_error(tmp_path, monkeypatch):
+    monkeypatch.delenv("YOUTUBE_API_V3_KEY", raising=False)
+    manifest = tmp_path / "job.json"
+    manifest.write_text(json.dumps({"channels": ["UC1"], "pull": ["channel_stats"]}))
+    assert main([str(manifest)]) == 2
+    manifest.write_text(json.dumps({"channels": ["UC1"], "pull": ["nothing"]}))
+    assert main([str(manifest), "--dry-run"]) == 2
@@ -1,6 +1,7 @@
 import os
 import pytest
 from yt_stats_wrangler.api.client import YouTubeDataClient
+from yt_stats_wrangler.api.continuation import Continuation
 
 # Use the CDCodes channel ID to test the client and ensure it's interfacing with the API
 
@@ -362,3 +363,419 @@ def test_get_all_comments_for_video_ids(yt_client):
 
 
 
+
+# Offline tests, answered by the FakeYouTubeHttp in conftest.py
+
+def _ids(rows):
+    return [row["videoId"] for row in rows]
+
+def test_crawl_channel_returns_video_stats_rows_for_two_units_a_page(offline_client, fake_api):
+    client = offline_client()
+    rows = client.crawl_channel("UC1", columns=["viewCount", "title"])
+    assert sorted(_ids(rows)) == sorted(fake_api.videos)
+    assert set(rows[0]) == {"videoId", "viewCount", "title", "videoStats_commit_time"}
+    # 1 uploads lookup, then a playlistItems and a videos call for each of the 3 pages
+    assert client.quota_used == 7 == len(fake_api.requests)
+    assert all(call["part"] == "snippet,statistics" for call in fake_api.calls("videos"))
+
+def test_crawl_channel_keeps_pages_when_a_videos_call_fails(offline_client, fake_api):
+    client = offline_client()
+    fake_api.fail = lambda resource, params: (503, "backendError") if resource == "videos" and "v3" in params["id"] else None
+    rows = client.crawl_channel("UC1")
+    assert sorted(_ids(rows)) == ["v0", "v1", "v2", "v6"]
+    assert [(f.method, f.entity_id, f.page_token) for f in client.failures] == [
+        ("get_video_stats", "v3", "p3"), ("get_video_stats", "v4", "p3"), ("get_video_stats", "v5", "p3")]
+
+    # The retry only asks for the failed IDs
+    fake_api.fail = None
+    fake_api.requests.clear()
+    rows = client.retry_failures(rows, delay=0)
+    assert sorted(_ids(rows)) == sorted(fake_api.videos)
+    assert [call["id"] for call in fake_api.calls("videos")] == ["v3,v4,v5"]
+    assert len(fake_api.requests) == 1
+    assert client.failures == []
+
+def test_crawl_channels_resumes_a_failed_playlist_page(offline_client, fake_api):
+    client = offline_client()
+    fake_api.fail = lambda resource, params: (500, "backendError") if params.get("pageToken") == "p3" else None
+    rows = client.crawl_channels(["UC1"], print_current_channel=False)
+    assert _ids(rows) == ["v0", "v1", "v2"]
+    assert (client.failures[0].method, client.failures[0].page_token) == ("crawl_channel", "p3")
+
+    fake_api.fail = None
+    fake_api.requests.clear()
+    rows = client.retry_failures(rows, delay=0)
+    assert sorted(_ids(rows)) == sorted(fake_api.videos)
+    assert [call.get("pageToken") for call in fake_api.calls("playlistItems")] == ["p3", "p6"]
+
+def test_crawl_channel_only_charges_the_calls_it_makes(fake_api):
+    from yt_stats_wrangler.api.jobs import JobClient, QuotaBudget
+    budget = QuotaBudget(limit=4)
+    client = JobClient("offline", budget)
+    client.youtube._http = fake_api
+    rows = client.crawl_channel("UC1", max_workers=1)
+    # The uploads lookup, the first page and its videos call, then the second page before quota ran out
+    assert budget.used == len(fake_api.requests) == 4
+    assert _ids(rows) == ["v0", "v1", "v2"]
+
+def test_polars_lazy_comment_crawls_remove_their_batch_files(offline_client, tmp_path):
+    try:
+        import polars as pl
+    except ImportError:
+        pytest.skip("Polars not installed")
+    import gc
+    client = offline_client(spill_dir=str(tmp_path))
+    lazy = client.get_top_level_comments_for_video_ids(["v0", "v1"], output_format="polars_lazy",
+                                                       print_current_channel=False)
+    assert isinstance(lazy, pl.LazyFrame)
+    assert lazy.collect().height == 8
+    # One batch file per video
+    assert len(list(tmp_path.glob("*/*.parquet"))) == 2
+    del lazy
+    gc.collect()
+    assert list(tmp_path.iterdir()) == []
+
+def test_get_new_video_comments_keeps_reply_watermarks_per_thread(offline_client, fake_api):
+    client = offline_client()
+    rows, watermark = client.get_new_video_comments("v0")
+    # 4 threads, the first with 7 replies
+    assert len(rows) == 11
+    assert watermark["commentId"] == "v0c0"
+    assert watermark["threads"]["v0c0"] == {"replyCount": 7, "latestReply": "2024-02-07T00:00:00Z"}
+
+    # A new thread with replies, and a reply to an old thread
+    fake_api.add_thread("v0", "v0new", published="2024-01-25T00:00:00Z", n_replies=2)
+    old = next(thread for thread in fake_api.threads["v0"] if thread["id"] == "v0c1")
+    fake_api.replies["v0c1"] = [{"id": "v0c1.r0", "snippet": {"textDisplay": "late reply", "parentId": "v0c1",
+                                 "videoId": "v0", "publishedAt": "2024-03-01T00:00:00Z"}}]
+    old["snippet"]["totalReplyCount"] = 1
+    old["replies"] = {"comments": fake_api.replies["v0c1"]}
+
+    rows, watermark = client.get_new_video_comments("v0", watermark=watermark, check_reply_updates=True)
+    assert sorted(row["commentId"] for row in rows) == ["v0c1.r0", "v0new", "v0new.r0", "v0new.r1"]
+    assert watermark["commentId"] == "v0new"
+    assert watermark["threads"]["v0c1"] == {"replyCount": 1, "latestReply": "2024-03-01T00:00:00Z"}
+    assert watermark["threads"]["v0new"]["replyCount"] == 2
+
+def test_time_budget_is_checked_between_reply_pages(offline_client, fake_clock):
+    client = offline_client()
+    # The thread page, then two of the first thread's three reply pages
+    rows = client.get_all_video_comments("v0", timeout_budget=2.5)
+    assert len(fake_clock.requests) == 3
+    assert [row["commentId"] for row in rows] == ["v0c0"] + [f"v0c0.r{r}" for r in range(6)]
+    assert client.continuation == Continuation("get_all_video_comments", "v0", None, {"skip_threads": 1},
+                                               replies={"parentId": "v0c0", "page_token": "p6"})
+
+    fake_clock.requests.clear()
+    rows = client.resume(client.continuation.to_dict())
+    assert client.continuation is None
+    assert [row["commentId"] for row in rows] == ["v0c0.r6", "v0c1", "v0c2", "v0c3"]
+    assert [(resource, params.get("pageToken")) for resource, params in fake_clock.requests] == [
+        ("comments", "p6"), ("commentThreads", None), ("commentThreads", "p3")]
+
+def test_resumed_replies_can_be_cut_again(offline_client, fake_clock):
+    fake_clock.add_thread("v1", "v1big", published="2024-02-01T00:00:00Z", n_replies=15)
+    client = offline_client()
+    first = client.get_all_comments_for_video_ids(["v1", "v0"], timeout_budget=2.5, print_current_video=False)
+    continuation = client.continuation
+    assert (continuation.method, continuation.entity_id, continuation.pending) == (
+        "get_all_comments_for_video_ids", "v1", ["v0"])
+    assert continuation.replies == {"parentId": "v1big", "page_token": "p6"}
+
+    # Two more reply pages, then the rest of the crawl
+    second = client.resume(continuation, timeout_budget=2)
+    assert client.continuation.replies == {"parentId": "v1big", "page_token": "p12"}
+    assert client.continuation.pending == ["v0"]
+    third = client.resume(client.continuation)
+    ids = [row["commentId"] for row in first + second + third]
+    # v1: its new thread with 15 replies and 4 threads with 7 replies on the first, v0: 4 threads and 7 replies
+    assert len(ids) == len(set(ids)) == 16 + 11 + 11
+
+def test_resumed_crawls_cut_before_their_first_page_keep_skipping(offline_client, fake_clock):
+    client = offline_client()
+    client.get_all_video_comments("v0", timeout_budget=2.5)
+    # The replies finish, then the budget runs out before the thread page is fetched again
+    client.resume(client.continuation, timeout_budget=1)
+    assert client.continuation == Continuation("get_all_video_comments", "v0", None, {"skip_threads": 1})
+    rows = client.resume(client.continuation)
+    assert [row["commentId"] for row in rows] == ["v0c1", "v0c2", "v0c3"]
+
+def test_budgeted_reply_paging_stops_on_time(offline_client, fake_clock):
+    fake_clock.add_thread("v0", "v0huge", published="2024-02-01T00:00:00Z", n_replies=5000)
+    client = offline_client()
+    client.get_all_video_comments("v0", timeout_budget=5)
+    assert len(fake_clock.requests) == 5
+    assert client.continuation.replies["page_token"] == "p12"
+
+def test_max_replies_left_is_kept_when_replies_are_cut(offline_client, fake_clock):
+    fake_clock.add_thread("v0", "v0big", published="2024-02-01T00:00:00Z", n_replies=20)
+    client = offline_client()
+    client.get_all_video_comments("v0", max_replies_per_thread=10, timeout_budget=2.5)
+    assert client.continuation.options == {"max_replies_per_thread": 10, "skip_threads": 1}
+    assert client.continuation.replies == {"parentId": "v0big", "page_token": "p6", "max_replies": 4}
+
+def test_new_comment_syncs_cut_inside_replies_keep_the_thread_for_next_time(offline_client, fake_clock):
+    client = offline_client()
+    rows, watermark = client.get_new_video_comments("v0", timeout_budget=2.5)
+    assert "v0c0" not in watermark["threads"]
+    assert watermark["commentId"] is None
+    rows, watermark = client.get_new_video_comments("v0", watermark=watermark)
+    assert len(rows) == 11
+    assert watermark["threads"]["v0c0"]["replyCount"] == 7
+
+def test_stopping_for_time_says_so(offline_client, fake_clock, capsys):
+    client = offline_client()
+    client.get_all_comments_for_video_ids(["v0", "v1"], timeout_budget=0, print_current_video=False)
+    out = capsys.readouterr().out
+    assert "Time budget reached. Stopping comment collection." in out
+    assert "Quota limit reached" not in out
+
+def test_get_video_stats_asks_only_for_the_selected_columns(offline_client, fake_api):
+    client = offline_client()
+    stats = client.get_video_stats(["v0", "v1"], columns=["viewCount", "likeCount"])
+    assert [set(row) for row in stats] == [{"videoId", "viewCount", "likeCount", "videoStats_commit_time"}] * 2
+    assert [row["viewCount"] for row in stats] == [100, 200]
+    call = fake_api.calls("videos")[0]
+    assert call["part"] == "statistics"
+    assert call["fields"] == "items(id,statistics(viewCount,likeCount))"
+    assert client.quota_used == 1
+
+    with pytest.raises(ValueError):
+        client.get_video_stats(["v0"], columns=["notAColumn"])
+    assert len(fake_api.requests) == 1
+
+def test_get_video_stats_dedupes_ids_and_caches_videos(offline_client, fake_api):
+    client = offline_client(cache_size=10)
+    stats = client.get_video_stats(["v1", "v0", "v1"], columns=["viewCount"])
+    # One request for both unique IDs, rows expanded back to the input order
+    assert _ids(stats) == ["v1", "v0", "v1"]
+    assert [call["id"] for call in fake_api.calls("videos")] == ["v1,v0"]
+    assert client.quota_used == 1
+
+    # Memoized videos are not requested again
+    stats = client.get_video_stats(["v0", "v2"], columns=["viewCount"])
+    assert _ids(stats) == ["v0", "v2"]
+    assert [call["id"] for call in fake_api.calls("videos")] == ["v1,v0", "v2"]
+    assert client.quota_used == 2
+
+def test_inline_replies_save_comments_list_calls(offline_client, fake_api):
+    fake_api.add_thread("v0", "v0few", published="2024-02-01T00:00:00Z", n_replies=3)
+    client = offline_client()
+    rows = client.get_all_video_comments("v0")
+    # 5 threads, 3 replies on the new one and 7 on the first of the others
+    assert len(rows) == 5 + 3 + 7
+    # The thread with 3 replies is served from its inline replies, only the one with 7 pages comments.list
+    assert {call["parentId"] for call in fake_api.calls("comments")} == {"v0c0"}
+    assert len(fake_api.calls("comments")) == 3
+    assert fake_api.calls("commentThreads")[0]["part"] == "snippet,replies"
+    assert client.quota_used == len(fake_api.requests) == 2 + 3
+    # Inline and paged replies come out with the same columns
+    replies = [row for row in rows if row["parentId"] is not None]
+    assert len({tuple(row) for row in replies}) == 1
+
+def test_get_new_video_comments_stops_at_watermark(offline_client, fake_api):
+    client = offline_client()
+    first_rows, watermark = client.get_new_video_comments("v0")
+    assert len(first_rows) == 11
+    assert (watermark["videoId"], watermark["commentId"]) == ("v0", "v0c0")
+    assert fake_api.calls("commentThreads")[0]["order"] == "time"
+
+    # Nothing new since the previous sync, so only one page is read and no rows come back
+    client.reset_quota_used()
+    fake_api.requests.clear()
+    rows, next_watermark = client.get_new_video_comments("v0", watermark=watermark)
+    assert rows == []
+    assert client.quota_used == len(fake_api.requests) == 1
+    assert next_watermark["commentId"] == watermark["commentId"]
+
+    # A new thread is picked up without paging down to older ones
+    fake_api.add_thread("v0", "v0new", published="2024-01-25T00:00:00Z")
+    fake_api.requests.clear()
+    rows, next_watermark = client.get_new_video_comments("v0", watermark=next_watermark)
+    assert [row["commentId"] for row in rows] == ["v0new"]
+    assert next_watermark["commentId"] == "v0new"
+    assert len(fake_api.requests) == 1
+
+def test_crawl_channel_matches_video_details(offline_client, fake_api):
+    client = offline_client()
+    crawled = client.crawl_channel("UC1")
+    details = client.get_all_video_details_for_channel("UC1")
+    assert sorted(_ids(crawled)) == sorted(_ids(details))
+    assert {"viewCount", "title"} <= set(crawled[0])
+    # Only video IDs are asked of playlistItems, the videos call fetches the rest
+    assert fake_api.calls("playlistItems")[0]["fields"] == "items(contentDetails(videoId)),nextPageToken"
+
+def test_sinks_receive_extracted_rows(offline_client):
+    from yt_stats_wrangler.utils.warehouse import WarehouseSink
+    sink = WarehouseSink()
+    client = offline_client(sinks=[sink])
+    try:
+        stats = client.get_channel_statistics_for_channels(["UC1", "UC2"])
+        comments = client.get_all_video_comments("v0")
+        # Rerunning a crawl upserts the same rows
+        client.get_all_video_comments("v0")
+        sink.flush()
+        assert sink.conn.execute("SELECT COUNT(*) FROM channel_stats").fetchone()[0] == len(stats) == 2
+        assert sink.conn.execute("SELECT COUNT(*) FROM comments").fetchone()[0] == len(comments) == 11
+    finally:
+        sink.close()
+
+def test_video_stats_reach_sinks_chunk_by_chunk(offline_client, fake_api):
+    class ListSink:
+        def __init__(self):
+            self.batches = []
+
+        def write(self, rows):
+            self.batches.append(_ids(rows))
+
+    sink = ListSink()
+    client = offline_client(cache_size=10, sinks=[sink])
+    client.get_video_stats(["v3"])
+    sink.batches.clear()
+
+    # The first chunk is written before the second one fails, and the memoized video before either
+    fake_api.fail = lambda resource, params: (503, "backendError") if "v2" in params.get("id", "") else None
+    ids = [f"x{i}" for i in range(49)] + ["v0", "v3", "v1", "v2", "v0"]
+    rows = client.get_video_stats(ids)
+    assert sink.batches == [["v3"], ["v0"]]
+    assert _ids(rows) == ["v0", "v3", "v0"]
+    assert rows[0] is not rows[2]
+    assert [f.entity_id for f in client.failures] == ["v1", "v2"]
+
+def test_failures_are_recorded_and_only_retriable_ones_retried(offline_client, fake_api):
+    client = offline_client()
+
+    def fail(resource, params):
+        if resource == "commentThreads":
+            return {"v1": (403, "commentsDisabled"), "v2": (503, "backendError")}.get(params["videoId"])
+    fake_api.fail = fail
+    rows = client.get_all_comments_for_video_ids(["v0", "v1", "v2"], print_current_video=False)
+    assert len(rows) == 11
+    assert [(f.method, f.entity_id, f.http_status, f.reason, f.retriable) for f in client.failures] == [
+        ("get_all_video_comments", "v1", 403, "commentsDisabled", False),
+        ("get_all_video_comments", "v2", 503, "backendError", True)]
+
+    # The 503 is retried once the API recovers, the permanent failure is kept and not asked for again
+    fake_api.fail = None
+    fake_api.requests.clear()
+    rows = client.retry_failures(rows, delay=0)
+    assert len(rows) == 22
+    assert {params["videoId"] for params in fake_api.calls("commentThreads")} == {"v2"}
+    assert [(f.entity_id, f.retriable) for f in client.failures] == [("v1", False)]
+
+def test_retry_failures_only_retries_the_call_behind_results(offline_client, fake_api):
+    client = offline_client()
+    fake_api.fail = lambda resource, params: (503, "backendError") if resource == "videos" else None
+    assert client.get_video_stats(["v0"]) == []
+    fake_api.fail = lambda resource, params: (
+        (503, "backendError") if resource == "commentThreads" and params["videoId"] == "v2" else None)
+    comments = client.get_all_comments_for_video_ids(["v0", "v2"], print_current_video=False)
+    assert len(comments) == 11
+
+    # The video stats failure belongs to another call, so it is neither retried nor merged into the comments
+    fake_api.fail = None
+    fake_api.requests.clear()
+    comments = client.retry_failures(comments, delay=0)
+    assert len(comments) == 22 and all("commentId" in row for row in comments)
+    assert fake_api.calls("videos") == []
+    assert [(f.method, f.entity_id) for f in client.failures] == [("get_video_stats", "v0")]
+
+    rows = client.retry_failures(delay=0, methods=["get_video_stats"])
+    assert _ids(rows) == ["v0"]
+    assert client.failures == []
+
+def test_retry_failures_keeps_records_until_they_succeed(offline_client, fake_api):
+    client = offline_client(max_quota=2)
+    fake_api.fail = lambda resource, params: (503, "backendError") if resource == "commentThreads" else None
+    rows = client.get_all_comments_for_video_ids(["v0", "v1"], print_current_video=False)
+    assert rows == [] and client.quota_used == 2
+
+    # A failed retry replaces the record, and the quota running out leaves the rest in place
+    client.reset_quota_used()
+    client.max_quota = 1
+    assert client.retry_failures(rows, delay=0, max_attempts=2) == []
+    assert [(f.entity_id, f.attempts) for f in client.failures] == [("v1", 1), ("v0", 2)]
+    assert client.last_failures == client.failures
+
+    fake_api.fail = None
+    client.max_quota = -1
+    rows = client.retry_failures(rows, delay=0)
+    assert len(rows) == 22
+    assert client.failures == []
+
+def test_comment_limits_stop_paging(offline_client, fake_api):
+    client = offline_client()
+    top = client.get_top_level_video_comments("v0", max_comments=2, order="relevance")
+    assert len(top) == 2
+    call = fake_api.calls("commentThreads")[0]
+    assert (call["maxResults"], call["order"]) == ("2", "relevance")
+    assert client.quota_used == 1
+
+    fake_api.requests.clear()
+    comments = client.get_all_video_comments("v0", max_comments=4, max_replies_per_thread=1)
+    assert sum(1 for row in comments if row["parentId"] is None) == 4
+    assert [row["commentId"] for row in comments if row["parentId"] is not None] == ["v0c0.r0"]
+    # A reply cap of 5 or less is served from the inline replies
+    assert fake_api.calls("comments") == []
+    assert [call["maxResults"] for call in fake_api.calls("commentThreads")] == ["4", "1"]
+
+    with pytest.raises(ValueError, match="Invalid order"):
+        client.get_top_level_video_comments("v0", order="newest")
+
+def test_time_budget_returns_partial_rows_and_resumes(offline_client, fake_clock):
+    client = offline_client()
+    full = client.get_all_video_details_for_channel("UC1")
+
+    fake_clock.requests.clear()
+    client.reset_quota_used()
+    # The uploads lookup and the first two playlist pages fit in the budget
+    partial = client.get_all_video_details_for_channel("UC1", timeout_budget=2.5)
+    assert _ids(partial) == ["v0", "v1", "v2", "v3", "v4", "v5"]
+    assert client.deadline_reached
+    assert client.continuation == Continuation("get_all_video_details_for_channel", "UC1", "p6")
+    assert client.quota_used == len(fake_clock.requests) == 3
+
+    rows = client.resume(client.continuation.to_dict())
+    assert client.continuation is None
+    assert sorted(_ids(partial + rows)) == sorted(_ids(full))
+    assert fake_clock.calls("playlistItems")[2]["pageToken"] == "p6"
+
+def test_multi_id_time_budget_records_pending_ids(offline_client, fake_clock, capsys):
+    client = offline_client()
+    rows = client.get_all_comments_for_video_ids(["v0", "v1", "v2"], max_comments=3, timeout_budget=2.5,
+                                                 print_current_video=False)
+    # v0's thread page and two of its reply pages
+    assert len(rows) == 1 + 6
+    continuation = client.continuation
+    assert (continuation.method, continuation.entity_id, continuation.page_token) == (
+        "get_all_comments_for_video_ids", "v0", None)
+    assert continuation.options == {"max_comments": 2, "skip_threads": 1}
+    assert (continuation.pending, continuation.pending_options) == (
+        ["v1", "v2"], {"max_comments": 3, "print_current_video": False})
+
+    # The resumed call stays quiet as the original did
+    capsys.readouterr()
+    rows += client.resume(continuation.to_dict())
+    assert "Fetching all comments" not in capsys.readouterr().out
+    assert client.continuation is None
+    assert sum(1 for row in rows if row["parentId"] is None) == 9
+    assert len({row["commentId"] for row in rows}) == len(rows) == 3 * (3 + 7)
+
+def test_crawl_channel_resumes_with_the_ids_it_paid_for(offline_client, fake_clock):
+    client = offline_client()
+    # The uploads lookup and the first playlist page, whose videos call is then refused
+    rows = client.crawl_channel("UC1", timeout_budget=1.5)
+    assert rows == []
+    assert client.continuation == Continuation("crawl_channel", "UC1", "p3",
+                                               {"playlist_id": "UU1", "video_ids": ["v0", "v1", "v2"]})
+
+    resumes = 0
+    while client.continuation is not None:
+        rows += client.resume(client.continuation.to_dict(), timeout_budget=1.5)
+        resumes += 1
+    assert sorted(_ids(rows)) == sorted(fake_clock.videos)
+    assert resumes == 3
+    # The uploads playlist is looked up once and every playlist page is only read once
+    assert len(fake_clock.calls("channels")) == 1
+    assert [call.get("pageToken") for call in fake_clock.calls("playlistItems")] == [None, "p3", "p6"]
+    assert len(fake_clock.calls("videos")) == 3
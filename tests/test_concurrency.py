@@ -0,0 +1,93 @@
+import threading
+import time
+import pytest
+from googleapiclient.errors import HttpError
+from yt_stats_wrangler.api.concurrency import AdaptiveConcurrency, page_size
+
+def test_page_size_is_the_largest_page_unless_fewer_rows_are_wanted():
+    assert page_size("playlistItems") == 50
+    assert page_size("commentThreads") == 100
+    assert page_size("comments", 7) == 7
+    assert page_size("comments", 500) == 100
+    assert page_size("commentThreads", 0) == 1
+
+def test_fast_requests_raise_the_limit_up_to_the_maximum():
+    controller = AdaptiveConcurrency(max_concurrency=6, initial=2)
+    for _ in range(200):
+        with controller.slot("youtube.videos.list"):
+            pass
+    assert controller.concurrency == 6
+    assert controller.stats()["requests"] == 200
+
+def test_a_burst_of_rate_limits_halves_the_limit_once(http_error):
+    controller = AdaptiveConcurrency(max_concurrency=16, initial=8)
+    started = [controller.acquire() for _ in range(8)]
+    for start in started:
+        controller.release(start, "youtube.videos.list", http_error(403, "rateLimitExceeded"))
+    assert controller.concurrency == 4
+    assert controller.stats()["throttled"] == 8
+    assert controller.stats()["decreases"] == 1
+    # A request started after the decrease can decrease it again
+    controller.release(controller.acquire(), "youtube.videos.list", http_error(503, "backendError"))
+    assert controller.concurrency == 2
+
+def test_permanent_errors_leave_the_limit_alone(http_error):
+    controller = AdaptiveConcurrency(max_concurrency=16, initial=8)
+    controller.release(controller.acquire(), "youtube.videos.list", http_error(403, "quotaExceeded"))
+    controller.release(controller.acquire(), "youtube.videos.list", http_error(404, "videoNotFound"))
+    assert controller.limit == 8
+    assert controller.stats()["throttled"] == 0
+
+def test_slow_responses_decrease_the_limit():
+    controller = AdaptiveConcurrency(max_concurrency=16, initial=8, min_slowdown=0.01)
+    controller.release(controller.acquire(), "youtube.videos.list")
+    started = controller.acquire()
+    time.sleep(0.05)
+    controller.release(started, "youtube.videos.list")
+    assert controller.concurrency == 4
+
+def test_no_more_than_the_limit_run_at_once():
+    controller = AdaptiveConcurrency(max_concurrency=2, initial=2)
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def work():
+        with controller.slot():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+
+def test_interrupted_requests_give_their_slot_back(http_error):
+    controller = AdaptiveConcurrency(max_concurrency=1, initial=1)
+    with pytest.raises(KeyboardInterrupt):
+        with controller.slot():
+            raise KeyboardInterrupt
+    with pytest.raises(HttpError):
+        with controller.slot():
+            raise http_error(503, "backendError")
+    assert controller.stats()["in_flight"] == 0
+    assert controller.stats()["throttled"] == 1
+
+    # A generator closed while it holds a slot releases it too
+    def pages():
+        with controller.slot():
+            yield 1
+    generator = pages()
+    next(generator)
+    generator.close()
+    assert controller.stats()["in_flight"] == 0
+
+def test_invalid_limits_raise():
+    with pytest.raises(ValueError):
+        AdaptiveConcurrency(max_concurrency=2, min_concurrency=3)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrency(backoff=1.5)
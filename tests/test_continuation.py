@@ -0,0 +1,48 @@
+import json
+import pytest
+from yt_stats_wrangler.api.client import YouTubeDataClient
+from yt_stats_wrangler.api.continuation import Continuation
+
+# A budget of zero stops every method before its first request, so none of these tests touch the network
+
+@pytest.fixture
+def client():
+    return YouTubeDataClient(api_key="offline")
+
+def test_continuation_round_trips_through_json():
+    continuation = Continuation("get_all_comments_for_video_ids", "abc", "CDIQAA", {"max_comments": 40},
+                                pending=["def", "ghi"], pending_options={"max_comments": 50})
+    data = json.loads(json.dumps(continuation.to_dict()))
+    assert Continuation.from_dict(dict(data, unknown_key=1)) == continuation
+
+def test_zero_budget_leaves_every_id_pending(client):
+    assert client.get_video_stats(["a", "b", "a"], timeout_budget=0) == []
+    assert client.deadline_reached
+    assert client.continuation == Continuation("get_video_stats", pending=["a", "b"])
+    assert client.quota_used == 0
+
+def test_multi_id_methods_keep_their_limits(client):
+    client.get_all_comments_for_video_ids(["a", "b"], max_comments=10, timeout_budget=0, print_current_video=False)
+    assert client.continuation.method == "get_all_comments_for_video_ids"
+    assert client.continuation.pending == ["a", "b"]
+    assert client.continuation.pending_options == {"max_comments": 10, "print_current_video": False}
+
+def test_paged_crawls_record_their_entity(client):
+    client.get_top_level_video_comments("abc", page_token="CDIQAA", max_comments=5, timeout_budget=0)
+    assert client.continuation == Continuation("get_top_level_video_comments", "abc", "CDIQAA", {"max_comments": 5})
+
+def test_resume_with_no_time_left_keeps_the_continuation(client):
+    client.get_channel_statistics_for_channels(["a", "b"], timeout_budget=0)
+    saved = client.continuation.to_dict()
+    assert client.resume(saved, timeout_budget=0) == []
+    assert client.continuation.to_dict() == saved
+
+def test_calls_without_a_budget_clear_the_continuation(client):
+    client.get_video_stats(["a"], timeout_budget=0)
+    client.set_max_quota(0)
+    client.get_video_stats(["a"])
+    assert client.continuation is None and not client.deadline_reached
+
+def test_resume_needs_a_continuation(client):
+    with pytest.raises(ValueError, match="no continuation"):
+        client.resume()
@@ -28,6 +28,16 @@ def test_convert_to_library_polars():
     assert isinstance(result, pl.DataFrame)
     assert result[0, "videoId"] == "abc123"
 
+def test_convert_to_library_polars_lazy():
+    try:
+        import polars as pl
+    except ImportError:
+        pytest.skip("Polars not installed")
+
+    result = convert_to_library(test_data, output_format="polars_lazy")
+    assert isinstance(result, pl.LazyFrame)
+    assert result.collect()[0, "videoId"] == "abc123"
+
 def test_convert_to_library_pyspark():
     try:
         from pyspark.sql import DataFrame
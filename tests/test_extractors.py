@@ -0,0 +1,69 @@
+import pytest
+from yt_stats_wrangler.api.extractors import compile_extractor, duration_seconds, extractor_columns
+
+VIDEO = {
+    "id": "abc",
+    "snippet": {"title": "A video", "channelId": "UC1", "tags": ["x"]},
+    "statistics": {"viewCount": "1200", "likeCount": "30"},
+    "contentDetails": {"duration": "PT45S", "definition": "hd"},
+}
+
+THREAD = {
+    "snippet": {
+        "totalReplyCount": 2,
+        "topLevelComment": {"id": "c1", "snippet": {"authorDisplayName": "@a", "textDisplay": "hi",
+                                                    "publishedAt": "2024-01-01T00:00:00Z", "likeCount": 3}},
+    }
+}
+
+def test_duration_seconds():
+    assert duration_seconds("PT1M30S") == 90
+    assert duration_seconds(None) == 0
+
+def test_video_stats_row_matches_schema():
+    row = compile_extractor("videoStats").row(VIDEO, "now")
+    assert row == {
+        "videoId": "abc", "title": "A video", "description": None, "publishedAt": None, "channelId": "UC1",
+        "channelTitle": None, "tags": ["x"], "categoryId": None, "viewCount": 1200, "likeCount": 30,
+        "commentCount": 0, "duration_seconds": 45, "definition": "hd", "isShort": True,
+        "videoStats_commit_time": "now",
+    }
+
+def test_duration_is_parsed_once_for_both_columns():
+    source = compile_extractor("videoStats").source.split("def extract_page")[0]
+    assert source.count("_duration_seconds(") == 1
+
+def test_selected_columns_follow_selection_order():
+    extract = compile_extractor("videoStats", ("viewCount", "videoId"))
+    assert list(extract.row(VIDEO, "now")) == ["viewCount", "videoId", "videoStats_commit_time"]
+    assert "snippet" not in extract.source
+
+def test_columns_from_a_shared_schema_are_skipped():
+    # Top-level comment rows have no parentId, even though the all-comments schema does
+    assert extractor_columns("topLevelComments", ("commentId", "parentId")) == ("commentId",)
+    row = compile_extractor("topLevelComments", ("commentId", "parentId")).row(THREAD, "now", video_id="v1")
+    assert row == {"commentId": "c1", "videoTopLevelComments_commit_time": "now"}
+
+def test_page_uses_inputs_and_matches_rows():
+    extract = compile_extractor("comments")
+    rows = extract.page([THREAD, THREAD], "now", video_id="v1")
+    assert rows == [extract.row(THREAD, "now", video_id="v1")] * 2
+    assert rows[0]["videoId"] == "v1" and rows[0]["parentId"] is None and rows[0]["replyCount"] == 2
+
+def test_missing_nested_objects_use_defaults():
+    row = compile_extractor("replies").row({"id": "r1"}, "now", parent_id="c1")
+    assert row["parentId"] == "c1" and row["likeCount"] == 0 and row["author"] is None
+
+def test_list_defaults_are_not_shared_between_rows():
+    first, second = compile_extractor("videoStats", ("tags",)).page([{}, {}], "now")
+    first["tags"].append("x")
+    assert second["tags"] == []
+
+def test_extractors_are_cached():
+    assert compile_extractor("replies", ("commentId",)) is compile_extractor("replies", ("commentId",))
+
+def test_invalid_record_type_and_column():
+    with pytest.raises(ValueError, match="Invalid record type"):
+        compile_extractor("playlists")
+    with pytest.raises(ValueError, match="Invalid column"):
+        compile_extractor("videoStats", ("notAColumn",))
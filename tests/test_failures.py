@@ -0,0 +1,24 @@
+from yt_stats_wrangler.api.failures import FailureRecord, failure_from_exception, http_error_reason, is_retriable
+
+def test_transient_http_errors_are_retriable(http_error):
+    assert is_retriable(http_error(503, "backendError"))
+    assert is_retriable(http_error(500, "unknown"))
+    assert is_retriable(http_error(403, "rateLimitExceeded"))
+    assert is_retriable(ConnectionResetError())
+    assert is_retriable(TimeoutError())
+
+def test_permanent_errors_are_not_retriable(http_error):
+    assert not is_retriable(http_error(403, "quotaExceeded"))
+    assert not is_retriable(http_error(403, "commentsDisabled"))
+    assert not is_retriable(http_error(404, "videoNotFound"))
+    assert not is_retriable(KeyError("snippet"))
+
+def test_failure_from_exception_keeps_status_reason_and_page_token(http_error):
+    error = http_error(503, "backendError")
+    error.page_token = "CDIQAA"
+    failure = failure_from_exception("get_all_video_comments", "abc", error)
+    assert isinstance(failure, FailureRecord)
+    assert (failure.http_status, failure.reason, failure.retriable) == (503, "backendError", True)
+    assert failure.page_token == "CDIQAA"
+    assert failure.to_dict()["error_class"] == "HttpError"
+    assert http_error_reason(http_error(404, "videoNotFound")) == "videoNotFound"
@@ -0,0 +1,30 @@
+import pytest
+from yt_stats_wrangler.api.fields import resolve_columns, build_part, build_fields_mask
+
+def test_resolve_columns_defaults_to_everything():
+    assert resolve_columns("videoStats", None) is None
+
+def test_resolve_columns_always_keeps_key_column():
+    assert resolve_columns("videoStats", ["viewCount"]) == ("videoId", "viewCount")
+    assert resolve_columns("videoStats", ["viewCount", "videoId"]) == ("viewCount", "videoId")
+
+def test_resolve_columns_rejects_unknown_columns():
+    with pytest.raises(ValueError, match="Invalid column"):
+        resolve_columns("videoStats", ["notAColumn"])
+
+def test_build_part_only_keeps_needed_parts():
+    columns = resolve_columns("videoStats", ["viewCount", "isShort"])
+    assert build_part("videoStats", columns, "snippet,statistics,contentDetails") == "statistics,contentDetails"
+    assert build_part("videoStats", None, "snippet,statistics,contentDetails") == "snippet,statistics,contentDetails"
+
+def test_build_part_falls_back_to_id():
+    columns = resolve_columns("channelStats", ["channelId"])
+    assert build_part("channelStats", columns, "statistics,snippet") == "id"
+
+def test_build_fields_mask_nests_paths():
+    columns = resolve_columns("videoStats", ["viewCount", "likeCount"])
+    assert build_fields_mask("videoStats", columns, paged=False) == "items(id,statistics(viewCount,likeCount))"
+
+    columns = resolve_columns("comments", ["text"])
+    assert build_fields_mask("comments", columns) == \
+        "items(snippet(topLevelComment(id,snippet(textDisplay)))),nextPageToken"
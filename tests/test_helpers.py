@@ -1,4 +1,5 @@
-from yt_stats_wrangler.utils.helpers import current_commit_time, format_column_friendly_string, format_dict_keys
+import pytest
+from yt_stats_wrangler.utils.helpers import current_commit_time, format_column_friendly_string, format_dict_keys, dedupe_ids, merge_outputs
 
 def test_current_commit_time():
     result = current_commit_time("videoTest")
@@ -36,3 +37,15 @@ def test_format_dict_keys_output():
     formatted = format_dict_keys(raw, case="mixed")
     assert all("video_Id" in d and "published_At" in d for d in formatted)
     assert formatted[0]["video_Id"] == "123"
+
+def test_dedupe_ids_keeps_first_seen_order():
+    assert dedupe_ids(["b", "a", "b", "c", "a"]) == ["b", "a", "c"]
+    assert dedupe_ids([]) == []
+
+def test_merge_outputs_appends_rows_and_frames():
+    assert merge_outputs([{"a": 1}], [{"a": 2}]) == [{"a": 1}, {"a": 2}]
+    assert merge_outputs(None, [{"a": 2}]) == [{"a": 2}]
+    pd = pytest.importorskip("pandas")
+    merged = merge_outputs(pd.DataFrame([{"a": 1}]), pd.DataFrame([{"a": 2, "b": 3}]), output_format="pandas")
+    assert list(merged["a"]) == [1, 2]
+    assert "b" in merged.columns
@@ -0,0 +1,178 @@
+import json
+import pytest
+from yt_stats_wrangler.api.jobs import CrawlJob, QuotaBudget, estimate_job, load_manifest, validate_manifest
+from yt_stats_wrangler.utils.helpers import convert_to_library
+
+class JobStubClient:
+    """Minimal stand-in for JobClient: every call draws one unit from the job budget."""
+    def __init__(self, budget):
+        self.budget = budget
+        self.quota_refused = False
+
+    def check_quota(self, units=1):
+        if self.budget.take(units):
+            return True
+        self.quota_refused = True
+        return False
+
+    def get_channel_statistics(self, channel_id, columns=None):
+        self.check_quota()
+        return [{"channelId": channel_id, "subscribers": 10, "channelStats_commit_time": "2024-01-01 00:00:00"}]
+
+    def crawl_channel(self, channel_id, columns=None):
+        rows = []
+        for i in range(3):
+            if not self.check_quota():
+                break
+            rows.append({"videoId": f"{channel_id}-v{i}", "viewCount": i, "videoStats_commit_time": "2024-01-01 00:00:00"})
+        return rows
+
+    def get_all_video_comments(self, video_id, columns=None, output_format="raw"):
+        if not self.check_quota():
+            return convert_to_library([], output_format)
+        rows = [{"commentId": f"{video_id}-c", "videoId": video_id, "videoAllComments_commit_time": "2024-01-01 00:00:00"}]
+        return convert_to_library(rows, output_format)
+
+def _manifest(tmp_path, **kwargs):
+    manifest = {"channels": ["UC1", "UC2"], "pull": ["channel_stats", "video_stats", "all_comments"],
+                "output": {"type": "jsonl", "path": str(tmp_path / "out")}, "concurrency": 2}
+    manifest.update(kwargs)
+    return validate_manifest(manifest)
+
+def _read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_job_runs_channel_then_comment_tasks(tmp_path):
+    job = CrawlJob(_manifest(tmp_path), client_factory=JobStubClient, progress=False)
+    summary = job.run()
+    # 2 channel stats + 2 crawls + 6 comment tasks for the videos found on the channels
+    assert summary["completed"] == 10
+    assert len(_read_jsonl(tmp_path / "out" / "videoStats.jsonl")) == 6
+    assert len(_read_jsonl(tmp_path / "out" / "videoAllComments.jsonl")) == 6
+
+def test_job_resumes_from_checkpoint_after_quota_runs_out(tmp_path):
+    checkpoint = str(tmp_path / "job.json")
+    first = CrawlJob(_manifest(tmp_path, quota=5, concurrency=1), checkpoint=checkpoint,
+                     client_factory=JobStubClient, progress=False)
+    summary = first.run()
+    assert summary["quota_exhausted"]
+    assert summary["quota_used"] == 5
+
+    second = CrawlJob(_manifest(tmp_path, concurrency=1), checkpoint=checkpoint,
+                      client_factory=JobStubClient, progress=False)
+    second.run()
+    state = json.load(open(checkpoint))
+    assert len(state["completed"]) == 10
+    # Only the unfinished crawl and the comment tasks were run the second time
+    assert second.budget.used < 12
+    comments = _read_jsonl(tmp_path / "out" / "videoAllComments.jsonl")
+    assert len({row["commentId"] for row in comments}) == 6
+
+def test_quota_budget_never_goes_over_limit():
+    budget = QuotaBudget(limit=3)
+    assert budget.take(2) and budget.take(1)
+    assert not budget.take(1)
+    assert budget.used == 3 and budget.exhausted
+
+def test_estimate_job_counts_tasks_and_quota(tmp_path):
+    manifest = _manifest(tmp_path, handles=["@cdcodes"], videos=["a"], estimates={"videos_per_channel": 100})
+    summary = estimate_job(manifest)
+    assert summary["handle"] == {"tasks": 1, "requests": 1, "quota": 100}
+    # Three channels (two listed, one from the handle), each with 1 + 2 units per 50 videos
+    assert summary["video_stats"]["quota"] == 3 * 5
+    assert summary["all_comments"]["tasks"] == 1 + 3 * 100
+
+def test_comment_limits_lower_the_estimate(tmp_path):
+    manifest = _manifest(tmp_path, videos=["a"], comments_on_channel_videos=False, pull=["all_comments"],
+                         estimates={"comment_threads_per_video": 1000, "reply_pages_per_video": 4})
+    assert estimate_job(manifest)["all_comments"]["quota"] == 10 + 4
+    limited = _manifest(tmp_path, videos=["a"], comments_on_channel_videos=False, pull=["all_comments"],
+                        estimates={"comment_threads_per_video": 1000, "reply_pages_per_video": 4},
+                        comment_limits={"max_comments": 150, "max_replies_per_thread": 5})
+    assert estimate_job(limited)["all_comments"]["quota"] == 2
+
+def test_validate_manifest_rejects_bad_comment_limits():
+    with pytest.raises(ValueError, match="comment_limits"):
+        validate_manifest({"videos": ["a"], "pull": ["all_comments"], "comment_limits": {"max_likes": 5}})
+    with pytest.raises(ValueError, match="Invalid order"):
+        validate_manifest({"videos": ["a"], "pull": ["all_comments"], "comment_limits": {"order": "newest"}})
+
+def test_load_manifest_reads_yaml_and_json(tmp_path):
+    pytest.importorskip("yaml")
+    yaml_path = tmp_path / "job.yaml"
+    yaml_path.write_text("channels: [UC1]\npull: [channel_stats]\n")
+    json_path = tmp_path / "job.json"
+    json_path.write_text(json.dumps({"videos": ["a"], "pull": ["video_stats"]}))
+    assert load_manifest(str(yaml_path))["channels"] == ["UC1"]
+    assert load_manifest(str(json_path))["quota"] == -1
+
+def test_validate_manifest_rejects_unknown_pull():
+    with pytest.raises(ValueError):
+        validate_manifest({"channels": ["UC1"], "pull": ["everything"]})
+    with pytest.raises(ValueError):
+        validate_manifest({"pull": ["channel_stats"]})
+
+def test_job_writes_to_an_arrow_catalog(tmp_path):
+    pytest.importorskip("pyarrow")
+    from yt_stats_wrangler.utils.arrow_catalog import ArrowCatalog
+    manifest = _manifest(tmp_path, output={"type": "arrow", "path": str(tmp_path / "catalog"), "job_id": "daily"})
+    CrawlJob(manifest, client_factory=JobStubClient, progress=False).run()
+    catalog = ArrowCatalog(str(tmp_path / "catalog"))
+    assert catalog.open("daily", "videoStats").num_rows == 6
+    assert catalog.open("daily", "videoAllComments").num_rows == 6
+
+def test_adaptive_concurrency_is_shared_by_the_job():
+    manifest = validate_manifest({"channels": ["UC1"], "pull": ["video_stats"], "concurrency": 8,
+                                  "adaptive_concurrency": True})
+    job = CrawlJob(manifest, client_factory=JobStubClient, progress=False)
+    assert job.concurrency.max_concurrency == 8
+    assert CrawlJob(validate_manifest({"channels": ["UC1"], "pull": ["video_stats"]}),
+                    client_factory=JobStubClient, progress=False).concurrency is None
+
+def test_profile_dir_turns_profiling_on(tmp_path):
+    manifest = _manifest(tmp_path, profile_dir=str(tmp_path / "profile"))
+    assert manifest["profile"]
+    job = CrawlJob(manifest, client_factory=JobStubClient, progress=False)
+    assert "profile" in job.run()
+
+class FlakyJobClient(JobStubClient):
+    """A JobStubClient whose first video stats batch and first handle lookup fail."""
+    calls = {"get_video_stats": 0, "get_channel_id_from_handle": 0}
+
+    def __init__(self, budget):
+        super().__init__(budget)
+        self.failures = []
+
+    def get_video_stats(self, video_ids, columns=None):
+        self.check_quota()
+        FlakyJobClient.calls["get_video_stats"] += 1
+        if FlakyJobClient.calls["get_video_stats"] == 1:
+            self.failures.append(("get_video_stats", video_ids[0]))
+            return []
+        return [{"videoId": video_id, "viewCount": 1, "videoStats_commit_time": "2024-01-01 00:00:00"}
+                for video_id in video_ids]
+
+    def get_channel_id_from_handle(self, handle):
+        self.check_quota(100)
+        FlakyJobClient.calls["get_channel_id_from_handle"] += 1
+        return None if FlakyJobClient.calls["get_channel_id_from_handle"] == 1 else "UC9"
+
+def test_tasks_with_failed_calls_are_run_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(FlakyJobClient, "calls", {"get_video_stats": 0, "get_channel_id_from_handle": 0})
+    checkpoint = str(tmp_path / "job.json")
+    manifest = _manifest(tmp_path, channels=[], handles=["@flaky"], videos=["a", "b"],
+                         pull=["video_stats", "channel_stats"], concurrency=1)
+    first = CrawlJob(manifest, checkpoint=checkpoint, client_factory=FlakyJobClient, progress=False)
+    first.run()
+    state = json.load(open(checkpoint))
+    # The failed batch is not marked done, and the unresolved handle is not cached as None
+    assert state["completed"] == []
+    assert state["channels"] == {}
+
+    second = CrawlJob(manifest, checkpoint=checkpoint, client_factory=FlakyJobClient, progress=False)
+    second.run()
+    state = json.load(open(checkpoint))
+    assert sorted(state["completed"]) == ["channel_stats:UC9", "handle:@flaky", "video_stats:UC9", "video_stats_batch:0"]
+    assert state["channels"] == {"@flaky": "UC9"}
+    assert {"a", "b"} <= {row["videoId"] for row in _read_jsonl(tmp_path / "out" / "videoStats.jsonl")}
@@ -0,0 +1,33 @@
+import json
+import pytest
+from yt_stats_wrangler.api.client import YouTubeDataClient
+from yt_stats_wrangler.api.models import FastJsonModel, load_json_decoder
+
+PAGE = {"items": [{"id": "c1", "snippet": {"textDisplay": "café \U0001F600", "likeCount": 3}}], "nextPageToken": "abc"}
+
+@pytest.mark.parametrize("decoder", ["auto", "orjson", "msgspec", "json"])
+def test_decodes_like_the_default_model(decoder):
+    if decoder in ("orjson", "msgspec"):
+        pytest.importorskip(decoder)
+    model = FastJsonModel(decoder)
+    assert model.deserialize(json.dumps(PAGE).encode("utf-8")) == PAGE
+    assert model.deserialize(json.dumps(PAGE)) == PAGE
+
+def test_non_json_bodies_are_returned_as_text():
+    assert FastJsonModel("json").deserialize(b"<html>error</html>") == "<html>error</html>"
+
+def test_data_wrapper_is_unwrapped():
+    model = FastJsonModel(data_wrapper=True)
+    assert model.deserialize(b'{"data": {"id": "x"}}') == {"id": "x"}
+
+def test_auto_picks_an_installed_decoder():
+    name, loads = load_json_decoder("auto")
+    assert name in ("orjson", "msgspec", "json")
+    assert loads(b"[1, 2]") == [1, 2]
+    with pytest.raises(ValueError):
+        load_json_decoder("simdjson")
+
+def test_client_uses_the_model():
+    model = FastJsonModel()
+    client = YouTubeDataClient(api_key="not-used", model=model)
+    assert client.youtube._model is model
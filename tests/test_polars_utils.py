@@ -15,4 +15,149 @@ def test_to_polars_df_creates_polars_dataframe():
 
     df = to_polars_df(test_data)
     assert isinstance(df, pl.DataFrame)
-    assert df[0, "videoId"] == "abc123"
\ No newline at end of file
+    assert df[0, "videoId"] == "abc123"
+
+def test_batch_collector_concatenates_pages_with_different_columns():
+    try:
+        import polars as pl
+    except ImportError:
+        pytest.skip("Polars not installed")
+    from yt_stats_wrangler.utils.polars_utils import PolarsBatchCollector
+
+    collector = PolarsBatchCollector(key_format="lower")
+    collector.write_batch([{"commentId": "a", "replyCount": 1}])
+    collector.write_batch([{"commentId": "b", "parentId": "a"}])
+
+    df = collector.frame()
+    assert isinstance(df, pl.DataFrame)
+    assert df.shape == (2, 3)
+    assert df["comment_id"].to_list() == ["a", "b"]
+
+def test_batch_collector_spills_batches_to_lazy_scan(tmp_path):
+    try:
+        import polars as pl
+    except ImportError:
+        pytest.skip("Polars not installed")
+    from yt_stats_wrangler.utils.polars_utils import PolarsBatchCollector
+
+    for file_format in ("parquet", "ipc"):
+        collector = PolarsBatchCollector(spill=True, directory=str(tmp_path), file_format=file_format, batch_rows=1)
+        collector.write_batch(test_data[:1])
+        collector.write_batch(test_data[1:])
+
+        assert len(collector.files) == 2
+        lazy = collector.result("polars_lazy")
+        assert isinstance(lazy, pl.LazyFrame)
+        result = lazy.filter(pl.col("videoId") == "def456").select("title").collect()
+        assert result["title"].to_list() == ["Test Video 2"]
+
+        collector.cleanup()
+        assert collector.files == []
+        assert list(tmp_path.iterdir()) == []
+
+def test_batch_collector_buffers_pages_into_large_batches(tmp_path):
+    try:
+        import polars as pl
+    except ImportError:
+        pytest.skip("Polars not installed")
+    from yt_stats_wrangler.utils.polars_utils import PolarsBatchCollector
+
+    collector = PolarsBatchCollector(spill=True, directory=str(tmp_path), batch_rows=4)
+    for i in range(10):
+        collector.write_batch([{"commentId": f"c{i}", "likeCount": i}])
+    assert len(collector.files) == 2
+    assert len(collector.rows) == 2
+
+    df = collector.result("polars_lazy").collect()
+    assert df["commentId"].to_list() == [f"c{i}" for i in range(10)]
+    assert len(collector.files) == 3
+
+def test_batch_collector_scans_batches_with_different_columns(tmp_path):
+    try:
+        import polars as pl
+    except ImportError:
+        pytest.skip("Polars not installed")
+    from yt_stats_wrangler.utils.polars_utils import PolarsBatchCollector
+
+    # Missing columns are filled in, so both files share a schema; a new column needs its own scan
+    for extra, uniform in (({}, True), ({"parentId": "c0"}, False)):
+        collector = PolarsBatchCollector(spill=True, directory=str(tmp_path), batch_rows=1)
+        collector.write_batch([{"commentId": "c0", "replyCount": 1}])
+        collector.write_batch([{"commentId": "c1", **extra}])
+        df = collector.result("polars_lazy").collect()
+        assert collector._uniform is uniform
+        assert df["commentId"].to_list() == ["c0", "c1"]
+        assert df["replyCount"].to_list() == [1, None]
+
+def test_spilled_batches_are_closed_by_the_lazy_frame(tmp_path):
+    try:
+        import polars as pl
+    except ImportError:
+        pytest.skip("Polars not installed")
+    import gc
+    from yt_stats_wrangler.utils.polars_utils import PolarsBatchCollector, concat_polars_frames
+
+    collector = PolarsBatchCollector(spill=True, directory=str(tmp_path))
+    collector.write_batch(test_data)
+    lazy = collector.result("polars_lazy")
+    directory = collector.directory
+    assert lazy.spilled_batches.directory == directory
+    del collector
+    gc.collect()
+    # The frame owns the files, so they outlive the collector
+    assert lazy.collect().height == 2
+
+    # A frame concatenated from spilled frames holds their files open, and closing it deletes them all
+    other = PolarsBatchCollector(spill=True, directory=str(tmp_path))
+    other.write_batch(test_data)
+    combined = concat_polars_frames([lazy, other.result("polars_lazy")], lazy=True)
+    assert combined.spilled_batches.parts == [lazy.spilled_batches, other.spilled_batches]
+    del lazy, other
+    gc.collect()
+    assert combined.collect().height == 4
+
+    combined.spilled_batches.close()
+    assert not (tmp_path / directory).exists()
+    assert list(tmp_path.iterdir()) == []
+
+    # Files nobody closed go with the last frame that reads them
+    collector = PolarsBatchCollector(spill=True, directory=str(tmp_path))
+    collector.write_batch(test_data)
+    lazy = collector.result("polars_lazy")
+    del collector
+    gc.collect()
+    assert len(list(tmp_path.iterdir())) == 1
+    del lazy
+    gc.collect()
+    assert list(tmp_path.iterdir()) == []
+
+def test_batch_collector_deletes_files_nobody_took(tmp_path):
+    try:
+        import polars as pl
+    except ImportError:
+        pytest.skip("Polars not installed")
+    import gc
+    from yt_stats_wrangler.utils.polars_utils import PolarsBatchCollector
+
+    collector = PolarsBatchCollector(spill=True, directory=str(tmp_path), batch_rows=1)
+    collector.write_batch(test_data)
+    assert len(list(tmp_path.iterdir())) == 1
+    del collector
+    gc.collect()
+    assert list(tmp_path.iterdir()) == []
+
+    collector = PolarsBatchCollector(spill=True, directory=str(tmp_path), batch_rows=1)
+    collector.write_batch(test_data)
+    assert collector.result("polars").height == 2
+    assert list(tmp_path.iterdir()) == []
+
+def test_polars_frame_from_batches():
+    try:
+        import polars as pl
+    except ImportError:
+        pytest.skip("Polars not installed")
+    from yt_stats_wrangler.utils.polars_utils import polars_frame_from_batches
+
+    df = polars_frame_from_batches([test_data[:1], [], test_data[1:]])
+    assert df.height == 2
+    assert isinstance(polars_frame_from_batches([test_data], lazy=True), pl.LazyFrame)
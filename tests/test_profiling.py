@@ -0,0 +1,59 @@
+import json
+import time
+import pytest
+from googleapiclient.http import HttpMockSequence
+from yt_stats_wrangler.api.client import YouTubeDataClient
+from yt_stats_wrangler.api.profiling import Profiler, profiled_stage
+
+def _video(video_id):
+    return {"id": video_id, "snippet": {"title": "t", "publishedAt": "2024-01-01T00:00:00Z", "channelId": "UC1"},
+            "statistics": {"viewCount": "10", "likeCount": "2", "commentCount": "1"},
+            "contentDetails": {"duration": "PT30S"}}
+
+def test_stage_times_exclude_nested_stages():
+    profiler = Profiler(trace_allocations=False)
+    with profiler.method("crawl"):
+        with profiler.stage("request"):
+            time.sleep(0.02)
+            with profiler.stage("decode"):
+                time.sleep(0.01)
+    stages = {row["stage"]: row for row in profiler.report()}
+    assert set(stages) == {"request", "decode", "client"}
+    assert stages["request"]["wall_seconds"] >= 0.02
+    assert stages["decode"]["wall_seconds"] >= 0.01
+    assert sum(row["wall_share"] for row in stages.values()) == pytest.approx(1.0)
+    method, = profiler.method_report()
+    assert method["method"] == "crawl"
+    # Self times add up to the call, so nothing is counted twice
+    assert method["wall_seconds"] == pytest.approx(sum(row["wall_seconds"] for row in stages.values()))
+    assert [line.rsplit(" ", 1)[0] for line in profiler.folded()] == ["crawl", "crawl;request", "crawl;request;decode"]
+
+def test_profiled_stages_only_count_while_a_profiler_is_active():
+    profiler = Profiler(trace_allocations=False)
+    double = profiled_stage("convert", lambda x: x * 2)
+    assert double(2) == 4
+    assert profiler.report() == []
+    with profiler.method("crawl"):
+        assert double(3) == 6
+    assert [row["stage"] for row in profiler.report()] == ["convert", "client"]
+
+def test_client_calls_are_broken_down_by_stage(tmp_path):
+    profiler = Profiler(cprofile=True)
+    client = YouTubeDataClient(api_key="offline", profiler=profiler)
+    client.youtube._http = HttpMockSequence([({"status": "200"}, json.dumps({"items": [_video("a"), _video("b")]}))])
+    rows = client.get_video_stats(["a", "b"], key_format="upper")
+    profiler.close()
+    assert [row["VIEW_COUNT"] for row in rows] == [10, 10]
+    stages = {row["stage"]: row for row in profiler.report()}
+    assert {"request", "decode", "extract", "format_keys", "convert", "client"} <= set(stages)
+    assert stages["extract"]["calls"] == 2
+    assert profiler.method_report()[0]["method"] == "get_video_stats"
+    profiler.write_folded(str(tmp_path / "profile.folded"))
+    assert "get_video_stats;request;decode" in (tmp_path / "profile.folded").read_text()
+    assert profiler.stats().total_calls > 0
+
+def test_cprofile_stats_need_a_profiled_call():
+    with pytest.raises(ValueError):
+        Profiler().stats()
+    with pytest.raises(ValueError):
+        Profiler(cprofile=True).stats()
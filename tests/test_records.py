@@ -0,0 +1,43 @@
+import pickle
+import pytest
+from yt_stats_wrangler.utils.records import (CompactRecord, to_compact_records, records_to_dicts,
+                                             compact_in_place, record_class)
+from yt_stats_wrangler.utils.helpers import convert_to_library, format_dict_keys
+
+rows = [
+    {"videoId": "abc123", "viewCount": 10, "videoStats_commit_time": "2025-01-01 00:00:00"},
+    {"videoId": "def456", "viewCount": 20, "videoStats_commit_time": "2025-01-01 00:00:00"},
+]
+
+def test_compact_records_keep_dict_style_access():
+    records = to_compact_records(rows)
+    assert type(records[0]).__name__ == "VideoStatsRecord"
+    assert isinstance(records[0], CompactRecord)
+    assert records[0]["videoId"] == "abc123"
+    assert records[0].viewCount == 10
+    assert records[0].get("missing", "default") == "default"
+    with pytest.raises(KeyError):
+        records[0]["missing"]
+    assert records_to_dicts(records) == rows
+
+def test_compact_records_share_classes_and_intern_values():
+    records = to_compact_records([dict(row) for row in rows])
+    assert type(records[0]) is type(records[1])
+    assert records[0].videoStats_commit_time is records[1].videoStats_commit_time
+    assert record_class(("a", "b")) is record_class(("a", "b"))
+
+def test_compact_in_place_only_converts_tail():
+    data = [dict(row) for row in rows]
+    compact_in_place(data, start=1)
+    assert isinstance(data[0], dict)
+    assert isinstance(data[1], CompactRecord)
+
+def test_compact_records_pickle_round_trip():
+    records = to_compact_records(rows)
+    assert pickle.loads(pickle.dumps(records)) == records
+
+def test_compact_records_convert_to_other_formats():
+    records = convert_to_library(rows, output_format="records")
+    assert isinstance(records[0], CompactRecord)
+    assert format_dict_keys(records, case="lower")[0]["video_id"] == "abc123"
+    assert convert_to_library(records, output_format="pandas").shape == (2, 3)
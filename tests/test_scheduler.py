@@ -0,0 +1,100 @@
+import time
+from datetime import datetime, timezone
+import pytest
+from yt_stats_wrangler.api.scheduler import VideoRefreshScheduler
+
+class StatsOnlyClient:
+    """Minimal stand-in exposing the part of YouTubeDataClient the scheduler relies on."""
+    def __init__(self, published_at):
+        self.quota_used = 0
+        self.published_at = published_at
+        self.requests = []
+
+    def get_video_stats(self, video_ids, columns=None, use_cache=True):
+        self.quota_used += 1
+        self.requests.append(list(video_ids))
+        return [{"videoId": video_id, "viewCount": 100, "publishedAt": self.published_at} for video_id in video_ids]
+
+def test_new_videos_are_due_and_packed_into_full_batches():
+    client = StatsOnlyClient(datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
+    scheduler = VideoRefreshScheduler(client, quota_per_hour=10)
+    scheduler.track([f"v{i}" for i in range(120)])
+
+    now = time.time()
+    rows = scheduler.run_due(now)
+    assert len(rows) == 120
+    assert [len(batch) for batch in client.requests] == [50, 50, 20]
+    # Nothing is due straight after a refresh
+    assert scheduler.due_videos(now + 1) == []
+
+def test_hourly_quota_budget_is_respected():
+    client = StatsOnlyClient("2020-01-01T00:00:00Z")
+    scheduler = VideoRefreshScheduler(client, quota_per_hour=1)
+    scheduler.track([f"v{i}" for i in range(75)])
+
+    now = time.time()
+    assert len(scheduler.run_due(now)) == 50
+    assert scheduler.remaining_budget(now) == 0
+    assert scheduler.run_due(now + 60) == []
+    # The budget frees up after an hour, and the partial batch is topped up with the next videos due
+    assert len(scheduler.run_due(now + 3601)) == 50
+    assert client.quota_used == 2
+
+def test_old_videos_refresh_less_often_than_new_ones():
+    scheduler = VideoRefreshScheduler(StatsOnlyClient(None), min_interval=3600, max_interval=7 * 24 * 3600)
+    now = time.time()
+    new = {"publishedAt": now - 3600, "viewsPerHour": 0.0}
+    old = {"publishedAt": now - 365 * 24 * 3600, "viewsPerHour": 0.0}
+    busy = {"publishedAt": now - 5 * 24 * 3600, "viewsPerHour": 10000.0}
+    quiet = {"publishedAt": now - 5 * 24 * 3600, "viewsPerHour": 0.0}
+
+    assert scheduler.next_interval(new, now) < scheduler.next_interval(old, now)
+    assert scheduler.next_interval(old, now) == 7 * 24 * 3600
+    assert scheduler.next_interval(busy, now) < scheduler.next_interval(quiet, now)
+
+def test_invalid_intervals_raise():
+    with pytest.raises(ValueError):
+        VideoRefreshScheduler(StatsOnlyClient(None), min_interval=10, max_interval=5)
+
+def test_scheduled_refreshes_keep_the_stored_metadata():
+    from yt_stats_wrangler.utils.snapshot_store import SnapshotStore
+    store = SnapshotStore()
+    store.record_video_stats([{"videoId": "v0", "title": "Title", "description": "About", "viewCount": 50,
+                               "videoStats_commit_time": str(datetime.now())}])
+    scheduler = VideoRefreshScheduler(StatsOnlyClient("2020-01-01T00:00:00Z"), store=store)
+    scheduler.track(["v0"])
+    scheduler.run_due(time.time())
+    assert store.get_metadata("v0") == {"title": "Title", "description": "About", "publishedAt": "2020-01-01T00:00:00Z"}
+    assert [h["viewCount"] for h in store.get_history("v0")] == [50, 100]
+
+def test_videos_whose_request_failed_are_retried_soon(offline_client, fake_api):
+    client = offline_client()
+    scheduler = VideoRefreshScheduler(client, min_interval=3600, retry_delay=300)
+    scheduler.track(["v0", "v1", "gone"])
+    fake_api.fail = lambda resource, params: (503, "backendError")
+    now = time.time()
+    assert scheduler.run_due(now) == []
+    assert all(state["nextRefresh"] == now + 300 for state in scheduler.videos.values())
+
+    # Once the API recovers, only the video it leaves out is pushed back to max_interval
+    fake_api.fail = None
+    assert len(scheduler.run_due(now + 300)) == 2
+    assert scheduler.videos["gone"]["nextRefresh"] == now + 300 + scheduler.max_interval
+    assert (scheduler.videos["v0"]["lastViews"], scheduler.videos["v0"]["lastRefreshed"]) == (100, now + 300)
+
+def test_refreshes_bypass_the_client_cache(offline_client, fake_api):
+    client = offline_client(cache_size=1000)
+    scheduler = VideoRefreshScheduler(client, min_interval=3600)
+    scheduler.track(["v0"])
+    now = time.time()
+    fake_api.videos["v0"]["snippet"]["publishedAt"] = datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    scheduler.run_due(now)
+
+    fake_api.videos["v0"]["statistics"]["viewCount"] = "1100"
+    rows = scheduler.run_due(now + 10 * 3600)
+    assert [row["viewCount"] for row in rows] == [1100]
+    assert len(fake_api.calls("videos")) == 2
+    assert scheduler.videos["v0"]["viewsPerHour"] == 100.0
+    # Other calls still read the refreshed video from the cache
+    assert client.get_video_stats(["v0"], columns=scheduler.columns)[0]["viewCount"] == 1100
+    assert len(fake_api.calls("videos")) == 2
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+import pytest
+from yt_stats_wrangler.utils.snapshot_store import SnapshotStore
+
+def _video_row(video_id, views, likes=1, title="Test Video"):
+    return {"videoId": video_id, "title": title, "tags": ["a"], "viewCount": views,
+            "likeCount": likes, "commentCount": 0, "videoStats_commit_time": str(datetime.now())}
+
+def test_record_only_writes_changed_counters():
+    store = SnapshotStore()
+    start = datetime.now() - timedelta(hours=3)
+
+    # First poll writes every counter, second poll only the view count that moved
+    assert store.record_video_stats([_video_row("abc", 100)], observed_at=start) == 3
+    assert store.record_video_stats([_video_row("abc", 150)], observed_at=start + timedelta(hours=1)) == 1
+    assert store.record_video_stats([_video_row("abc", 150)], observed_at=start + timedelta(hours=2)) == 0
+
+    history = store.get_history("abc", counter="viewCount")
+    assert [h["viewCount"] for h in history] == [100, 150]
+    assert store.get_history("abc", counter="likeCount")[0]["likeCount"] == 1
+
+def test_metadata_is_stored_once_and_updated_on_change():
+    store = SnapshotStore()
+    store.record_video_stats([_video_row("abc", 100)])
+    assert store.get_metadata("abc") == {"title": "Test Video", "tags": ["a"]}
+
+    store.record_video_stats([_video_row("abc", 100, title="New Title")])
+    assert store.get_metadata("abc")["title"] == "New Title"
+    assert store.get_metadata("missing") is None
+
+def test_stats_only_rows_keep_the_stored_metadata():
+    store = SnapshotStore()
+    store.record_video_stats([_video_row("abc", 100)])
+    stats_only = {"videoId": "abc", "viewCount": 120, "videoStats_commit_time": str(datetime.now())}
+    assert store.record_video_stats([stats_only]) == 1
+    assert store.get_metadata("abc") == {"title": "Test Video", "tags": ["a"]}
+
+def test_top_growers_ranks_by_growth_in_window():
+    store = SnapshotStore()
+    now = datetime.now()
+    store.record_video_stats([_video_row("slow", 1000), _video_row("fast", 10), _video_row("old", 5)],
+                             observed_at=now - timedelta(hours=30))
+    store.record_video_stats([_video_row("slow", 1010), _video_row("fast", 510), _video_row("old", 5)],
+                             observed_at=now - timedelta(hours=1))
+
+    growers = store.top_growers(hours=24, counter="viewCount")
+    assert [g["entityId"] for g in growers] == ["fast", "slow"]
+    assert growers[0]["growth"] == 500
+
+def test_channel_stats_and_invalid_counter():
+    store = SnapshotStore()
+    store.record_channel_stats([{"channelId": "UC1", "channelName": "Chan", "subscribers": 10,
+                                 "totalChannelViews": 100, "totalPosts": 2}])
+    assert store.get_history("UC1", counter="subscribers", entity_type="channel")[0]["subscribers"] == 10
+
+    with pytest.raises(ValueError):
+        store.get_history("UC1", counter="viewCount", entity_type="channel")
+    with pytest.raises(ValueError):
+        store.record("playlist", [])
+
+def test_write_records_stats_rows_and_skips_others():
+    store = SnapshotStore()
+    rows = [_video_row("abc", 100), {"commentId": "c1", "videoAllComments_commit_time": str(datetime.now())}]
+    assert store.write(rows) == 3
+    assert store.get_history("abc")[0]["viewCount"] == 100
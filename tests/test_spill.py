@@ -0,0 +1,69 @@
+import os
+import pytest
+from yt_stats_wrangler.utils.helpers import convert_to_library, merge_outputs
+from yt_stats_wrangler.utils.spill import SpillBuffer
+
+def _rows(n, start=0):
+    # Mixes top-level comment and reply rows, which have different keys
+    rows = []
+    for i in range(start, start + n):
+        if i % 3:
+            rows.append({"commentId": f"c{i}", "parentId": f"c{i - 1}", "likeCount": i, "videoId": "v1"})
+        else:
+            rows.append({"commentId": f"c{i}", "videoId": "v1", "likeCount": i, "replyCount": 2, "parentId": None})
+    return rows
+
+@pytest.mark.parametrize("file_format", ["ipc", "jsonl"])
+def test_spills_at_row_budget_and_reads_back_in_order(tmp_path, file_format):
+    buffer = SpillBuffer(max_rows=10, directory=str(tmp_path), file_format=file_format)
+    for start in range(0, 35, 7):
+        buffer.write_batch(_rows(7, start))
+    assert len(buffer) == 35
+    assert len(buffer.files) == 2 and len(buffer.rows) == 7
+    assert list(buffer) == _rows(35)
+    assert [list(row) for row in buffer] == [list(row) for row in _rows(35)]
+
+def test_spills_at_byte_budget(tmp_path):
+    buffer = SpillBuffer(max_bytes=2000, directory=str(tmp_path))
+    buffer.write_batch(_rows(20))
+    assert buffer.rows == [] and buffer.rows_spilled == 20 and buffer.bytes_spilled > 0
+
+def test_no_budget_keeps_rows_in_memory():
+    buffer = SpillBuffer()
+    buffer.write_batch(_rows(50))
+    assert buffer.files == [] and buffer.directory is None
+
+def test_result_formats_and_cleanup(tmp_path):
+    buffer = SpillBuffer(max_rows=5, directory=str(tmp_path), key_format="upper")
+    buffer.write_batch(_rows(12))
+    df = buffer.result("pandas")
+    assert len(df) == 12 and "COMMENT_ID" in df.columns
+    assert os.listdir(tmp_path) == []
+
+def test_records_result(tmp_path):
+    buffer = SpillBuffer(max_rows=4, directory=str(tmp_path))
+    buffer.write_batch(_rows(9))
+    records = buffer.result("records")
+    assert [record.to_dict() for record in records] == _rows(9)
+
+def test_extend_takes_over_files(tmp_path):
+    first = SpillBuffer(max_rows=4, directory=str(tmp_path))
+    first.write_batch(_rows(2))
+    second = SpillBuffer(max_rows=4, directory=str(tmp_path))
+    second.write_batch(_rows(9, start=2))
+    first.extend(second)
+    first.extend(_rows(3, start=11))
+    assert list(first) == _rows(14)
+    assert len(second) == 0 and second.directory is None
+    first.cleanup()
+    assert os.listdir(tmp_path) == []
+
+def test_stream_output_format(tmp_path):
+    stream = convert_to_library(_rows(3), "stream")
+    assert isinstance(stream, SpillBuffer) and list(stream) == _rows(3)
+    merged = merge_outputs(stream, _rows(2, start=3), output_format="stream")
+    assert list(merged) == _rows(5)
+
+def test_invalid_file_format():
+    with pytest.raises(ValueError, match="Invalid file_format"):
+        SpillBuffer(file_format="csv")
@@ -0,0 +1,60 @@
+from datetime import datetime
+import pytest
+from yt_stats_wrangler.utils.warehouse import WarehouseSink
+
+def _video_row(video_id, views, title="Test Video"):
+    return {"videoId": video_id, "title": title, "channelId": "UC1", "tags": ["a", "b"], "viewCount": views,
+            "isShort": False, "videoStats_commit_time": str(datetime.now())}
+
+def _comment_row(comment_id, parent_id=None, likes=0):
+    return {"commentId": comment_id, "videoId": "abc", "text": "hi", "likeCount": likes, "parentId": parent_id,
+            "videoAllComments_commit_time": str(datetime.now())}
+
+@pytest.mark.parametrize("backend", ["sqlite", "duckdb"])
+def test_upserts_do_not_duplicate_rows(backend):
+    if backend == "duckdb":
+        pytest.importorskip("duckdb")
+    sink = WarehouseSink(backend=backend)
+    sink.write([_video_row("abc", 100), _video_row("def", 5)])
+    sink.flush()
+    sink.write([_video_row("abc", 150, title="New Title")])
+    sink.flush()
+
+    rows = sink.conn.execute('SELECT "videoId", "viewCount", "title", "tags" FROM video_stats ORDER BY "videoId"').fetchall()
+    assert rows == [("abc", 150, "New Title", '["a", "b"]'), ("def", 5, "Test Video", '["a", "b"]')]
+    sink.close()
+
+def test_comments_and_replies_share_a_table():
+    sink = WarehouseSink()
+    sink.write([_comment_row("c1"), _comment_row("r1", parent_id="c1"), _comment_row("c1", likes=3)])
+    sink.flush()
+    rows = sink.conn.execute('SELECT "commentId", "likeCount", "parentId" FROM comments ORDER BY "commentId"').fetchall()
+    assert rows == [("c1", 3, None), ("r1", 0, "c1")]
+    assert sink.rows_written == 2
+
+def test_batches_flush_automatically_and_tables_are_indexed():
+    sink = WarehouseSink(batch_size=2)
+    sink.write([_video_row("a", 1), _video_row("b", 2), _video_row("c", 3)])
+    assert sink.conn.execute("SELECT COUNT(*) FROM video_stats").fetchone()[0] == 2
+    sink.flush()
+    assert sink.conn.execute("SELECT COUNT(*) FROM video_stats").fetchone()[0] == 3
+
+    indexes = {name for (name,) in sink.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_video_stats_channelId", "idx_video_stats_publishedAt"} <= indexes
+
+def test_channel_stats_keep_one_row_per_poll():
+    sink = WarehouseSink()
+    sink.write([{"channelId": "UC1", "subscribers": 10, "channelStats_commit_time": "2024-01-01 00:00:00"},
+                {"channelId": "UC1", "subscribers": 12, "channelStats_commit_time": "2024-01-02 00:00:00"}])
+    sink.flush()
+    assert sink.conn.execute("SELECT COUNT(*) FROM channel_stats").fetchone()[0] == 2
+
+def test_rows_without_a_known_commit_time_are_ignored():
+    sink = WarehouseSink()
+    sink.write([{"videoId": "abc"}])
+    sink.flush()
+    assert sink.rows_written == 0
+
+def test_invalid_backend():
+    with pytest.raises(ValueError):
+        WarehouseSink(backend="postgres")
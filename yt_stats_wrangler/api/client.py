@@ -1,22 +1,207 @@
 # Main client interface for interacting with Google's Youtube API V3
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-import isodate
+from googleapiclient.http import build_http
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import replace
+import functools
+import inspect
+import math
+import threading
+import time
 import datetime
 from typing import List, Dict, Optional, Union
 
 # Import helper functions within the package
-from yt_stats_wrangler.utils.helpers import current_commit_time, format_dict_keys, convert_to_library
+from yt_stats_wrangler.utils.helpers import commit_timestamp, format_dict_keys, convert_to_library, dedupe_ids, merge_outputs
+from yt_stats_wrangler.utils.cache import EntityCache
+from yt_stats_wrangler.utils.records import compact_in_place
+from yt_stats_wrangler.utils.polars_utils import POLARS_BATCH_FORMATS, PolarsBatchCollector, concat_polars_frames
+from yt_stats_wrangler.utils.spill import SpillBuffer
+from yt_stats_wrangler.api.fields import COLUMN_FIELDS, resolve_columns, build_part, build_fields_mask
+from yt_stats_wrangler.api.extractors import compile_extractor
+from yt_stats_wrangler.api.failures import FailureRecord, failure_from_exception
+from yt_stats_wrangler.api.continuation import Continuation
+from yt_stats_wrangler.api.concurrency import AdaptiveConcurrency, page_size
+from yt_stats_wrangler.api.profiling import Profiler, profiled_stage
+
+# Timed as their own stages while a Profiler is timing the calling thread
+format_dict_keys = profiled_stage("format_keys", format_dict_keys)
+convert_to_library = profiled_stage("convert", convert_to_library)
+
+
+def _time_budgeted(method):
+    """Give a fetch method a timeout_budget argument: the number of seconds the call may run for. Once it runs
+    out check_quota() refuses every new request, the method returns what it collected and self.continuation
+    records the rest for resume(). Methods called inside a budgeted call share its deadline."""
+    @functools.wraps(method)
+    def wrapper(self, *args, timeout_budget: Optional[float] = None, **kwargs):
+        outermost = self._budget_depth == 0
+        if outermost:
+            self.continuation = None
+            self.last_failures = []
+            self.deadline_reached = False
+            self._deadline = None if timeout_budget is None else time.monotonic() + timeout_budget
+        self._budget_depth += 1
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._budget_depth -= 1
+            if outermost:
+                self._deadline = None
+    return wrapper
+
+
+def _profiled(method):
+    """Time each call of a fetch method with the client's Profiler, when it has one."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.profiler is None:
+            return method(self, *args, **kwargs)
+        with self.profiler.method(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class YouTubeDataClient:
-    def __init__(self, api_key: str, max_quota : int = -1):
+    def __init__(self, api_key: str, max_quota : int = -1, cache_size: int = 0, cache_ttl: Optional[float] = None,
+                 spill_dir: Optional[str] = None, sinks: Optional[List] = None, model=None,
+                 spill_rows: Optional[int] = None, spill_bytes: Optional[int] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None, profiler: Optional[Profiler] = None):
         self.api_key = api_key
-        self.youtube = build("youtube", 'v3',developerKey =api_key)
+        # model is an optional googleapiclient response model, e.g. FastJsonModel() to decode with orjson
+        self.youtube = build("youtube", 'v3',developerKey =api_key, model=model)
         self.quota_used = 0 # track quota usage across calls
         self.max_quota = max_quota # -1 defaults to no API call limit
+        # Optional LRU memo of video/channel/handle lookups, 0 disables it. cache_ttl is in seconds
+        self.cache = EntityCache(max_size=cache_size, ttl=cache_ttl) if cache_size > 0 else None
+        self._thread_local = threading.local() # per-thread HTTP connections for concurrent requests
+        self.spill_dir = spill_dir # where 'polars_lazy' outputs write their page batches, defaults to a temp folder
+        # Row and byte budgets after which comment crawls move their rows to compressed files in spill_dir
+        self.spill_rows = spill_rows
+        self.spill_bytes = spill_bytes
+        self.sinks = list(sinks or []) # objects with a write(rows) method that receive every page of raw rows
+        self.failures: List[FailureRecord] = [] # structured failures kept across calls, see retry_failures()
+        self.last_failures: List[FailureRecord] = [] # the failures recorded by the latest call
+        # Time budget of the current call (a time.monotonic() deadline) and where the last budgeted call stopped
+        self._deadline: Optional[float] = None
+        self._budget_depth = 0
+        self.deadline_reached = False
+        self.continuation: Optional[Continuation] = None
+        # Optional AdaptiveConcurrency that every request waits on, and which can be shared between clients
+        self.concurrency = concurrency
+        # Optional Profiler timing every method call by stage (requests, decoding, extraction, output)
+        self.profiler = profiler
+
+    def _stage(self, name: str):
+        """Context timing a stage of the current call with the client's profiler, if it has one."""
+        return self.profiler.stage(name) if self.profiler is not None else nullcontext()
+
+    def _extractor(self, record_type: str, columns: Optional[tuple]):
+        """The compiled extractor for a row type, with its functions timed as the 'extract' stage when profiling."""
+        extract = compile_extractor(record_type, columns)
+        if self.profiler is None:
+            return extract
+        return extract._replace(row=self.profiler.wrap("extract", extract.row),
+                                page=self.profiler.wrap("extract", extract.page))
+
+    def _cache_get(self, key):
+        return self.cache.get(key) if self.cache is not None else None
+
+    def _cache_set(self, key, value):
+        if self.cache is not None:
+            self.cache.set(key, value)
+
+    def _new_batch_collector(self, output_format: str, key_format: str):
+        """Return a PolarsBatchCollector for polars outputs, a SpillBuffer for the 'stream' output or when the
+        client has a spill budget, otherwise None."""
+        if output_format in POLARS_BATCH_FORMATS:
+            return PolarsBatchCollector(spill=output_format == "polars_lazy", directory=self.spill_dir, key_format=key_format)
+        if self._spills(output_format):
+            return self._new_spill_buffer(key_format)
+        return None
+
+    def _spills(self, output_format: str) -> bool:
+        """Whether comment crawls collect their rows in a SpillBuffer for this output format."""
+        if output_format in POLARS_BATCH_FORMATS:
+            return False
+        return output_format == "stream" or self.spill_rows is not None or self.spill_bytes is not None
+
+    def _new_spill_buffer(self, key_format: str = "raw") -> SpillBuffer:
+        return SpillBuffer(max_rows=self.spill_rows, max_bytes=self.spill_bytes, directory=self.spill_dir,
+                           key_format=key_format)
+
+    def add_sink(self, sink):
+        """Register a sink (e.g. a WarehouseSink) whose write(rows) method receives every page of rows
+        as it is extracted, in the raw key format."""
+        self.sinks.append(sink)
+
+    def _emit(self, rows: List[Dict]):
+        """Send freshly extracted rows to every registered sink."""
+        if rows and self.sinks:
+            with self._stage("sinks"):
+                for sink in self.sinks:
+                    sink.write(rows)
+
+    def _page_done(self, rows: List, page_start: int, output_format: str, batches=None):
+        """Run after each page of rows is extracted. Sends the page to the sinks, then moves it into the
+        polars batches or compacts it for the 'records' output, so crawls only hold one page of dict rows."""
+        if self.sinks:
+            self._emit(rows[page_start:])
+        if batches is not None:
+            batches.write_batch(rows[page_start:])
+            del rows[page_start:]
+        elif output_format == "records":
+            compact_in_place(rows, start=page_start)
+
+    def _record_failure(self, method: str, entity_id: str, error: Exception) -> FailureRecord:
+        """Keep a structured record of an entity that could not be collected."""
+        failure = failure_from_exception(method, entity_id, error)
+        self.failures.append(failure)
+        self.last_failures.append(failure)
+        return failure
+
+    def clear_failures(self):
+        self.failures = []
+        self.last_failures = []
+
+    def clear_cache(self):
+        # Drop every memoized entity so the next lookups go back to the API
+        if self.cache is not None:
+            self.cache.clear()
+
+    def _out_of_time(self) -> bool:
+        """Whether the timeout_budget of the current call has run out. Sets deadline_reached once it has."""
+        if self._deadline is None:
+            return False
+        if not self.deadline_reached and time.monotonic() >= self._deadline:
+            print("Time budget reached. Returning the rows collected so far.")
+            self.deadline_reached = True
+        return self.deadline_reached
+
+    def _stop_reason(self) -> str:
+        """Why check_quota() refused a request, for the messages of methods that stop early."""
+        return "Time budget reached" if self.deadline_reached else "Quota limit reached"
+
+    def _cut_short(self, method: str, entity_ids: List[str], index: int, options: Optional[Dict] = None):
+        """Record where a multi-ID method stopped for its time budget, with entity_ids[index:] not started.
+        If the ID before them was cut mid-way, its own continuation is kept for resume() to finish first."""
+        options = {key: value for key, value in (options or {}).items() if value is not None}
+        inner = self.continuation
+        if inner is not None and index > 0 and inner.entity_id == entity_ids[index - 1]:
+            inner.method, inner.pending, inner.pending_options = method, list(entity_ids[index:]), options
+        elif entity_ids[index:]:
+            self.continuation = Continuation(method, pending=list(entity_ids[index:]), pending_options=options)
+
+    def _refund_quota(self, units: int):
+        """Give back quota that was checked out for requests that were never sent."""
+        self.quota_used -= units
 
     def check_quota(self, units: int = 1) -> bool:
-        """Check if calling the next API would exceed the quota."""
+        """Check if calling the next API would exceed the quota, or the time budget has run out."""
+        if self._out_of_time():
+            return False
         # Negative one assumes the user wants no limit
         if self.max_quota == -1:
             return True
@@ -26,419 +211,1251 @@ class YouTubeDataClient:
             return False
         return True
     
+    @_time_budgeted
+    @_profiled
     def get_channel_id_from_handle(self, handle: str) -> Optional[str]:
         """
         Retrieve the channel ID associated with a given YouTube handle (e.g., '@cdcodes').
 
         Note: This method uses the search endpoint, which consumes **100 quota units** per call.
+        Resolved handles are memoized when the client has a cache, so repeats are free.
         """
-        if not self.check_quota(units=100):
-            print("Quota exhausted. Cannot perform search.")
-            return None
-
         try:
-            response = self.youtube.search().list(
-                part="snippet",
-                q=handle,
-                type="channel",
-                maxResults=1
-            ).execute()
+            channel_id = self._search_handle(handle)
+            if channel_id is None and self.deadline_reached:
+                self.continuation = Continuation("get_channel_id_from_handle", entity_id=handle)
+            return channel_id
+        except Exception as e:
+            print(f"Error retrieving channel ID for handle {handle}: {e}")
 
-            self.quota_used += 100
+        return None
 
-            if response.get("items"):
-                return response["items"][0]["id"]["channelId"]
+    def _search_handle(self, handle: str) -> Optional[str]:
+        """Look up a handle with the search endpoint. Errors are raised so callers can record them."""
+        cached = self._cache_get(("search", handle))
+        if cached is not None:
+            return cached
 
-        except Exception as e:
-            print(f"Error retrieving channel ID for handle {handle}: {e}")
+        if not self.check_quota(units=100):
+            print(f"{self._stop_reason()}. Cannot perform search.")
+            return None
 
+        response = self._execute(self.youtube.search().list(
+            part="snippet",
+            q=handle,
+            type="channel",
+            maxResults=1,
+            fields="items(id(channelId))"
+        ))
+
+        self.quota_used += 100
+
+        if response.get("items"):
+            channel_id = response["items"][0]["id"]["channelId"]
+            self._cache_set(("search", handle), channel_id)
+            return channel_id
         return None
     
+    @_time_budgeted
+    @_profiled
     def get_channel_ids_from_handles(self, handles: List[str], print_current_handle = True) -> List[str]:
         """Takes a list of YouTube handles and returns the corresponding list of channel IDs."""
         channel_ids = []
         self.failed_handles = []
 
-        for handle in handles:
+        for index, handle in enumerate(handles):
             if not self.check_quota():
-                print("Quota limit reached. Stopping handle conversion.")
+                print(f"{self._stop_reason()}. Stopping handle conversion.")
+                if self.deadline_reached:
+                    self._cut_short("get_channel_ids_from_handles", handles, index)
                 break
 
             if print_current_handle: print(f"Resolving handle: {handle}")
             try:
-                channel_id = self.get_channel_id_from_handle(handle)
+                channel_id = self._search_handle(handle)
                 if channel_id:
                     channel_ids.append(channel_id)
+                elif self.deadline_reached:
+                    # The search was never made
+                    self._cut_short("get_channel_ids_from_handles", handles, index)
+                    break
                 else:
                     self.failed_handles.append(handle)
 
             except Exception as e:
                 print(f"Error resolving handle {handle}: {e}")
                 self.failed_handles.append(handle)
+                self._record_failure("get_channel_id_from_handle", handle, e)
 
         return channel_ids
     
-    def get_channel_statistics(self, channel_id: str, key_format: str = "raw", output_format: str = "raw") -> Union[List[Dict], any]:
+    @_time_budgeted
+    @_profiled
+    def get_channel_statistics(self, channel_id: str, key_format: str = "raw", output_format: str = "raw",
+                               columns: Optional[List[str]] = None) -> Union[List[Dict], any]:
         """Fetch high-level statistics for a single channel, such as subscribers, total views, and total posts.
-        Input is a YouTube channel ID."""
-        if not self.check_quota():
-            return []
-        result = []
-        response = self.youtube.channels().list(part="statistics,snippet", id=channel_id).execute()
-        self.quota_used += 1
+        Input is a YouTube channel ID. Pass a list of columns to only request the parts of the channel that are needed."""
+        columns = resolve_columns("channelStats", columns)
+        part = build_part("channelStats", columns, "statistics,snippet")
+        fields = build_fields_mask("channelStats", columns, paged=False)
+        cache_key = ("channels", channel_id, part, fields)
+        item = self._cache_get(cache_key)
+        if item is None:
+            if not self.check_quota():
+                if self.deadline_reached:
+                    self.continuation = Continuation("get_channel_statistics", entity_id=channel_id)
+                return []
+            response = self._execute(self.youtube.channels().list(part=part, id=channel_id, fields=fields))
+            self.quota_used += 1
+            if response.get("items"):
+                item = response["items"][0]
+                self._cache_set(cache_key, item)
 
-        if response["items"]:
-            item = response["items"][0]
-            channel_data = {
-                "channelId": channel_id,
-                "channelName": item["snippet"]["title"],
-                "subscribers": int(item["statistics"].get("subscriberCount", 0)),
-                "totalChannelViews": int(item["statistics"].get("viewCount", 0)),
-                "totalPosts": int(item["statistics"].get("videoCount", 0)),
-            }
-            channel_data.update(current_commit_time("channelStats"))
-            result.append(channel_data)
+        result = []
+        if item is not None:
+            extract = self._extractor("channelStats", columns)
+            result.append(extract.row(item, commit_timestamp(), channel_id=channel_id))
+            self._emit(result)
             if key_format != "raw":
                 result = format_dict_keys(result, case=key_format)
             return convert_to_library(result, output_format=output_format)
 
         return [] if output_format == "raw" else convert_to_library([], output_format=output_format)
     
-    def get_channel_statistics_for_channels(self, channel_ids: List[str], key_format: str = "raw", output_format: str = "raw") -> Union[List[Dict], any]:
+    @_time_budgeted
+    @_profiled
+    def get_channel_statistics_for_channels(self, channel_ids: List[str], key_format: str = "raw", output_format: str = "raw",
+                                            columns: Optional[List[str]] = None) -> Union[List[Dict], any]:
         """Fetch statistics for multiple channels at once. Input is a list of YouTube Channel IDs. 
-        Iterable version of get_channel_statistics_for_channel."""
-        results = []
+        Iterable version of get_channel_statistics_for_channel. Duplicate IDs are only fetched once,
+        and the output follows the order of the input list."""
+        rows_by_channel = {}
+        unique_ids = dedupe_ids(channel_ids)
 
-        for channel_id in channel_ids:
+        for index, channel_id in enumerate(unique_ids):
             if not self.check_quota():
-                print("Quota exhausted.")
+                print(f"{self._stop_reason()}.")
+                if self.deadline_reached:
+                    self._cut_short("get_channel_statistics_for_channels", unique_ids, index)
                 break
             try:
-                single = self.get_channel_statistics(channel_id, key_format=key_format, output_format="raw")
-                results.extend(single)
+                rows_by_channel[channel_id] = self.get_channel_statistics(channel_id, key_format=key_format,
+                                                                          output_format="raw", columns=columns)
+                if self.deadline_reached:
+                    self._cut_short("get_channel_statistics_for_channels", unique_ids, index + 1)
+                    break
             except Exception as e:
                 print(f"Error retrieving stats for {channel_id}: {e}")
+                self._record_failure("get_channel_statistics", channel_id, e)
                 continue
 
+        results = []
+        for channel_id in channel_ids:
+            results.extend(dict(row) for row in rows_by_channel.get(channel_id, []))
+
         return convert_to_library(results, output_format=output_format)
 
+    @_profiled
     def get_uploads_playlist_id(self, channel_id: str) -> Optional[str]:
         """Fetch the uploads playlist ID for a given channel.
         This is a secret playlist that can be used to obtain all
         public uploads on a channel. Used as a helper function in
         get_all_video_details method."""
+        cached = self._cache_get(("uploads", channel_id))
+        if cached is not None:
+            return cached
         # Ensure quota hasn't been hit
         if not self.check_quota():
             return None
-        response = self.youtube.channels().list(
+        response = self._execute(self.youtube.channels().list(
             part="contentDetails",
-            id=channel_id
-        ).execute()
+            id=channel_id,
+            fields="items(contentDetails(relatedPlaylists(uploads)))"
+        ))
         self.quota_used += 1
-        return response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+        playlist_id = response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+        self._cache_set(("uploads", channel_id), playlist_id)
+        return playlist_id
 
-    def get_all_video_details_for_channel(self, channel_id: str, key_format : str = 'raw', output_format: str = "raw"):
+    @_time_budgeted
+    @_profiled
+    def get_all_video_details_for_channel(self, channel_id: str, key_format : str = 'raw', output_format: str = "raw",
+                                          columns: Optional[List[str]] = None, page_token: Optional[str] = None):
         """Function that takes in a channel ID, identifies the channels
         full playlist of uploads, and then extracts the metadata for all videos
         on the channel. Key format can be specified as 'upper', 'lower', or 'mixed'
-        to make the dictionary keys more readable."""
+        to make the dictionary keys more readable. Columns limits the output (and the
+        fields requested from the API) to the listed keys. page_token resumes a crawl
+        from the page a previous failure stopped on."""
+        columns = resolve_columns("videoDetails", columns)
+        fields = build_fields_mask("videoDetails", columns)
+        extract = self._extractor("videoDetails", columns)
         video_details = []
         playlist_id = self.get_uploads_playlist_id(channel_id)
-        next_page_token = None
+        next_page_token = page_token
+        page_start = 0
+        playlist_items = self.youtube.playlistItems()
 
-        while True:
-            # Ensure quota hasn't been hit, break if it has and return what was collected
-            if not self.check_quota():
-                break
-            response = self.youtube.playlistItems().list(
-                part="snippet",
-                playlistId=playlist_id,
-                maxResults=50,
-                pageToken=next_page_token
-            ).execute()
-            self.quota_used += 1
-            for item in response['items']:
-                snippet = item['snippet']
-                video = {
-                    "channelId": channel_id,
-                    "videoId": snippet["resourceId"]["videoId"],
-                    "publishedAt": snippet["publishedAt"],
-                    "title": snippet["title"],
-                    "description": snippet["description"],
-                    "channelTitle": snippet["channelTitle"],
-                    
-                }
-                video.update(current_commit_time('videoDetails'))
-                video_details.append(video)
-                
-
-            next_page_token = response.get("nextPageToken")
-            if not next_page_token:
-                break
+        try:
+            while True:
+                # Ensure quota hasn't been hit, break if it has and return what was collected
+                if not self.check_quota():
+                    if self.deadline_reached:
+                        self.continuation = Continuation("get_all_video_details_for_channel", channel_id, next_page_token)
+                    break
+                page_start = len(video_details)
+                response = self._execute(playlist_items.list(
+                    part="snippet",
+                    playlistId=playlist_id,
+                    maxResults=page_size("playlistItems"),
+                    pageToken=next_page_token,
+                    fields=fields
+                ))
+                self.quota_used += 1
+                video_details.extend(extract.page(response.get('items', []), commit_timestamp(), channel_id=channel_id))
+                self._emit(video_details[page_start:])
+                next_page_token = response.get("nextPageToken")
+                if not next_page_token:
+                    break
+        except Exception as e:
+            raise _resumable(e, next_page_token, video_details[:page_start])
         # Fix the key names if asked to
         if key_format != "raw":
             video_details = format_dict_keys(video_details, case=key_format)
 
         return convert_to_library(video_details, output_format)
     
+    @_time_budgeted
+    @_profiled
     def get_all_video_details_for_channels(self, channel_ids: List[str], key_format: str = "raw", 
-                                           output_format: str = "raw", print_current_channel = True) -> Union[List[Dict], any]:
+                                           output_format: str = "raw", print_current_channel = True,
+                                           columns: Optional[List[str]] = None) -> Union[List[Dict], any]:
         """Function that takes in a list of channel IDs, identifies the channels'
         full playlist of uploads, and then extracts the metadata for all videos
         on the channel. Key format can be specified as 'upper', 'lower', or 'mixed'
         to make the dictionary keys more readable."""
         all_videos = []
         self.failed_channel_ids =[]
-        for channel_id in channel_ids:
+        printing = {"print_current_channel": print_current_channel} # kept for resume() when the budget cuts the call
+        unique_ids = dedupe_ids(channel_ids)
+        for index, channel_id in enumerate(unique_ids):
             if not self.check_quota():
-                print("Quota limit reached. Stopping collection.")
+                print(f"{self._stop_reason()}. Stopping collection.")
+                if self.deadline_reached:
+                    self._cut_short("get_all_video_details_for_channels", unique_ids, index, printing)
                 break
 
             if print_current_channel: print(f"Fetching videos for channel: {channel_id}")
             try:
-                videos = self.get_all_video_details_for_channel(channel_id, key_format=key_format)
+                videos = self.get_all_video_details_for_channel(channel_id, key_format=key_format, columns=columns)
                 all_videos.extend(videos)
+                if self.deadline_reached:
+                    self._cut_short("get_all_video_details_for_channels", unique_ids, index + 1, printing)
+                    break
             except Exception as e:
                 print(f"Error fetching videos for channel {channel_id}: {e}")
                 self.failed_channel_ids.append(channel_id)
+                self._record_failure("get_all_video_details_for_channel", channel_id, e)
+                all_videos.extend(_partial_rows(e, key_format))
 
         return convert_to_library(all_videos, output_format)
 
 
-    def get_video_stats(self, video_ids: List[str], key_format: str = 'raw', output_format: str = "raw") -> Union[List[Dict], any]:
+    @_time_budgeted
+    @_profiled
+    def get_video_stats(self, video_ids: List[str], key_format: str = 'raw', output_format: str = "raw",
+                        columns: Optional[List[str]] = None, use_cache: bool = True) -> Union[List[Dict], any]:
         """Input a list of video IDs, and get a descriptiveb statistics and metrics on the performance of the video.
-        Returns views, engagement, metrics, duration, shorts classification and other metadata on the video."""
-        all_video_data = []
-        for i in range(0, len(video_ids), 50):
+        Returns views, engagement, metrics, duration, shorts classification and other metadata on the video.
+        Pass columns (e.g. ['viewCount', 'likeCount']) to skip downloading descriptions and other unused parts.
+        Duplicate IDs are only requested once (and memoized videos not at all), and rows follow the input order.
+        use_cache=False requests every video for fresh counts, and memoizes the new responses."""
+        columns = resolve_columns("videoStats", columns)
+        part = build_part("videoStats", columns, "snippet,statistics,contentDetails")
+        fields = build_fields_mask("videoStats", columns, paged=False)
+
+        extract = self._extractor("videoStats", columns)
+        commit_time = commit_timestamp()
+        rows_by_id = {}
+        ids_to_fetch = []
+        for video_id in dedupe_ids(video_ids):
+            cached = self._cache_get(("videos", video_id, part, fields)) if use_cache else None
+            if cached is not None:
+                rows_by_id[video_id] = extract.row(cached, commit_time)
+            else:
+                ids_to_fetch.append(video_id)
+        # Sinks get the memoized rows now and every fetched chunk as soon as it is extracted
+        self._emit(list(rows_by_id.values()))
+
+        chunk_size = page_size("videos")
+        for i in range(0, len(ids_to_fetch), chunk_size):
             # Ensure quota hasn't been hit, break if it has and return what was collected
             if not self.check_quota():
+                if self.deadline_reached:
+                    self.continuation = Continuation("get_video_stats", pending=ids_to_fetch[i:])
                 break
 
-            chunk = video_ids[i:i + 50]
-            response = self.youtube.videos().list(
-                part="snippet,statistics,contentDetails",
-                id=",".join(chunk)
-            ).execute()
+            chunk = ids_to_fetch[i:i + chunk_size]
+            try:
+                response = self._execute(self.youtube.videos().list(
+                    part=part,
+                    id=",".join(chunk),
+                    fields=fields
+                ))
+            except HttpError as e:
+                # Keep going with the other chunks, the failed IDs can be retried with retry_failures()
+                self.quota_used += 1
+                print(f"[HttpError] Videos {chunk[0]}...{chunk[-1]}: {e}")
+                for video_id in chunk:
+                    self._record_failure("get_video_stats", video_id, e)
+                continue
             self.quota_used += 1
 
+            chunk_rows = []
             for item in response.get("items", []):
-                duration = item["contentDetails"].get("duration", "PT0S")
-                seconds = int(isodate.parse_duration(duration).total_seconds())
-                video_stats = {
-                    "videoId": item["id"],
-                    "title": item["snippet"].get("title"),
-                    "description": item["snippet"].get("description"),
-                    "publishedAt": item["snippet"].get("publishedAt"),
-                    "channelId": item["snippet"].get("channelId"),
-                    "channelTitle": item["snippet"].get("channelTitle"),
-                    "tags": item["snippet"].get("tags", []),
-                    "categoryId": item["snippet"].get("categoryId"),
-                    "viewCount": int(item["statistics"].get("viewCount", 0)),
-                    "likeCount": int(item["statistics"].get("likeCount", 0)),
-                    "commentCount": int(item["statistics"].get("commentCount", 0)),
-                    "duration_seconds": seconds,
-                    "definition": item["contentDetails"].get("definition"),
-                    "isShort": seconds <= 60,
-                }
-                video_stats.update(current_commit_time('videoStats'))
-                all_video_data.append(video_stats)
+                self._cache_set(("videos", item["id"], part, fields), item)
+                rows_by_id[item["id"]] = extract.row(item, commit_time)
+                chunk_rows.append(rows_by_id[item["id"]])
+            self._emit(chunk_rows)
+
+        all_video_data = []
+        returned = set()
+        for video_id in video_ids:
+            row = rows_by_id.get(video_id)
+            if row is not None:
+                # A repeated ID gets its own copy of the row
+                all_video_data.append(dict(row) if video_id in returned else row)
+                returned.add(video_id)
         # Fix the key names if asked to
         if key_format != "raw":
             all_video_data = format_dict_keys(all_video_data, case=key_format)
 
         return convert_to_library(all_video_data, output_format)
-    
-    def get_top_level_video_comments(self, video_id: str, key_format: str = 'raw', output_format: str = "raw") -> Union[List[Dict], any]:
-        """Retrieve all top-level comments for a given video ID. Will not return nested comments."""
-        comments = []
-        request = self.youtube.commentThreads().list(
-            part="snippet",
-            videoId=video_id,
-            textFormat="plainText",
-            maxResults=100 # extract 100 comments per unit
-        )
 
-        while request:
-            # Ensure quota hasn't been hit, break if it has and return what was collected
+    def _execute(self, request, http=None):
+        """Execute an API request, holding a slot of the client's AdaptiveConcurrency limit if it has one.
+        With a profiler, the request is timed as the 'request' stage and its JSON decoding as 'decode'."""
+        slot = nullcontext()
+        if self.concurrency is not None:
+            slot = self.concurrency.slot(getattr(request, "methodId", None))
+        if self.profiler is not None and hasattr(request, "postproc"):
+            request.postproc = self.profiler.wrap("decode", request.postproc)
+        with self._stage("request"), slot:
+            return request.execute() if http is None else request.execute(http=http)
+
+    def _execute_in_thread(self, request):
+        """Execute a request from a worker thread. httplib2 connections are not thread-safe,
+        so every worker thread gets its own connection."""
+        http = getattr(self._thread_local, "http", None)
+        if http is None:
+            http = self._thread_local.http = build_http()
+        return self._execute(request, http=http)
+
+    @_time_budgeted
+    @_profiled
+    def crawl_channel(self, channel_id: str, key_format: str = 'raw', output_format: str = "raw",
+                      columns: Optional[List[str]] = None, max_workers: int = 4,
+                      page_token: Optional[str] = None, playlist_id: Optional[str] = None,
+                      video_ids: Optional[List[str]] = None) -> Union[List[Dict], any]:
+        """
+        Collect details and statistics for every video on a channel in a single pass. The uploads playlist is paged
+        with only video IDs requested, and each 50-ID page is sent to videos.list on a worker thread while the next
+        page is being fetched. Returns one get_video_stats() row per video, so snippet data is only downloaded once.
+        Costs 2 quota units per 50 videos (plus 1 to find the uploads playlist). page_token resumes the crawl
+        from a playlist page. A videos call that fails is recorded in self.failures as get_video_stats failures
+        of its IDs (with the playlist page token), so retry_failures() only refetches those IDs, and the other
+        pages are kept. With an AdaptiveConcurrency on the client, the pool has its max_concurrency
+        threads and the controller decides how many requests run at once, instead of max_workers.
+
+        A crawl cut by its time budget keeps the uploads playlist_id and the video_ids it read but did not fetch
+        in its continuation, so resume() fetches those first and never pays for the same playlist page twice.
+        When video_ids are given, page_token is the playlist page after them, and None means the playlist is done.
+        """
+        columns = resolve_columns("videoStats", columns)
+        part = build_part("videoStats", columns, "snippet,statistics,contentDetails")
+        fields = build_fields_mask("videoStats", columns, paged=False)
+        if playlist_id is None:
+            playlist_id = self.get_uploads_playlist_id(channel_id)
+        if playlist_id is None:
+            if self.deadline_reached:
+                self.continuation = Continuation("crawl_channel", channel_id, page_token)
+            return convert_to_library([], output_format)
+
+        pending = [] # (playlist page token, video IDs, videos.list future) per page
+        unsent = [] # IDs read from the playlist whose videos call was refused
+        next_page_token = page_token
+        cut = False
+        error = None
+        playlist_items = self.youtube.playlistItems()
+        videos_resource = self.youtube.videos()
+        if self.concurrency is not None:
+            max_workers = self.concurrency.max_concurrency
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            def send(token: Optional[str], ids: List[str]) -> bool:
+                if not self.check_quota():
+                    return False
+                request = videos_resource.list(part=part, id=",".join(ids), fields=fields)
+                pending.append((token, ids, pool.submit(self._execute_in_thread, request)))
+                self.quota_used += 1
+                return True
+
+            # IDs a cut crawl read before, then the playlist pages after them
+            resumed = list(video_ids or [])
+            for index in range(0, len(resumed), 50):
+                if not send(page_token, resumed[index:index + 50]):
+                    unsent, cut = resumed[index:], self.deadline_reached
+                    break
+            paging = not cut and (video_ids is None or page_token is not None)
+
+            while paging:
+                if not self.check_quota():
+                    cut = self.deadline_reached
+                    break
+                try:
+                    response = self._execute(playlist_items.list(
+                        part="contentDetails",
+                        playlistId=playlist_id,
+                        maxResults=page_size("playlistItems"),
+                        pageToken=next_page_token,
+                        fields="items(contentDetails(videoId)),nextPageToken"
+                    ))
+                except Exception as e:
+                    # The pages already sent to videos.list are still collected before this is raised
+                    error = e
+                    break
+                self.quota_used += 1
+
+                token, next_page_token = next_page_token, response.get("nextPageToken")
+                page_ids = [item["contentDetails"]["videoId"] for item in response.get("items", [])]
+                # The videos call is charged separately, so pages without IDs cost one unit. A page that was paid
+                # for but whose videos call is refused keeps its IDs for the next run
+                if page_ids and not send(token, page_ids):
+                    unsent, cut = page_ids, self.deadline_reached
+                    break
+                if not next_page_token:
+                    break
+
+            extract = self._extractor("videoStats", columns)
+            videos = []
+            cancelled = []
+            for index, (token, ids, future) in enumerate(pending):
+                # Once the time budget is gone, the videos requests that have not started are cancelled,
+                # their quota is given back and their IDs are left to the continuation
+                if not cancelled and error is None and self._out_of_time():
+                    cancelled = [later_ids for _, later_ids, later in pending[index:] if later.cancel()]
+                    if cancelled:
+                        cut = True
+                        self._refund_quota(len(cancelled))
+                if future.cancelled():
+                    break
+                try:
+                    items = future.result().get("items", [])
+                except Exception as e:
+                    # Keep the other pages, the failed IDs can be retried with retry_failures()
+                    print(f"[{type(e).__name__}] Videos {ids[0]}...{ids[-1]} of channel {channel_id}: {e}")
+                    for video_id in ids:
+                        self._record_failure("get_video_stats", video_id, e).page_token = token
+                    continue
+                for item in items:
+                    self._cache_set(("videos", item["id"], part, fields), item)
+                page = extract.page(items, commit_timestamp())
+                videos.extend(page)
+                self._emit(page)
+
+        if error is not None:
+            raise _resumable(error, next_page_token, videos)
+        if cut:
+            left = [video_id for ids in cancelled for video_id in ids] + unsent
+            options = {"playlist_id": playlist_id}
+            if left:
+                options["video_ids"] = left
+            self.continuation = Continuation("crawl_channel", channel_id, next_page_token, options)
+        if key_format != "raw":
+            videos = format_dict_keys(videos, case=key_format)
+        return convert_to_library(videos, output_format)
+
+    @_time_budgeted
+    @_profiled
+    def crawl_channels(self, channel_ids: List[str], key_format: str = 'raw', output_format: str = "raw",
+                       columns: Optional[List[str]] = None, max_workers: int = 4,
+                       print_current_channel: bool = True) -> Union[List[Dict], any]:
+        """Run crawl_channel for a list of channel IDs and combine the rows. Channels that fail are
+        stored in failed_crawl_channel_ids."""
+        all_videos = []
+        self.failed_crawl_channel_ids = []
+        printing = {"print_current_channel": print_current_channel} # kept for resume() when the budget cuts the call
+        unique_ids = dedupe_ids(channel_ids)
+        for index, channel_id in enumerate(unique_ids):
             if not self.check_quota():
+                print(f"{self._stop_reason()}. Stopping collection.")
+                if self.deadline_reached:
+                    self._cut_short("crawl_channels", unique_ids, index, printing)
                 break
 
-            response = request.execute()
-            self.quota_used += 1
-            for item in response.get('items', []):
-                # Extract data on top level comments
-                top_comment = item['snippet']['topLevelComment']
-                snippet = item['snippet']['topLevelComment']['snippet']
-                reply_count = item['snippet'].get('totalReplyCount', 0)
-                comment = {
-                    'videoId': video_id,
-                    'commentId': top_comment['id'],
-                    'author': snippet.get("authorDisplayName"),
-                    'text': snippet.get("textDisplay"),
-                    'publishedAt': snippet.get("publishedAt"),
-                    'likeCount': snippet.get("likeCount", 0),
-                    'replyCount': reply_count
-                }
-                comment.update(current_commit_time('videoTopLevelComments'))
-                comments.append(comment)
-
-            request = self.youtube.commentThreads().list_next(request, response)
+            if print_current_channel: print(f"Crawling channel: {channel_id}")
+            try:
+                all_videos.extend(self.crawl_channel(channel_id, columns=columns, max_workers=max_workers))
+                if self.deadline_reached:
+                    self._cut_short("crawl_channels", unique_ids, index + 1, printing)
+                    break
+            except Exception as e:
+                # Videos from the pages before the failure are kept, and the retry resumes from the failed page
+                print(f"Error crawling channel {channel_id}: {e}")
+                self.failed_crawl_channel_ids.append(channel_id)
+                self._record_failure("crawl_channel", channel_id, e)
+                all_videos.extend(getattr(e, "partial_rows", []))
+
+        if key_format != "raw":
+            all_videos = format_dict_keys(all_videos, case=key_format)
+        return convert_to_library(all_videos, output_format)
+    
+    @_time_budgeted
+    @_profiled
+    def get_top_level_video_comments(self, video_id: str, key_format: str = 'raw', output_format: str = "raw",
+                                     columns: Optional[List[str]] = None, page_token: Optional[str] = None,
+                                     max_comments: Optional[int] = None, order: Optional[str] = None,
+                                     sample_pages: Optional[int] = None) -> Union[List[Dict], any]:
+        """Retrieve all top-level comments for a given video ID. Will not return nested comments.
+        page_token resumes a crawl from the page a previous failure stopped on.
+
+        max_comments stops paging once that many comments are collected, and order ('time' or 'relevance')
+        picks which comments come first. sample_pages collects that many pages spread evenly over the video
+        instead of every page, see _sample_page_indexes."""
+        _check_comment_order(order)
+        columns = resolve_columns("comments", columns)
+        extract = self._extractor("topLevelComments", columns)
+        comments = []
+        batches = self._new_batch_collector(output_format, key_format)
+        # Build the resource once, rather than once per page
+        threads = self.youtube.commentThreads()
+        list_args = {"part": "snippet", "videoId": video_id, "textFormat": "plainText",
+                     "fields": build_fields_mask("comments", columns)}
+        if order is not None:
+            list_args["order"] = order
+        sampled = self._sample_page_indexes(video_id, sample_pages)
+        page_index = 0
+        collected = page_collected = 0
+        page_start = 0
+
+        try:
+            while max_comments is None or collected < max_comments:
+                # Ensure quota hasn't been hit, break if it has and return what was collected
+                if not self.check_quota():
+                    if self.deadline_reached:
+                        self.continuation = _comment_continuation("get_top_level_video_comments", video_id, page_token,
+                                                                  sampled, max_comments, collected, order,
+                                                                  sample_pages=sample_pages)
+                    break
+
+                keep = sampled is None or page_index in sampled
+                page_start, page_collected = len(comments), collected
+                response = self._execute(threads.list(
+                    pageToken=page_token, **_thread_page_args(list_args, keep, sampled, max_comments, collected)))
+                self.quota_used += 1
+                next_page_token = response.get("nextPageToken")
+                if not keep:
+                    if not next_page_token and page_index < max(sampled):
+                        # The video ran out of pages before the last sampled one, so take this last page in full
+                        sampled.add(page_index)
+                        continue
+                else:
+                    items = response.get('items', [])
+                    if max_comments is not None:
+                        items = items[:max_comments - collected]
+                    collected += len(items)
+                    comments.extend(extract.page(items, commit_timestamp(), video_id=video_id))
+                    self._page_done(comments, page_start, output_format, batches)
+
+                page_token = next_page_token
+                page_index += 1
+                if not page_token or (sampled is not None and page_index > max(sampled)):
+                    break
+        except Exception as e:
+            # Pages already moved into polars batches are lost with the collector, and a sample is only even
+            # when taken in one go, so those crawls restart
+            if isinstance(batches, PolarsBatchCollector) or sampled is not None:
+                raise _resumable(e, None, [], _limit_options(max_comments, 0, order, sample_pages=sample_pages))
+            # A spill buffer only ever holds finished pages, so it is the partial output as it is
+            raise _resumable(e, page_token, batches if batches is not None else comments[:page_start],
+                             _limit_options(max_comments, page_collected, order))
+        if batches is not None:
+            return batches.result(output_format)
         # Fix the key names if asked to
         if key_format != "raw":
             comments = format_dict_keys(comments, case=key_format)
 
         return convert_to_library(comments, output_format)
     
+    @_time_budgeted
+    @_profiled
     def get_top_level_comments_for_video_ids(self, video_ids: List[str], key_format : str = 'raw',
-                                              output_format: str = "raw", print_current_channel = True) -> Union[List[Dict], any]:
-        all_comments = []
+                                              output_format: str = "raw", print_current_channel = True,
+                                              columns: Optional[List[str]] = None, max_comments: Optional[int] = None,
+                                              order: Optional[str] = None,
+                                              sample_pages: Optional[int] = None) -> Union[List[Dict], any]:
+        """Run get_top_level_video_comments for a list of video IDs. max_comments, order and sample_pages
+        apply to each video."""
+        limits = {"max_comments": max_comments, "order": order, "sample_pages": sample_pages}
+        printing = {"print_current_channel": print_current_channel} # kept for resume() when the budget cuts the call
+        spilling = self._spills(output_format)
+        all_comments = self._new_spill_buffer(key_format) if spilling else []
         self.failed_ids_for_comments = []
+        unique_ids = dedupe_ids(video_ids)
 
-        for video_id in video_ids:
+        for index, video_id in enumerate(unique_ids):
             if not self.check_quota():
-                print("Quota limit reached. Stopping comment collection.")
+                print(f"{self._stop_reason()}. Stopping comment collection.")
+                if self.deadline_reached:
+                    self._cut_short("get_top_level_comments_for_video_ids", unique_ids, index, {**limits, **printing})
                 break
 
             if print_current_channel: print(f"Fetching comments for video ID: {video_id}")
             try:
-                comments = self.get_top_level_video_comments(video_id)
-                all_comments.extend(comments)
+                if output_format in POLARS_BATCH_FORMATS:
+                    all_comments.append(self.get_top_level_video_comments(video_id, key_format=key_format,
+                                                                          output_format=output_format, columns=columns,
+                                                                          **limits))
+                else:
+                    comments = self.get_top_level_video_comments(video_id, columns=columns, output_format=(
+                        "stream" if spilling else "records" if output_format == "records" else "raw"), **limits)
+                    all_comments.extend(comments)
+                if self.deadline_reached:
+                    self._cut_short("get_top_level_comments_for_video_ids", unique_ids, index + 1, {**limits, **printing})
+                    break
 
             except HttpError as e:
                 self.quota_used += 1
                 print(f"[HttpError] Video {video_id}: {e}")
                 self.failed_ids_for_comments.append(video_id)
+                self._record_failure("get_top_level_video_comments", video_id, e)
+                if output_format not in POLARS_BATCH_FORMATS:
+                    all_comments.extend(_partial_rows(e))
 
             except Exception as e:
                 print(f"[Exception] Video {video_id}: {e}")
                 self.failed_ids_for_comments.append(video_id)
+                self._record_failure("get_top_level_video_comments", video_id, e)
+                if output_format not in POLARS_BATCH_FORMATS:
+                    all_comments.extend(_partial_rows(e))
+
+        if output_format in POLARS_BATCH_FORMATS:
+            # Each video came back as its own frame, built from its page batches
+            return concat_polars_frames(all_comments, lazy=output_format == "polars_lazy")
+        if spilling:
+            return all_comments.result(output_format)
 
         if key_format != "raw":
             all_comments = format_dict_keys(all_comments, case=key_format)
 
         return convert_to_library(all_comments, output_format) # or return all_comments, failed_ids
     
-    def get_replies_to_comment(self, parent_comment_id: str) -> List[Dict]:
+    @_time_budgeted
+    @_profiled
+    def get_replies_to_comment(self, parent_comment_id: str, columns: Optional[List[str]] = None,
+                               max_replies: Optional[int] = None, page_token: Optional[str] = None) -> List[Dict]:
         """Fetch all replies to a top-level comment using its comment ID. This is a helper function that is used
-        in the get_all_video_comments method to gather comment replies and handle nested comments."""
+        in the get_all_video_comments method to gather comment replies and handle nested comments.
+        max_replies stops paging once that many replies are collected, page_token resumes from a page."""
+        replies = self._fetch_replies(parent_comment_id, resolve_columns("replies", columns), max_replies, page_token)
+        self._emit(replies)
+        return replies
+
+    def _fetch_replies(self, parent_comment_id: str, columns: Optional[tuple], max_replies: Optional[int] = None,
+                       page_token: Optional[str] = None) -> List[Dict]:
+        """Page comments.list for the replies to a comment. The comment crawls send replies to the sinks
+        with the rest of their page, so this does not emit them itself."""
         replies = []
+        extract = self._extractor("replies", columns)
 
-        request = self.youtube.comments().list(
+        comments = self.youtube.comments()
+        request = comments.list(
             part="snippet",
             parentId=parent_comment_id,
             textFormat="plainText",
-            maxResults=100
+            maxResults=page_size("comments", max_replies),
+            pageToken=page_token,
+            fields=build_fields_mask("replies", columns)
         )
 
-        while request:
+        while request and (max_replies is None or len(replies) < max_replies):
             if not self.check_quota():
+                if self.deadline_reached:
+                    options = {} if max_replies is None else {"max_replies": max_replies - len(replies)}
+                    self.continuation = Continuation("get_replies_to_comment", parent_comment_id, page_token, options)
                 break
 
-            response = request.execute()
+            response = self._execute(request)
             self.quota_used += 1
+            page_token = response.get("nextPageToken")
 
-            for item in response.get("items", []):
-                snippet = item["snippet"]
-                reply = {
-                    "commentId": item["id"],
-                    "parentId": parent_comment_id,
-                    "author": snippet.get("authorDisplayName"),
-                    "text": snippet.get("textDisplay"),
-                    "publishedAt": snippet.get("publishedAt"),
-                    "likeCount": snippet.get("likeCount", 0),
-                    "videoId": snippet.get("videoId")
-                }
-                reply.update(current_commit_time("videoAllComments"))
-                replies.append(reply)
-
-            request = self.youtube.comments().list_next(request, response)
+            items = response.get("items", [])
+            if max_replies is not None:
+                items = items[:max_replies - len(replies)]
+            replies.extend(extract.page(items, commit_timestamp(), parent_id=parent_comment_id))
+
+            request = comments.list_next(request, response)
 
         return replies
-    
+
+    def _sample_page_indexes(self, video_id: str, sample_pages: Optional[int]) -> Optional[set]:
+        """
+        Pick sample_pages comment thread pages spread evenly over a video, or None to read every page.
+        Page tokens can only be reached in order, so the pages in between are still requested (1 unit each),
+        but only for their nextPageToken. The number of pages is estimated from the video's commentCount,
+        which counts replies too, so on reply-heavy videos the sample leans towards the first pages.
+        """
+        if sample_pages is None:
+            return None
+        if sample_pages < 1:
+            raise ValueError("sample_pages must be at least 1.")
+        total_pages = max(math.ceil(self._video_comment_count(video_id) / page_size("commentThreads")), 1)
+        if sample_pages >= total_pages:
+            return None
+        step = total_pages / sample_pages
+        return {int(i * step) for i in range(sample_pages)}
+
+    def _video_comment_count(self, video_id: str) -> int:
+        """commentCount of a video, memoized with the other video lookups."""
+        fields = "items(statistics(commentCount))"
+        cache_key = ("videos", video_id, "statistics", fields)
+        item = self._cache_get(cache_key)
+        if item is None:
+            if not self.check_quota():
+                return 0
+            response = self._execute(self.youtube.videos().list(part="statistics", id=video_id, fields=fields))
+            self.quota_used += 1
+            if not response.get("items"):
+                return 0
+            item = response["items"][0]
+            self._cache_set(cache_key, item)
+        return int(item.get("statistics", {}).get("commentCount", 0))
+
+    def _all_comments_columns(self, columns: Optional[List[str]]):
+        """Resolve a column selection for the all-comments schema into the top-level columns, the matching
+        reply columns and the commentThreads fields mask (including the inline replies)."""
+        columns = resolve_columns("comments", columns)
+        # Replies share the comment schema, so ask for the same columns where the reply endpoint has them
+        reply_columns = resolve_columns("replies", None if columns is None else
+                                        [col for col in columns if col in COLUMN_FIELDS["replies"]])
+        inline_reply_paths = [] if reply_columns is None else [
+            f"replies/comments/{path}" for col in reply_columns for path in COLUMN_FIELDS["replies"][col]
+        ]
+        # totalReplyCount is always needed to decide whether to fetch replies
+        fields = build_fields_mask("comments", columns, extra_paths=["snippet/totalReplyCount"] + inline_reply_paths)
+        return columns, reply_columns, fields
+
+    def _thread_replies(self, item: Dict, top_id: str, reply_count: int, reply_columns: Optional[tuple],
+                        commit_time: str, max_replies: Optional[int] = None) -> List[Dict]:
+        """Return the reply rows of a thread, using the replies returned inline with the thread when they
+        cover every reply wanted and paging comments.list otherwise. Inline replies and comments.list pages go
+        through the same replies extractor, so both produce the same schema."""
+        wanted = reply_count if max_replies is None else min(reply_count, max_replies)
+        inline_replies = item.get('replies', {}).get('comments', [])
+        if len(inline_replies) >= wanted:
+            return self._extractor("replies", reply_columns).page(inline_replies[:wanted], commit_time, parent_id=top_id)
+        # The time budget is checked between reply pages, so a cut leaves self.deadline_reached set and
+        # self.continuation on the next reply page
+        return self._fetch_replies(top_id, reply_columns, max_replies)
+
+    @_time_budgeted
+    @_profiled
     def get_all_video_comments(self, video_id: str, key_format: str = 'raw', 
-                                       output_format: str = "raw") -> Union[List[Dict], any]:
+                                       output_format: str = "raw", columns: Optional[List[str]] = None,
+                                       page_token: Optional[str] = None, max_comments: Optional[int] = None,
+                                       order: Optional[str] = None, max_replies_per_thread: Optional[int] = None,
+                                       sample_pages: Optional[int] = None, skip_threads: int = 0) -> Union[List[Dict], any]:
         """Fetch all comments (top-level and nested) for a video. Takes in a singular Video ID and returns
-        all comments left on that video, including replies to other comments."""
+        all comments left on that video, including replies to other comments. Columns are named after the
+        top-level comment keys and are applied to the replies as well.
+
+        Comment threads are requested with their inline replies, so replies.list is only called for
+        threads with more replies than the API returns inline (currently up to 5). page_token resumes a crawl
+        from the page a previous failure stopped on.
+
+        max_comments caps the number of top-level comments (their replies come on top), order ('time' or
+        'relevance') picks which come first, and max_replies_per_thread caps the replies kept per thread. With
+        a cap of 5 or less, replies.list is never called. sample_pages collects that many pages spread evenly
+        over the video instead of every page.
+
+        The time budget is checked between reply pages too. A crawl cut inside a thread's replies records the
+        thread's next reply page in its continuation, with skip_threads set to the threads of the page already
+        collected, so resume() finishes that thread and then carries on from the thread after it."""
+        _check_comment_order(order)
+        columns, reply_columns, fields = self._all_comments_columns(columns)
+        extract = self._extractor("comments", columns)
         all_comments = []
+        batches = self._new_batch_collector(output_format, key_format)
 
-        request = self.youtube.commentThreads().list(
-            part="snippet",
-            videoId=video_id,
-            textFormat="plainText",
-            maxResults=100
-        )
+        # Build the resource once, rather than once per page
+        threads = self.youtube.commentThreads()
+        list_args = {"part": "snippet,replies", "videoId": video_id, "textFormat": "plainText", "fields": fields}
+        if order is not None:
+            list_args["order"] = order
+        sampled = self._sample_page_indexes(video_id, sample_pages)
+        page_index = 0
+        collected = page_collected = 0
+        page_start = 0
 
-        while request:
-            if not self.check_quota():
-                break
+        try:
+            while max_comments is None or collected < max_comments:
+                if not self.check_quota():
+                    if self.deadline_reached:
+                        self.continuation = _comment_continuation("get_all_video_comments", video_id, page_token, sampled,
+                                                                  max_comments, collected, order,
+                                                                  max_replies_per_thread, sample_pages)
+                        if skip_threads and sampled is None:
+                            self.continuation.options["skip_threads"] = skip_threads
+                    break
 
-            response = request.execute()
-            self.quota_used += 1
+                keep = sampled is None or page_index in sampled
+                page_start, page_collected = len(all_comments), collected
+                # A resumed page is fetched with the threads collected before the cut, which are then skipped
+                skipped, skip_threads = skip_threads if sampled is None else 0, 0
+                response = self._execute(threads.list(pageToken=page_token, **_thread_page_args(
+                    list_args, keep, sampled, max_comments, collected - skipped)))
+                self.quota_used += 1
+                next_page_token = response.get("nextPageToken")
+                if not keep:
+                    if not next_page_token and page_index < max(sampled):
+                        # The video ran out of pages before the last sampled one, so take this last page in full
+                        sampled.add(page_index)
+                        continue
+                else:
+                    commit_time = commit_timestamp()
+                    items = response.get("items", [])[skipped:]
+                    if max_comments is not None:
+                        items = items[:max_comments - collected]
 
-            for item in response.get("items", []):
-                top_snippet = item['snippet']['topLevelComment']['snippet']
-                top_id = item['snippet']['topLevelComment']['id']
-                reply_count = item['snippet'].get('totalReplyCount', 0)
+                    for index, item in enumerate(items):
+                        # Top-level comment
+                        all_comments.append(extract.row(item, commit_time, video_id=video_id))
+                        collected += 1
+
+                        # For eacxh comment, get any replies if they exist and append the data onto the comment output
+                        reply_count = item['snippet'].get('totalReplyCount', 0)
+                        if reply_count > 0 and max_replies_per_thread != 0:
+                            top_id = item['snippet']['topLevelComment']['id']
+                            all_comments.extend(self._thread_replies(item, top_id, reply_count, reply_columns,
+                                                                     commit_time, max_replies_per_thread))
+                            if self.deadline_reached:
+                                self.continuation = self._thread_cut_continuation(
+                                    video_id, page_token, sampled, max_comments, collected, order,
+                                    max_replies_per_thread, sample_pages, skipped + index + 1)
+                                break
 
-                # Top-level comment
-                comment = {
-                    'commentId': top_id,
-                    'videoId': video_id,
-                    'author': top_snippet.get("authorDisplayName"),
-                    'text': top_snippet.get("textDisplay"),
-                    'publishedAt': top_snippet.get("publishedAt"),
-                    'likeCount': top_snippet.get("likeCount", 0),
-                    'replyCount': reply_count,
-                    'parentId': None
-                }
-                comment.update(current_commit_time("videoAllComments"))
-                all_comments.append(comment)
-
-                # For eacxh comment, get any replies if they exist and append the data onto the comment output
-                if reply_count > 0:
-                    replies = self.get_replies_to_comment(top_id)
-                    all_comments.extend(replies)
-
-            request = self.youtube.commentThreads().list_next(request, response)
+                    self._page_done(all_comments, page_start, output_format, batches)
+                    if self.deadline_reached:
+                        break
+
+                page_token = next_page_token
+                page_index += 1
+                if not page_token or (sampled is not None and page_index > max(sampled)):
+                    break
+        except Exception as e:
+            # A failed reply fetch fails its whole thread page, so the retry restarts from that page
+            if isinstance(batches, PolarsBatchCollector) or sampled is not None:
+                raise _resumable(e, None, [], _limit_options(max_comments, 0, order, max_replies_per_thread,
+                                                             sample_pages=sample_pages))
+            raise _resumable(e, page_token, batches if batches is not None else all_comments[:page_start],
+                             _limit_options(max_comments, page_collected, order, max_replies_per_thread))
+        if batches is not None:
+            return batches.result(output_format)
         # Format keys according to user specification
         if key_format != "raw":
             all_comments = format_dict_keys(all_comments, case=key_format)
         # Format output according to specified library structure, and return the output
         return convert_to_library(all_comments, output_format)
     
+    def _thread_cut_continuation(self, video_id: str, page_token: Optional[str], sampled: Optional[set],
+                                 max_comments: Optional[int], collected: int, order: Optional[str],
+                                 max_replies_per_thread: Optional[int], sample_pages: Optional[int],
+                                 threads_done: int) -> Continuation:
+        """Continuation of a get_all_video_comments crawl whose time budget ran out between the reply pages of
+        a thread. self.continuation is the replies' own, with the reply page to go on from. The thread page is
+        resumed past its first threads_done threads, the last of which only needs the rest of its replies."""
+        replies = self.continuation
+        continuation = _comment_continuation("get_all_video_comments", video_id, page_token, sampled, max_comments,
+                                             collected, order, max_replies_per_thread, sample_pages)
+        if sampled is None:
+            continuation.options["skip_threads"] = threads_done
+            continuation.replies = {"parentId": replies.entity_id, "page_token": replies.page_token, **replies.options}
+        return continuation
+
+    @_time_budgeted
+    @_profiled
     def get_all_comments_for_video_ids(self, video_ids: List[str], key_format: str = 'raw',
-                                    output_format: str = "raw", print_current_video: bool = True) -> Union[List[Dict], any]:
+                                    output_format: str = "raw", print_current_video: bool = True,
+                                    columns: Optional[List[str]] = None, max_comments: Optional[int] = None,
+                                    order: Optional[str] = None, max_replies_per_thread: Optional[int] = None,
+                                    sample_pages: Optional[int] = None) -> Union[List[Dict], any]:
         """Fetches all comments (top-level and nested) for multiple videos IDs. Input is a list of video IDs. Output is all comments
-        on the corresponding videos, including replies to other comments."""
-        all_comments = []
+        on the corresponding videos, including replies to other comments. The limits of get_all_video_comments
+        (max_comments, order, max_replies_per_thread, sample_pages) apply to each video."""
+        limits = {"max_comments": max_comments, "order": order, "max_replies_per_thread": max_replies_per_thread,
+                  "sample_pages": sample_pages}
+        printing = {"print_current_video": print_current_video} # kept for resume() when the budget cuts the call
+        spilling = self._spills(output_format)
+        all_comments = self._new_spill_buffer(key_format) if spilling else []
         self.failed_ids_for_all_comments = []
+        unique_ids = dedupe_ids(video_ids)
 
-        for video_id in video_ids:
+        for index, video_id in enumerate(unique_ids):
             if not self.check_quota():
-                print("Quota limit reached. Stopping comment collection.")
+                print(f"{self._stop_reason()}. Stopping comment collection.")
+                if self.deadline_reached:
+                    self._cut_short("get_all_comments_for_video_ids", unique_ids, index, {**limits, **printing})
                 break
 
             if print_current_video:
                 print(f"Fetching all comments for video ID: {video_id}")
 
             try:
-                comments = self.get_all_video_comments(video_id, key_format="raw", output_format="raw")
-                all_comments.extend(comments)
+                if output_format in POLARS_BATCH_FORMATS:
+                    all_comments.append(self.get_all_video_comments(video_id, key_format=key_format,
+                                                                    output_format=output_format, columns=columns,
+                                                                    **limits))
+                else:
+                    comments = self.get_all_video_comments(video_id, key_format="raw", columns=columns, output_format=(
+                        "stream" if spilling else "records" if output_format == "records" else "raw"), **limits)
+                    all_comments.extend(comments)
+                if self.deadline_reached:
+                    self._cut_short("get_all_comments_for_video_ids", unique_ids, index + 1, {**limits, **printing})
+                    break
 
             except HttpError as e:
                 self.quota_used += 1
                 print(f"[HttpError] Video {video_id}: {e}")
                 self.failed_ids_for_all_comments.append(video_id)
+                self._record_failure("get_all_video_comments", video_id, e)
+                if output_format not in POLARS_BATCH_FORMATS:
+                    all_comments.extend(_partial_rows(e))
 
             except Exception as e:
                 print(f"[Exception] Video {video_id}: {e}")
                 self.failed_ids_for_all_comments.append(video_id)
+                self._record_failure("get_all_video_comments", video_id, e)
+                if output_format not in POLARS_BATCH_FORMATS:
+                    all_comments.extend(_partial_rows(e))
+
+        if output_format in POLARS_BATCH_FORMATS:
+            # Each video came back as its own frame, built from its page batches
+            return concat_polars_frames(all_comments, lazy=output_format == "polars_lazy")
+        if spilling:
+            return all_comments.result(output_format)
 
         if key_format != "raw":
             all_comments = format_dict_keys(all_comments, case=key_format)
 
         return convert_to_library(all_comments, output_format)
     
+    @_time_budgeted
+    @_profiled
+    def get_new_video_comments(self, video_id: str, watermark: Optional[Dict] = None, include_replies: bool = True,
+                               check_reply_updates: bool = False, key_format: str = 'raw', output_format: str = "raw",
+                               columns: Optional[List[str]] = None):
+        """
+        Incrementally sync the comments of a video. Comment threads are paged newest first (order=time) and paging
+        stops as soon as the watermark from the previous sync is reached, so only new comments cost quota.
+
+        Returns a tuple of (new rows, updated watermark). Rows use the get_all_video_comments schema. The watermark
+        is a JSON-serializable dict to store and pass back in on the next sync; pass None for the first sync.
+
+        With check_reply_updates=True, paging continues past the watermark (1 unit per 100 threads) so that replies
+        added to older threads are picked up. Replies are only re-fetched for threads whose totalReplyCount changed
+        since the last sync, and only replies newer than the last one seen are returned.
+        """
+        # publishedAt is needed to advance the watermarks even if it was not asked for
+        if columns is not None and "publishedAt" not in columns:
+            columns = list(columns) + ["publishedAt"]
+        columns, reply_columns, fields = self._all_comments_columns(columns)
+        extract = self._extractor("comments", columns)
+        watermark = watermark or {}
+        threads = dict(watermark.get("threads", {}))
+        new_watermark = {"videoId": video_id, "publishedAt": watermark.get("publishedAt"),
+                         "commentId": watermark.get("commentId"), "threads": threads}
+        new_comments = []
+
+        # Build the resource once, rather than once per page
+        thread_resource = self.youtube.commentThreads()
+        request = thread_resource.list(
+            part="snippet,replies",
+            videoId=video_id,
+            order="time",
+            textFormat="plainText",
+            maxResults=page_size("commentThreads"),
+            fields=fields
+        )
+
+        newest_seen = False
+        past_watermark = False
+        while request:
+            if not self.check_quota():
+                break
+
+            response = self._execute(request)
+            self.quota_used += 1
+            page_start = len(new_comments)
+            commit_time = commit_timestamp()
+
+            for item in response.get("items", []):
+                top_id = item['snippet']['topLevelComment']['id']
+                published_at = item['snippet']['topLevelComment'].get('snippet', {}).get('publishedAt')
+                reply_count = item['snippet'].get('totalReplyCount', 0)
+
+                if not newest_seen:
+                    new_watermark["publishedAt"], new_watermark["commentId"] = published_at, top_id
+                    newest_seen = True
+
+                if not past_watermark and watermark.get("commentId") is not None and (
+                        top_id == watermark["commentId"] or (published_at or "") < (watermark.get("publishedAt") or "")):
+                    past_watermark = True
+                    if not check_reply_updates:
+                        break
+
+                if not past_watermark:
+                    new_comments.append(extract.row(item, commit_time, video_id=video_id))
+                    if include_replies and reply_count > 0:
+                        replies = self._thread_replies(item, top_id, reply_count, reply_columns, commit_time)
+                        new_comments.extend(replies)
+                        if self.deadline_reached:
+                            break
+                        threads[top_id] = _reply_watermark(reply_count, replies)
+                    continue
+
+                # Older thread, only look at its replies if the count moved since the last sync
+                known = threads.get(top_id, {"replyCount": 0, "latestReply": None})
+                if include_replies and reply_count != known["replyCount"]:
+                    replies = (self._thread_replies(item, top_id, reply_count, reply_columns, commit_time)
+                               if reply_count else [])
+                    fresh = [reply for reply in replies
+                             if known["latestReply"] is None or (reply.get("publishedAt") or "") > known["latestReply"]]
+                    new_comments.extend(fresh)
+                    if self.deadline_reached:
+                        break
+                    threads[top_id] = _reply_watermark(reply_count, replies)
+
+            self._emit(new_comments[page_start:])
+            # A thread cut between its reply pages keeps its old reply watermark, so the next sync fetches it again
+            if self.deadline_reached or (past_watermark and not check_reply_updates):
+                break
+            request = thread_resource.list_next(request, response)
+
+        if request and not past_watermark:
+            # Stopped by the quota or time budget before reaching the last sync, so keep the previous watermark
+            # for the next sync to page down to. Comments returned now come back again, sinks upsert them
+            new_watermark["publishedAt"], new_watermark["commentId"] = watermark.get("publishedAt"), watermark.get("commentId")
+        # The watermark is what resumes a sync, so there is no continuation
+        self.continuation = None
+        if key_format != "raw":
+            new_comments = format_dict_keys(new_comments, case=key_format)
+        return convert_to_library(new_comments, output_format), new_watermark
+
+    @_time_budgeted
+    @_profiled
+    def get_new_comments_for_video_ids(self, video_ids: List[str], watermarks: Optional[Dict[str, Dict]] = None,
+                                       include_replies: bool = True, check_reply_updates: bool = False,
+                                       key_format: str = 'raw', output_format: str = "raw",
+                                       print_current_video: bool = True, columns: Optional[List[str]] = None):
+        """Incremental version of get_all_comments_for_video_ids. Takes the watermarks returned by the previous
+        sync (keyed by video ID) and returns a tuple of (new rows across all videos, updated watermarks)."""
+        watermarks = dict(watermarks or {})
+        new_comments = []
+        self.failed_ids_for_new_comments = []
+
+        for video_id in dedupe_ids(video_ids):
+            if not self.check_quota():
+                print(f"{self._stop_reason()}. Stopping comment sync.")
+                break
+
+            if print_current_video:
+                print(f"Syncing new comments for video ID: {video_id}")
+
+            try:
+                comments, watermarks[video_id] = self.get_new_video_comments(
+                    video_id, watermark=watermarks.get(video_id), include_replies=include_replies,
+                    check_reply_updates=check_reply_updates, columns=columns)
+                new_comments.extend(comments)
+
+            except HttpError as e:
+                self.quota_used += 1
+                print(f"[HttpError] Video {video_id}: {e}")
+                self.failed_ids_for_new_comments.append(video_id)
+                self._record_failure("get_new_video_comments", video_id, e)
+
+            except Exception as e:
+                print(f"[Exception] Video {video_id}: {e}")
+                self.failed_ids_for_new_comments.append(video_id)
+                self._record_failure("get_new_video_comments", video_id, e)
+
+        if key_format != "raw":
+            new_comments = format_dict_keys(new_comments, case=key_format)
+
+        return convert_to_library(new_comments, output_format), watermarks
+
+    def retry_failures(self, results=None, delay: float = 5.0, max_attempts: int = 3, backoff: float = 2.0,
+                       key_format: str = 'raw', output_format: str = "raw", columns: Optional[List[str]] = None,
+                       methods: Optional[List[str]] = None):
+        """
+        Re-run retriable failures and merge the recovered rows into `results`, the output of the original call
+        (pass the same key_format, output_format and columns that call used). With results, only the failures of
+        the latest call (self.last_failures) are retried, so rows of other record types are not mixed in. Without
+        results every retriable entry in self.failures is retried. methods narrows either to failures of those
+        client methods, e.g. ['get_video_stats'].
+
+        Each round waits `delay` seconds, growing by `backoff` every round, then retries everything still failing:
+        video stats are re-requested 50 IDs per call and paged crawls resume from the page they stopped on, so rows
+        that were already collected are not fetched twice. A record leaves self.failures once its retry succeeds.
+        Failures that are not retriable, still fail after max_attempts rounds, or are left when the quota or time
+        budget runs out stay in self.failures. get_new_video_comments failures are left for the next sync, which
+        picks them up from their unchanged watermark.
+        """
+        # The retries are client calls of their own, so the scope is kept by identity rather than in last_failures
+        scope = {id(failure) for failure in (self.last_failures if results is not None else self.failures)}
+        recovered = []
+        stopped = False
+        for attempt in range(max_attempts):
+            pending = [failure for failure in self.failures if id(failure) in scope and failure.retriable
+                       and failure.method in _RETRY_METHODS and (methods is None or failure.method in methods)]
+            if not pending or stopped:
+                break
+            time.sleep(delay * backoff ** attempt)
+            print(f"Retrying {len(pending)} failed entities (round {attempt + 1} of {max_attempts})")
+
+            stats = [failure for failure in pending if failure.method == "get_video_stats"]
+            chunk_size = page_size("videos")
+            batches = [stats[i:i + chunk_size] for i in range(0, len(stats), chunk_size)]
+            batches += [[failure] for failure in pending if failure.method != "get_video_stats"]
+            for batch in batches:
+                if not self.check_quota():
+                    print(f"{self._stop_reason()}. Leaving the remaining failures for a later retry.")
+                    stopped = True
+                    break
+                new_start = len(self.failures)
+                if batch[0].method == "get_video_stats":
+                    recovered.extend(self.get_video_stats([failure.entity_id for failure in batch], columns=columns))
+                else:
+                    failure = batch[0]
+                    try:
+                        recovered.extend(self._retry_failure(failure, columns))
+                    except Exception as e:
+                        if isinstance(e, HttpError):
+                            self.quota_used += 1
+                        print(f"[{type(e).__name__}] Retry of {failure.entity_id}: {e}")
+                        retry = self._record_failure(failure.method, failure.entity_id, e)
+                        # A crawl that fails before its first resumed page keeps the original position
+                        if retry.page_token is None and not hasattr(e, "partial_rows"):
+                            retry.page_token = failure.page_token
+                            retry.options = failure.options
+                        recovered.extend(getattr(e, "partial_rows", []))
+                new_failures = self.failures[new_start:]
+                scope.update(id(failure) for failure in new_failures)
+                self._settle_retries(batch, new_failures)
+                if self.deadline_reached:
+                    stopped = True
+                    break
+
+        self.last_failures = [failure for failure in self.failures if id(failure) in scope]
+        if key_format != "raw":
+            recovered = [format_dict_keys([row], case=key_format)[0] if isinstance(row, dict) else row for row in recovered]
+        if not recovered and results is not None:
+            return results
+        return merge_outputs(results, convert_to_library(recovered, output_format), output_format)
+
+    def _settle_retries(self, retried: List[FailureRecord], new_failures: List[FailureRecord]):
+        """Update self.failures after a retry: records that failed again are replaced by their new record, records
+        the time budget cut keep their place (and resume page), and the ones that succeeded are dropped."""
+        again = {(failure.method, failure.entity_id): failure for failure in new_failures}
+        continuation = self.continuation
+        unfinished = set(continuation.pending or []) | {continuation.entity_id} if continuation is not None else set()
+        done = set()
+        for failure in retried:
+            retry = again.get((failure.method, failure.entity_id))
+            if retry is not None:
+                retry.attempts = failure.attempts + 1
+                done.add(id(failure))
+            elif failure.entity_id in unfinished:
+                if continuation.entity_id == failure.entity_id and continuation.page_token is not None:
+                    failure.page_token = continuation.page_token
+            else:
+                done.add(id(failure))
+        self.failures = [failure for failure in self.failures if id(failure) not in done]
+
+    def _retry_failure(self, failure: FailureRecord, columns: Optional[List[str]]) -> List:
+        """Re-run the single-entity method behind a failure and return its raw rows."""
+        if failure.method == "get_channel_id_from_handle":
+            channel_id = self._search_handle(failure.entity_id)
+            return [channel_id] if channel_id else []
+        if failure.method == "get_channel_statistics":
+            return self.get_channel_statistics(failure.entity_id, columns=columns)
+        if failure.method == "crawl_channel":
+            return self.crawl_channel(failure.entity_id, columns=columns, page_token=failure.page_token)
+        return getattr(self, failure.method)(failure.entity_id, columns=columns, page_token=failure.page_token,
+                                             **failure.options)
+
+    def resume(self, continuation: Optional[Union[Continuation, Dict]] = None, **kwargs):
+        """
+        Finish the work a time-budgeted call left undone: self.continuation by default, or a saved Continuation
+        (or its to_dict()). Pass the key_format, output_format and columns the original call used, and a new
+        timeout_budget to bound this call as well. Returns the rows of the resumed work, to merge_outputs() onto
+        the first output. If the budget runs out again, self.continuation holds what is left.
+
+        The crawl in progress is resumed from its page first, then the pending IDs are run through the original
+        method with its limits.
+        """
+        continuation = continuation if continuation is not None else self.continuation
+        if continuation is None:
+            raise ValueError("There is no continuation to resume.")
+        if isinstance(continuation, dict):
+            continuation = Continuation.from_dict(continuation)
+        return self._resume(continuation, **kwargs)
+
+    @_time_budgeted
+    @_profiled
+    def _resume(self, continuation: Continuation, **kwargs):
+        result = None
+        if continuation.replies is not None:
+            result = self._resume_replies(continuation, **kwargs)
+            if self.deadline_reached:
+                return result
+        if continuation.entity_id is not None:
+            method = _ENTITY_METHODS.get(continuation.method, continuation.method)
+            rows = self._call_resumed(method, continuation.entity_id, kwargs, page_token=continuation.page_token,
+                                      **continuation.options)
+            result = merge_outputs(result, rows, kwargs.get("output_format", "raw"))
+            if self.deadline_reached:
+                self._cut_short(continuation.method, [continuation.entity_id] + list(continuation.pending), 1,
+                                continuation.pending_options)
+                return result
+        if continuation.pending:
+            rows = self._call_resumed(continuation.method, list(continuation.pending), kwargs,
+                                      **continuation.pending_options)
+            result = merge_outputs(result, rows, kwargs.get("output_format", "raw"))
+        return result
+
+    def _resume_replies(self, continuation: Continuation, key_format: str = "raw", output_format: str = "raw",
+                        columns: Optional[List[str]] = None, **kwargs):
+        """Finish the replies of the thread a comment crawl was cut inside of. If the budget runs out again,
+        self.continuation is the same crawl with the thread's new reply page."""
+        replies = continuation.replies
+        _, reply_columns, _ = self._all_comments_columns(columns)
+        rows = self._fetch_replies(replies["parentId"], reply_columns, replies.get("max_replies"),
+                                   replies.get("page_token"))
+        self._emit(rows)
+        if self.deadline_reached:
+            cut = self.continuation
+            self.continuation = replace(continuation, replies={"parentId": replies["parentId"],
+                                                               "page_token": cut.page_token, **cut.options})
+        if key_format != "raw":
+            rows = format_dict_keys(rows, case=key_format)
+        return convert_to_library(rows, output_format)
+
+    def _call_resumed(self, method_name: str, entity, kwargs: Dict, **options):
+        """Call a client method with the caller's arguments and the saved options, keeping the ones it takes.
+        Saved options win, so the limits of the original call (already reduced by what it kept) still hold."""
+        method = getattr(self, method_name)
+        accepted = inspect.signature(method).parameters
+        return method(entity, **{key: value for key, value in {**kwargs, **options}.items() if key in accepted})
+
     def get_quota_used(self):
         # get the current max quota
         return self.quota_used
@@ -453,4 +1470,84 @@ class YouTubeDataClient:
 
     def reset_quota_used(self):
         # Reset the quota
-        self.quota_used = 0
\ No newline at end of file
+        self.quota_used = 0
+
+
+# Orders commentThreads.list accepts
+COMMENT_ORDERS = ("time", "relevance")
+
+
+def _check_comment_order(order: Optional[str]):
+    if order is not None and order not in COMMENT_ORDERS:
+        raise ValueError(f"Invalid order '{order}'. Choose from: 'time', 'relevance'.")
+
+
+def _thread_page_args(list_args: Dict, keep: bool, sampled: Optional[set], max_comments: Optional[int],
+                      collected: int) -> Dict:
+    """commentThreads.list arguments for the next page. Pages skipped by sampling only ask for their
+    nextPageToken, and a comment limit shrinks the last page (sampled crawls keep 100 threads per page,
+    so the spread stays even)."""
+    if not keep:
+        return dict(list_args, fields="nextPageToken", maxResults=page_size("commentThreads"))
+    if max_comments is not None and sampled is None:
+        return dict(list_args, maxResults=page_size("commentThreads", max_comments - collected))
+    return dict(list_args, maxResults=page_size("commentThreads"))
+
+
+def _limit_options(max_comments: Optional[int], collected: int, order: Optional[str],
+                   max_replies_per_thread: Optional[int] = None, sample_pages: Optional[int] = None) -> Dict:
+    """The limits a resumed crawl runs with, with max_comments reduced by the comments already kept."""
+    options = {"max_comments": None if max_comments is None else max_comments - collected, "order": order,
+               "max_replies_per_thread": max_replies_per_thread, "sample_pages": sample_pages}
+    return {key: value for key, value in options.items() if value is not None}
+
+
+# Single-entity method that resume() finishes the crawl in progress of a multi-ID method with
+_ENTITY_METHODS = {
+    "get_channel_statistics_for_channels": "get_channel_statistics",
+    "get_all_video_details_for_channels": "get_all_video_details_for_channel",
+    "crawl_channels": "crawl_channel",
+    "get_top_level_comments_for_video_ids": "get_top_level_video_comments",
+    "get_all_comments_for_video_ids": "get_all_video_comments",
+}
+
+# Failure methods that retry_failures() knows how to re-run
+_RETRY_METHODS = ("get_channel_id_from_handle", "get_channel_statistics", "get_all_video_details_for_channel",
+                  "get_video_stats", "crawl_channel", "get_top_level_video_comments", "get_all_video_comments")
+
+
+def _comment_continuation(method: str, video_id: str, page_token: Optional[str], sampled: Optional[set],
+                          max_comments: Optional[int], collected: int, order: Optional[str],
+                          max_replies_per_thread: Optional[int] = None,
+                          sample_pages: Optional[int] = None) -> Continuation:
+    """Where a comment crawl stopped for its time budget. A sample is only even when taken in one go,
+    so a sampled crawl starts over."""
+    if sampled is not None:
+        return Continuation(method, video_id, None, _limit_options(max_comments, 0, order, max_replies_per_thread,
+                                                                   sample_pages=sample_pages))
+    return Continuation(method, video_id, page_token, _limit_options(max_comments, collected, order,
+                                                                     max_replies_per_thread))
+
+
+def _resumable(error: Exception, page_token: Optional[str], rows: List, options: Optional[Dict] = None) -> Exception:
+    """Attach where a paged crawl stopped to the exception it raised: the token of the page that failed,
+    the rows of the pages before it and the limits a retry should run with. Multi-ID methods keep the rows
+    and record the token and limits for retries."""
+    error.page_token = page_token
+    error.partial_rows = rows
+    error.crawl_options = options or {}
+    return error
+
+
+def _partial_rows(error: Exception, key_format: str = "raw") -> List:
+    """Rows collected before a paged crawl failed, in the caller's key format."""
+    rows = getattr(error, "partial_rows", [])
+    if rows and key_format != "raw":
+        rows = format_dict_keys(rows, case=key_format)
+    return rows
+
+
+def _reply_watermark(reply_count: int, replies: List[Dict]) -> Dict:
+    """Per-thread sync state: the reply count and the newest reply timestamp seen."""
+    published = [reply.get("publishedAt") for reply in replies if reply.get("publishedAt")]
+    return {"replyCount": reply_count, "latestReply": max(published) if published else None}
@@ -0,0 +1,130 @@
+# Adaptive limits on in-flight API requests, and the fixed page sizes requests are made with
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from yt_stats_wrangler.api.failures import is_retriable
+
+# Every list call costs 1 quota unit whatever its page size, so the largest page the API allows
+# returns the most rows per unit
+MAX_PAGE_SIZES = {"playlistItems": 50, "videos": 50, "commentThreads": 100, "comments": 100, "search": 50}
+
+# How quickly the latency baseline forgets a low reading, as a fraction of each newer reading above it
+BASELINE_DRIFT = 0.01
+
+
+def page_size(resource: str, wanted: Optional[int] = None) -> int:
+    """maxResults for a list call on resource: the API's largest page, or fewer when only wanted more rows
+    are needed (e.g. the comments left under max_comments). Page sizes are not tuned from latency or errors,
+    since a smaller page costs the same quota unit for fewer rows. AdaptiveConcurrency handles congestion."""
+    largest = MAX_PAGE_SIZES[resource]
+    if wanted is None:
+        return largest
+    return max(min(int(wanted), largest), 1)
+
+
+class AdaptiveConcurrency:
+    """
+    Limit on the requests in flight at once, shared by every thread and client that makes them, and tuned
+    while they run with additive increase / multiplicative decrease (AIMD).
+
+    Every request that succeeds in less than latency_tolerance times the baseline latency of its API method
+    raises the limit by 1/limit, about one more slot per round of requests. A rate limit, server or network
+    error (anything retry_failures() would retry), or a response slower than that, multiplies the limit by
+    backoff, though slowdowns of less than min_slowdown seconds are taken as jitter. Requests that started
+    before the last decrease cannot decrease it again, so one burst of errors only halves the limit once.
+    The baseline is the lowest latency seen, drifting slowly up towards newer readings so it follows the API
+    through the day.
+
+        concurrency = AdaptiveConcurrency(max_concurrency=16)
+        client = YouTubeDataClient(api_key, concurrency=concurrency)
+        client.crawl_channels(channel_ids)
+        concurrency.stats()
+    """
+
+    def __init__(self, max_concurrency: int = 16, min_concurrency: int = 1, initial: Optional[int] = None,
+                 latency_tolerance: float = 2.0, min_slowdown: float = 0.05, backoff: float = 0.5):
+        if min_concurrency < 1 or max_concurrency < min_concurrency:
+            raise ValueError("Concurrency limits need 1 <= min_concurrency <= max_concurrency.")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1.")
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.latency_tolerance = latency_tolerance
+        self.min_slowdown = min_slowdown
+        self.backoff = backoff
+        start = initial if initial is not None else min(4, max_concurrency)
+        self.limit = float(min(max(start, min_concurrency), max_concurrency))
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0 # requests that failed with a rate limit, server or network error
+        self.decreases = 0
+        self.baselines: Dict[str, float] = {} # lowest recent latency per API method, in seconds
+        self._last_decrease = float("-inf")
+        self._condition = threading.Condition()
+
+    @property
+    def concurrency(self) -> int:
+        """The number of requests currently allowed in flight."""
+        return int(self.limit)
+
+    def acquire(self) -> float:
+        """Wait for a free slot and take it. Returns the start time to pass to release()."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started: float, method: Optional[str] = None, error: Optional[Exception] = None):
+        """Give back a slot and adjust the limit from how the request went."""
+        latency = time.monotonic() - started
+        with self._condition:
+            self.in_flight -= 1
+            self.requests += 1
+            if error is not None:
+                congested = is_retriable(error)
+                self.throttled += congested
+            else:
+                baseline = self.baselines.get(method)
+                if baseline is None or latency < baseline:
+                    baseline = latency
+                else:
+                    baseline += (latency - baseline) * BASELINE_DRIFT
+                self.baselines[method] = baseline
+                congested = latency > max(baseline * self.latency_tolerance, baseline + self.min_slowdown)
+
+            if congested:
+                if started >= self._last_decrease:
+                    self.limit = max(self.limit * self.backoff, float(self.min_concurrency))
+                    self._last_decrease = time.monotonic()
+                    self.decreases += 1
+            elif error is None:
+                self.limit = min(self.limit + 1 / self.limit, float(self.max_concurrency))
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, method: Optional[str] = None):
+        """Hold a slot for the duration of one request to the API method (e.g. 'youtube.videos.list').
+        The slot is given back however the request ends, including KeyboardInterrupt and generator exits."""
+        started = self.acquire()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.release(started, method, error)
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                "concurrency": self.concurrency,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "decreases": self.decreases,
+                "baseline_latency": dict(self.baselines),
+            }
@@ -0,0 +1,31 @@
+# Where a time-budgeted client call stopped, used by YouTubeDataClient.resume
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict, List, Optional
+
+
+@dataclass
+class Continuation:
+    """Work a client call left undone when its timeout_budget ran out.
+
+    method is the client method that was cut short. entity_id is the channel or video whose crawl was
+    in progress, and page_token the page that crawl resumes from (None for its first page), with options
+    holding the limits it resumes with (e.g. the max_comments left). pending are the IDs (or handles) that
+    were not started, to be run through method with pending_options. A comment crawl cut between the reply
+    pages of a thread has that thread in replies (its parentId, the reply page_token and any max_replies
+    left), which resume() finishes before the rest of the crawl."""
+    method: str
+    entity_id: Optional[str] = None
+    page_token: Optional[str] = None
+    options: Dict = field(default_factory=dict)
+    pending: List[str] = field(default_factory=list)
+    pending_options: Dict = field(default_factory=dict)
+    replies: Optional[Dict] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Continuation":
+        """Rebuild a continuation from to_dict() output, e.g. after a JSON round trip. Unknown keys are ignored."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
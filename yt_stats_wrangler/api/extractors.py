@@ -0,0 +1,119 @@
+# Compiles the declarative FIELD_SPECS into row extraction functions shared by every client method
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import isodate
+
+from yt_stats_wrangler.api.fields import COMMIT_PREFIXES, FIELD_SPECS, FieldSpec
+
+# Method inputs that specs can refer to with a '$' path
+EXTRACTOR_INPUTS = ("channel_id", "video_id", "parent_id")
+
+_EMPTY: Dict = {}
+
+
+class Extractor(NamedTuple):
+    """Compiled extraction functions for one row type and column selection.
+
+    row(item, commit_time, **inputs) builds one row from an API resource.
+    page(items, commit_time, **inputs) builds the rows of a whole page in one loop.
+    source is the generated Python code, kept for debugging."""
+    row: Callable
+    page: Callable
+    source: str
+
+
+def duration_seconds(duration: Optional[str]) -> int:
+    """Convert an ISO 8601 duration (e.g. PT1M30S) into whole seconds."""
+    return int(isodate.parse_duration(duration or "PT0S").total_seconds())
+
+
+def extractor_columns(record_type: str, columns: Optional[Tuple[str, ...]]) -> Tuple[str, ...]:
+    """The columns an extractor outputs: every spec column, or the selected ones this row type has,
+    in the order they were selected."""
+    specs = FIELD_SPECS[record_type]
+    if columns is None:
+        return tuple(specs)
+    return tuple(col for col in columns if col in specs)
+
+
+@lru_cache(maxsize=None)
+def compile_extractor(record_type: str, columns: Optional[Tuple[str, ...]] = None) -> Extractor:
+    """
+    Generate and compile the extraction functions for a row type. The generated code reads every nested
+    object once per item (e.g. item['snippet']) and builds the row as a single dict literal with only the
+    selected columns, instead of building the full row and filtering it. Compiled once per row type and
+    column selection, then cached.
+    """
+    if record_type not in FIELD_SPECS:
+        raise ValueError(f"Invalid record type '{record_type}'. Choose from: {', '.join(FIELD_SPECS)}.")
+    if columns is not None:
+        unknown = [col for col in columns if col not in FIELD_SPECS[record_type] and col not in _ANY_SPEC_COLUMNS]
+        if unknown:
+            raise ValueError(f"Invalid column(s) {unknown} for '{record_type}'.")
+
+    specs = FIELD_SPECS[record_type]
+    selected = extractor_columns(record_type, columns)
+    commit_key = f"{COMMIT_PREFIXES[record_type]}_commit_time"
+
+    node_lines: List[str] = []
+    nodes: Dict[str, str] = {"": "item"}
+    derived_lines: List[str] = []
+    derived: Dict[str, str] = {}
+    entries: List[str] = []
+
+    def node(path: str) -> str:
+        # Variable holding the object at path, declared the first time any column needs it
+        if path not in nodes:
+            parent, _, key = path.rpartition("/")
+            parent_var = node(parent)
+            var = f"n{len(nodes)}"
+            node_lines.append(f"{var} = {parent_var}.get({key!r}) or _EMPTY")
+            nodes[path] = var
+        return nodes[path]
+
+    def leaf(spec: FieldSpec, default) -> str:
+        parent, _, key = spec.path.rpartition("/")
+        if default is None:
+            return f"{node(parent)}.get({key!r})"
+        return f"{node(parent)}.get({key!r}, {default!r})"
+
+    for col in selected:
+        spec = specs[col]
+        if spec.kind == "const":
+            expr = repr(spec.default)
+        elif spec.path.startswith("$"):
+            expr = spec.path[1:]
+        elif spec.kind == "raw":
+            expr = leaf(spec, spec.default)
+        elif spec.kind == "int":
+            expr = f"int({leaf(spec, spec.default)})"
+        elif spec.kind in ("duration_seconds", "is_short"):
+            # isShort and duration_seconds share one parse of the duration
+            if spec.path not in derived:
+                var = f"d{len(derived)}"
+                derived_lines.append(f"{var} = _duration_seconds({leaf(spec, spec.default)})")
+                derived[spec.path] = var
+            expr = derived[spec.path] if spec.kind == "duration_seconds" else f"{derived[spec.path]} <= 60"
+        else:
+            raise ValueError(f"Invalid field kind '{spec.kind}' for column '{col}'.")
+        entries.append(f"{col!r}: {expr}")
+    entries.append(f"{commit_key!r}: commit_time")
+
+    body = node_lines + derived_lines + ["row = {" + ", ".join(entries) + "}"]
+    inputs = ", ".join(f"{name}=None" for name in EXTRACTOR_INPUTS)
+    source = "\n".join(
+        [f"def extract_row(item, commit_time, {inputs}):"]
+        + [f"    {line}" for line in body]
+        + ["    return row", "", "", f"def extract_page(items, commit_time, {inputs}):",
+           "    rows = []", "    append = rows.append", "    for item in items:"]
+        + [f"        {line}" for line in body]
+        + ["        append(row)", "    return rows"]
+    )
+    # Defaults are written into the source as literals, so list defaults are fresh objects for every row
+    namespace = {"_EMPTY": _EMPTY, "_duration_seconds": duration_seconds}
+    exec(compile(source, f"<extractor {record_type}>", "exec"), namespace)
+    return Extractor(namespace["extract_row"], namespace["extract_page"], source)
+
+
+_ANY_SPEC_COLUMNS = {col for specs in FIELD_SPECS.values() for col in specs}
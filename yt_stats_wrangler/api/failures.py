@@ -0,0 +1,82 @@
+# Structured records of entities that failed during a crawl, used by YouTubeDataClient.retry_failures
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+
+from googleapiclient.errors import HttpError
+
+# HTTP statuses and API error reasons that are worth retrying after a pause
+RETRIABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+RETRIABLE_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "backendError", "internalError"}
+
+
+@dataclass
+class FailureRecord:
+    """One entity (video, channel or handle) that a client method could not collect.
+
+    method is the single-entity client method that failed (e.g. 'get_all_video_comments'), page_token is
+    the page the crawl stopped on, if it got past the first page, so a retry can resume from there.
+    options are the limits the crawl ran with (e.g. max_comments), which the retry runs with too."""
+    method: str
+    entity_id: str
+    error_class: str
+    message: str
+    http_status: Optional[int] = None
+    reason: Optional[str] = None
+    retriable: bool = False
+    page_token: Optional[str] = None
+    attempts: int = 1
+    options: Dict = field(default_factory=dict)
+    failed_at: str = field(default_factory=lambda: str(datetime.now()))
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def http_error_reason(error: HttpError) -> Optional[str]:
+    """Return the API's reason code for an HttpError (e.g. 'quotaExceeded', 'commentsDisabled')."""
+    details = getattr(error, "error_details", None)
+    if isinstance(details, list) and details and isinstance(details[0], dict) and details[0].get("reason"):
+        return details[0]["reason"]
+    try:
+        content = error.content.decode("utf-8") if isinstance(error.content, bytes) else error.content
+        return json.loads(content)["error"]["errors"][0]["reason"]
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+
+def is_retriable(error: Exception) -> bool:
+    """Transient server errors, rate limiting and network failures are retriable. Missing entities,
+    disabled comments, exhausted quota and programming errors are not."""
+    if isinstance(error, HttpError):
+        reason = http_error_reason(error)
+        if reason in RETRIABLE_REASONS:
+            return True
+        if reason == "quotaExceeded":
+            return False
+        return error.resp.status in RETRIABLE_STATUSES
+    # Connection resets, timeouts and DNS failures surface as OSError subclasses or httplib2 errors
+    if isinstance(error, OSError):
+        return True
+    return type(error).__module__.startswith("httplib2")
+
+
+def failure_from_exception(method: str, entity_id: str, error: Exception, attempts: int = 1) -> FailureRecord:
+    """Build a FailureRecord from the exception a client method raised."""
+    http_status = reason = None
+    if isinstance(error, HttpError):
+        http_status = error.resp.status
+        reason = http_error_reason(error)
+    return FailureRecord(
+        method=method,
+        entity_id=entity_id,
+        error_class=type(error).__name__,
+        message=str(error),
+        http_status=http_status,
+        reason=reason,
+        retriable=is_retriable(error),
+        page_token=getattr(error, "page_token", None),
+        attempts=attempts,
+        options=dict(getattr(error, "crawl_options", {})),
+    )
@@ -0,0 +1,179 @@
+# Column selection helpers that map output columns onto YouTube API v3 partial responses
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+class FieldSpec(NamedTuple):
+    """How one output column is built from an API resource.
+
+    path is a '/' separated path into the resource (e.g. 'snippet/title'), or the name of a method input
+    prefixed with '$' (e.g. '$video_id'). kind is one of:
+      'raw'              the value as returned, or default when missing
+      'int'              int() of the value, or default when missing (counts are returned as strings)
+      'duration_seconds' an ISO 8601 duration converted to whole seconds
+      'is_short'         True when the duration at path is 60 seconds or less
+      'const'            always default
+    """
+    path: str = ""
+    kind: str = "raw"
+    default: Any = None
+
+
+# Declarative layout of every row type the client builds, in output column order.
+# Compiled into extraction functions by yt_stats_wrangler.api.extractors.
+FIELD_SPECS: Dict[str, Dict[str, FieldSpec]] = {
+    "channelStats": {
+        "channelId": FieldSpec("$channel_id"),
+        "channelName": FieldSpec("snippet/title"),
+        "subscribers": FieldSpec("statistics/subscriberCount", "int", 0),
+        "totalChannelViews": FieldSpec("statistics/viewCount", "int", 0),
+        "totalPosts": FieldSpec("statistics/videoCount", "int", 0),
+    },
+    "videoDetails": {
+        "channelId": FieldSpec("$channel_id"),
+        "videoId": FieldSpec("snippet/resourceId/videoId"),
+        "publishedAt": FieldSpec("snippet/publishedAt"),
+        "title": FieldSpec("snippet/title"),
+        "description": FieldSpec("snippet/description"),
+        "channelTitle": FieldSpec("snippet/channelTitle"),
+    },
+    "videoStats": {
+        "videoId": FieldSpec("id"),
+        "title": FieldSpec("snippet/title"),
+        "description": FieldSpec("snippet/description"),
+        "publishedAt": FieldSpec("snippet/publishedAt"),
+        "channelId": FieldSpec("snippet/channelId"),
+        "channelTitle": FieldSpec("snippet/channelTitle"),
+        "tags": FieldSpec("snippet/tags", "raw", []),
+        "categoryId": FieldSpec("snippet/categoryId"),
+        "viewCount": FieldSpec("statistics/viewCount", "int", 0),
+        "likeCount": FieldSpec("statistics/likeCount", "int", 0),
+        "commentCount": FieldSpec("statistics/commentCount", "int", 0),
+        "duration_seconds": FieldSpec("contentDetails/duration", "duration_seconds", "PT0S"),
+        "definition": FieldSpec("contentDetails/definition"),
+        "isShort": FieldSpec("contentDetails/duration", "is_short", "PT0S"),
+    },
+    # Top-level comments returned on their own, by get_top_level_video_comments
+    "topLevelComments": {
+        "videoId": FieldSpec("$video_id"),
+        "commentId": FieldSpec("snippet/topLevelComment/id"),
+        "author": FieldSpec("snippet/topLevelComment/snippet/authorDisplayName"),
+        "text": FieldSpec("snippet/topLevelComment/snippet/textDisplay"),
+        "publishedAt": FieldSpec("snippet/topLevelComment/snippet/publishedAt"),
+        "likeCount": FieldSpec("snippet/topLevelComment/snippet/likeCount", "raw", 0),
+        "replyCount": FieldSpec("snippet/totalReplyCount", "raw", 0),
+    },
+    # Top-level comments in the all-comments schema, which they share with replies
+    "comments": {
+        "commentId": FieldSpec("snippet/topLevelComment/id"),
+        "videoId": FieldSpec("$video_id"),
+        "author": FieldSpec("snippet/topLevelComment/snippet/authorDisplayName"),
+        "text": FieldSpec("snippet/topLevelComment/snippet/textDisplay"),
+        "publishedAt": FieldSpec("snippet/topLevelComment/snippet/publishedAt"),
+        "likeCount": FieldSpec("snippet/topLevelComment/snippet/likeCount", "raw", 0),
+        "replyCount": FieldSpec("snippet/totalReplyCount", "raw", 0),
+        "parentId": FieldSpec(kind="const"),
+    },
+    "replies": {
+        "commentId": FieldSpec("id"),
+        "parentId": FieldSpec("$parent_id"),
+        "author": FieldSpec("snippet/authorDisplayName"),
+        "text": FieldSpec("snippet/textDisplay"),
+        "publishedAt": FieldSpec("snippet/publishedAt"),
+        "likeCount": FieldSpec("snippet/likeCount", "raw", 0),
+        "videoId": FieldSpec("snippet/videoId"),
+    },
+}
+
+# Prefix of each row type's commit time column
+COMMIT_PREFIXES: Dict[str, str] = {
+    "channelStats": "channelStats",
+    "videoDetails": "videoDetails",
+    "videoStats": "videoStats",
+    "topLevelComments": "videoTopLevelComments",
+    "comments": "videoAllComments",
+    "replies": "videoAllComments",
+}
+
+
+def _api_paths(spec: FieldSpec) -> List[str]:
+    return [] if spec.kind == "const" or not spec.path or spec.path.startswith("$") else [spec.path]
+
+
+# Maps each output column of a record type to the API field paths needed to build it.
+# Columns with an empty path list are filled in from the method's inputs rather than the response.
+COLUMN_FIELDS: Dict[str, Dict[str, List[str]]] = {
+    record_type: {column: _api_paths(spec) for column, spec in FIELD_SPECS[record_type].items()}
+    for record_type in ("channelStats", "videoDetails", "videoStats", "comments", "replies")
+}
+
+# Identifier columns that are always returned so rows can still be joined back to their entity
+KEY_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "channelStats": ("channelId",),
+    "videoDetails": ("videoId",),
+    "videoStats": ("videoId",),
+    "comments": ("commentId",),
+    "replies": ("commentId",),
+}
+
+
+def resolve_columns(record_type: str, columns: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+    """Validate a user's column selection for a record type. Returns None when every column is wanted,
+    otherwise a tuple of the requested columns with the record's key columns always included."""
+    if columns is None:
+        return None
+    available = COLUMN_FIELDS[record_type]
+    unknown = [col for col in columns if col not in available]
+    if unknown:
+        raise ValueError(
+            f"Invalid column(s) {unknown} for '{record_type}'. Choose from: {', '.join(available)}."
+        )
+    keys = [col for col in KEY_COLUMNS[record_type] if col not in columns]
+    return tuple(keys + list(columns))
+
+
+def build_part(record_type: str, columns: Optional[Tuple[str, ...]], default_part: str) -> str:
+    """Return the smallest comma separated `part` value that still covers the requested columns."""
+    if columns is None:
+        return default_part
+    parts = []
+    for col in columns:
+        for path in COLUMN_FIELDS[record_type][col]:
+            part = path.split("/")[0]
+            if part not in parts:
+                parts.append(part)
+    # Only keep parts the endpoint was going to be asked for anyway, in their original order
+    ordered = [part for part in default_part.split(",") if part in parts]
+    return ",".join(ordered) if ordered else "id"
+
+
+def build_fields_mask(record_type: str, columns: Optional[Tuple[str, ...]],
+                      extra_paths: Optional[List[str]] = None, paged: bool = True) -> Optional[str]:
+    """Build the `fields` partial response parameter for the requested columns, e.g.
+    'items(id,statistics(viewCount)),nextPageToken'. Returns None when every column is wanted."""
+    if columns is None:
+        return None
+    paths = []
+    for col in columns:
+        paths.extend(COLUMN_FIELDS[record_type][col])
+    paths.extend(extra_paths or [])
+    if not paths:
+        # Every requested column comes from the inputs, the resource id is the cheapest thing to ask for
+        paths = ["id"]
+    mask = f"items({_render_field_tree(_build_field_tree(paths))})"
+    # nextPageToken has to survive the mask or list_next() will stop after the first page
+    return f"{mask},nextPageToken" if paged else mask
+
+
+def _build_field_tree(paths: List[str]) -> Dict:
+    tree: Dict = {}
+    for path in paths:
+        node = tree
+        for segment in path.split("/"):
+            node = node.setdefault(segment, {})
+    return tree
+
+
+def _render_field_tree(tree: Dict) -> str:
+    rendered = []
+    for key, children in tree.items():
+        rendered.append(f"{key}({_render_field_tree(children)})" if children else key)
+    return ",".join(rendered)
@@ -0,0 +1,486 @@
+# Manifest driven crawl jobs, used by the yt-stats-wrangler command
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from yt_stats_wrangler.api.client import COMMENT_ORDERS, YouTubeDataClient
+from yt_stats_wrangler.api.concurrency import AdaptiveConcurrency
+from yt_stats_wrangler.api.models import JSON_DECODERS, FastJsonModel
+from yt_stats_wrangler.api.profiling import Profiler
+from yt_stats_wrangler.utils.helpers import dedupe_ids
+from yt_stats_wrangler.utils.spill import SpillBuffer
+
+# What a manifest can ask for. Channel pulls run once per channel, video pulls once per video
+# (video_stats once per 50 listed videos, channel videos are covered by crawl_channel).
+CHANNEL_PULLS = ("channel_stats", "video_details", "video_stats")
+COMMENT_PULLS = ("top_level_comments", "all_comments", "new_comments")
+PULLS = CHANNEL_PULLS + COMMENT_PULLS
+
+OUTPUT_TYPES = ("warehouse", "snapshot", "jsonl", "arrow")
+
+# Used by dry runs, which cannot know how many videos or comments there are without spending quota
+DEFAULT_ESTIMATES = {
+    "videos_per_channel": 50,
+    "comment_threads_per_video": 100,
+    "reply_pages_per_video": 1,
+}
+
+# Limits a manifest can put on top_level_comments and all_comments pulls, passed to the client methods per video
+COMMENT_LIMITS = ("max_comments", "order", "max_replies_per_thread", "sample_pages")
+
+# Comment rows a worker holds in memory before spilling them to disk, unless the manifest sets spill_rows
+DEFAULT_SPILL_ROWS = 100_000
+
+
+def load_manifest(path: str) -> Dict:
+    """
+    Read a job manifest from a JSON or YAML file and check it. YAML needs PyYAML installed.
+
+    Example (YAML):
+        channels: [UCB2mKxxXPK3X8SJkAc-db3A]
+        handles: ["@cdcodes"]
+        videos: [dQw4w9WgXcQ]
+        pull: [channel_stats, video_stats, all_comments]
+        output: {type: warehouse, path: youtube.duckdb, backend: duckdb}  # or {type: arrow, path: results, job_id: daily}
+        quota: 10000
+        concurrency: 4
+        checkpoint: youtube.checkpoint.json
+        spill_rows: 100000
+        comment_limits: {max_comments: 200, order: relevance, max_replies_per_thread: 5}
+        adaptive_concurrency: true
+        profile_dir: profiles
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError(
+                "Optional dependency 'pyyaml' is needed for YAML manifests. Install it with:\n"
+                "pip install yt-stats-wrangler[cli]"
+            )
+        manifest = yaml.safe_load(text) or {}
+    else:
+        manifest = json.loads(text)
+    return validate_manifest(manifest)
+
+
+def validate_manifest(manifest: Dict) -> Dict:
+    """Fill in defaults and raise ValueError on anything the job cannot run."""
+    manifest = dict(manifest)
+    for key in ("channels", "handles", "videos", "pull"):
+        manifest[key] = dedupe_ids(list(manifest.get(key) or []))
+    unknown = [pull for pull in manifest["pull"] if pull not in PULLS]
+    if unknown:
+        raise ValueError(f"Invalid pull {unknown}. Choose from: {', '.join(PULLS)}.")
+    if not manifest["pull"]:
+        raise ValueError("The manifest must list at least one pull.")
+    if not (manifest["channels"] or manifest["handles"] or manifest["videos"]):
+        raise ValueError("The manifest must list channels, handles or videos.")
+
+    output = dict(manifest.get("output") or {"type": "jsonl", "path": "output"})
+    if output.get("type") not in OUTPUT_TYPES:
+        raise ValueError(f"Invalid output type '{output.get('type')}'. Choose from: {', '.join(OUTPUT_TYPES)}.")
+    if not output.get("path"):
+        raise ValueError("The manifest output needs a path.")
+    if output["type"] == "arrow":
+        # Results are stored in the catalog under this job ID, and re-runs add to it
+        output["job_id"] = str(output.get("job_id") or "default")
+    manifest["output"] = output
+
+    manifest["quota"] = int(manifest.get("quota", -1))
+    manifest["concurrency"] = max(int(manifest.get("concurrency", 4)), 1)
+    # With adaptive_concurrency, concurrency is the most requests the workers may have in flight together
+    manifest["adaptive_concurrency"] = bool(manifest.get("adaptive_concurrency", False))
+    # profile prints a stage breakdown at the end, profile_dir also keeps cProfile stats and folded stacks
+    manifest["profile_dir"] = manifest.get("profile_dir")
+    manifest["profile"] = bool(manifest.get("profile", False)) or manifest["profile_dir"] is not None
+    manifest["columns"] = dict(manifest.get("columns") or {})
+    manifest["comments_on_channel_videos"] = bool(manifest.get("comments_on_channel_videos", True))
+    manifest["estimates"] = {**DEFAULT_ESTIMATES, **(manifest.get("estimates") or {})}
+    # Jobs decode responses with the fastest installed JSON parser unless told otherwise
+    manifest["json_decoder"] = manifest.get("json_decoder", "auto")
+    if manifest["json_decoder"] not in JSON_DECODERS:
+        raise ValueError(f"Invalid json_decoder '{manifest['json_decoder']}'. Choose from: {', '.join(JSON_DECODERS)}.")
+    # Comment crawls stream their rows to the output in batches, spilling to spill_dir past spill_rows
+    manifest["spill_rows"] = max(int(manifest.get("spill_rows", DEFAULT_SPILL_ROWS)), 1)
+    manifest["spill_dir"] = manifest.get("spill_dir")
+
+    limits = dict(manifest.get("comment_limits") or {})
+    unknown = [key for key in limits if key not in COMMENT_LIMITS]
+    if unknown:
+        raise ValueError(f"Invalid comment_limits {unknown}. Choose from: {', '.join(COMMENT_LIMITS)}.")
+    if limits.get("order") is not None and limits["order"] not in COMMENT_ORDERS:
+        raise ValueError(f"Invalid order '{limits['order']}'. Choose from: {', '.join(COMMENT_ORDERS)}.")
+    manifest["comment_limits"] = limits
+    return manifest
+
+
+class QuotaBudget:
+    """Quota shared by every worker of a job. Units are taken before each request is made,
+    so concurrent workers can never go over the limit together. A limit of -1 means no limit."""
+
+    def __init__(self, limit: int = -1, used: int = 0):
+        self.limit = limit
+        self.used = used
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def take(self, units: int = 1) -> bool:
+        with self._lock:
+            if self.limit != -1 and self.used + units > self.limit:
+                self.exhausted = True
+                return False
+            self.used += units
+            return True
+
+    def give_back(self, units: int):
+        with self._lock:
+            self.used -= units
+
+
+class JobClient(YouTubeDataClient):
+    """Client used by job workers. Quota checks draw from the job's shared QuotaBudget, and the
+    client's own quota_used still counts what this worker has spent."""
+
+    def __init__(self, api_key: str, budget: QuotaBudget, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.budget = budget
+        self.quota_refused = False
+
+    def _refund_quota(self, units: int):
+        super()._refund_quota(units)
+        self.budget.give_back(units)
+
+    def check_quota(self, units: int = 1) -> bool:
+        if self._out_of_time():
+            return False
+        if self.budget.take(units):
+            return True
+        self.quota_refused = True
+        return False
+
+
+class JsonlSink:
+    """Appends rows to one JSON Lines file per record type (e.g. output/videoStats.jsonl)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._files = {}
+
+    def write(self, rows: List[Dict]):
+        for row in rows:
+            record_type = next((key[:-len("_commit_time")] for key in row if key.endswith("_commit_time")), "rows")
+            f = self._files.get(record_type)
+            if f is None:
+                f = self._files[record_type] = open(os.path.join(self.directory, f"{record_type}.jsonl"), "a",
+                                                    encoding="utf-8")
+            f.write(json.dumps(row, default=str) + "\n")
+
+    def flush(self):
+        for f in self._files.values():
+            f.flush()
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+
+def open_sink(output: Dict):
+    """Build the sink described by a manifest's output section."""
+    if output["type"] == "warehouse":
+        from yt_stats_wrangler.utils.warehouse import WarehouseSink
+        return WarehouseSink(output["path"], backend=output.get("backend", "sqlite"),
+                             batch_size=int(output.get("batch_size", 5000)))
+    if output["type"] == "snapshot":
+        from yt_stats_wrangler.utils.snapshot_store import SnapshotStore
+        return SnapshotStore(output["path"])
+    if output["type"] == "arrow":
+        from yt_stats_wrangler.utils.arrow_catalog import ArrowCatalog
+        return ArrowCatalog(output["path"]).sink(output["job_id"], batch_size=int(output.get("batch_size", 50_000)))
+    return JsonlSink(output["path"])
+
+
+def plan_tasks(manifest: Dict, channel_ids: List[str], videos: List[str]) -> List[Dict]:
+    """List the tasks of one phase. Channel tasks come first, then 50-ID stats batches
+    of the listed videos, then comment tasks for every video."""
+    pulls = manifest["pull"]
+    tasks = []
+    for channel_id in channel_ids:
+        for pull in CHANNEL_PULLS:
+            if pull in pulls:
+                tasks.append({"key": f"{pull}:{channel_id}", "pull": pull, "channelId": channel_id})
+    if "video_stats" in pulls:
+        listed = manifest["videos"]
+        for i in range(0, len(listed), 50):
+            tasks.append({"key": f"video_stats_batch:{i // 50}", "pull": "video_stats_batch", "videoIds": listed[i:i + 50]})
+    for video_id in videos:
+        for pull in COMMENT_PULLS:
+            if pull in pulls:
+                tasks.append({"key": f"{pull}:{video_id}", "pull": pull, "videoId": video_id})
+    return tasks
+
+
+def estimate_task(task: Dict, estimates: Dict, comment_limits: Optional[Dict] = None) -> int:
+    """Estimated quota of one task (one request per unit, except handle searches at 100 units each)."""
+    limits = comment_limits or {}
+    pages = math.ceil(estimates["videos_per_channel"] / 50)
+    threads = estimates["comment_threads_per_video"]
+    if limits.get("max_comments") is not None:
+        threads = min(threads, limits["max_comments"])
+    thread_pages = max(math.ceil(threads / 100), 1)
+    # Sampled crawls still page through to their last sampled page, plus one call for the comment count
+    if limits.get("sample_pages") is not None:
+        thread_pages = max(math.ceil(estimates["comment_threads_per_video"] / 100), 1) + 1
+    reply_pages = estimates["reply_pages_per_video"]
+    # Up to 5 replies per thread come inline with the thread, so smaller caps never call comments.list
+    if limits.get("max_replies_per_thread") is not None and limits["max_replies_per_thread"] <= 5:
+        reply_pages = 0
+    pull = task["pull"]
+    if pull == "handle":
+        return 100
+    if pull == "channel_stats" or pull == "video_stats_batch":
+        return 1
+    if pull == "video_details":
+        return 1 + pages
+    if pull == "video_stats":
+        return 1 + 2 * pages
+    if pull == "all_comments":
+        return thread_pages + reply_pages
+    if pull == "new_comments":
+        return max(math.ceil(estimates["comment_threads_per_video"] / 100), 1) + estimates["reply_pages_per_video"]
+    return thread_pages
+
+
+def estimate_job(manifest: Dict) -> Dict:
+    """Estimate the requests and quota of a whole job without calling the API."""
+    estimates = manifest["estimates"]
+    channel_ids = manifest["channels"] + [f"handle:{handle}" for handle in manifest["handles"]]
+    videos = list(manifest["videos"])
+    if manifest["comments_on_channel_videos"] and ("video_details" in manifest["pull"] or "video_stats" in manifest["pull"]):
+        videos += [None] * (len(channel_ids) * estimates["videos_per_channel"])
+    tasks = [{"pull": "handle"} for _ in manifest["handles"]] + plan_tasks(manifest, channel_ids, videos)
+
+    summary = {}
+    for task in tasks:
+        quota = estimate_task(task, estimates, manifest["comment_limits"])
+        entry = summary.setdefault(task["pull"], {"tasks": 0, "requests": 0, "quota": 0})
+        entry["tasks"] += 1
+        entry["requests"] += 1 if task["pull"] == "handle" else quota
+        entry["quota"] += quota
+    return summary
+
+
+class CrawlJob:
+    """
+    Runs a manifest: resolves handles, then runs every channel and video task on a pool of worker threads.
+    Each worker has its own client (and HTTP connection), all drawing from one QuotaBudget. Rows are written
+    to the output sink from the main thread as tasks finish.
+
+    Finished tasks, discovered video IDs and comment watermarks are saved to the checkpoint file after every task,
+    so an interrupted job (or one that ran out of quota) picks up where it stopped when run again. Tasks cut short
+    by the quota budget are not marked finished.
+    """
+
+    def __init__(self, manifest: Dict, api_key: Optional[str] = None, checkpoint: Optional[str] = None,
+                 client_factory: Optional[Callable] = None, progress: bool = True):
+        self.manifest = manifest
+        self.checkpoint_path = checkpoint or manifest.get("checkpoint")
+        self.state = self._load_checkpoint()
+        self.budget = QuotaBudget(manifest["quota"])
+        self._quota_before = self.state["quota_used"]
+        # One controller shared by every worker's client, so together they back off when the API pushes back
+        self.concurrency = (AdaptiveConcurrency(max_concurrency=manifest["concurrency"])
+                            if manifest.get("adaptive_concurrency") else None)
+        self.profiler = (Profiler(cprofile=manifest.get("profile_dir") is not None)
+                         if manifest.get("profile") else None)
+        self.client_factory = client_factory or (
+            lambda budget: JobClient(api_key, budget, model=FastJsonModel(manifest["json_decoder"]),
+                                     spill_rows=manifest["spill_rows"], spill_dir=manifest["spill_dir"],
+                                     concurrency=self.concurrency, profiler=self.profiler))
+        self.progress = progress
+        self.failed_tasks = []
+        self.rows_written = 0
+        self._total_tasks = 0
+        self._thread_local = threading.local()
+
+    def run(self) -> Dict:
+        """Run every unfinished task and return a summary of the run."""
+        start = time.time()
+        sink = open_sink(self.manifest["output"])
+        try:
+            handle_tasks = [{"key": f"handle:{handle}", "pull": "handle", "handle": handle}
+                            for handle in self.manifest["handles"]]
+            self._run_phase(handle_tasks, sink, start)
+
+            channel_ids = dedupe_ids(self.manifest["channels"] + [
+                channel_id for channel_id in self.state["channels"].values() if channel_id])
+            channel_tasks = plan_tasks(self.manifest, channel_ids, [])
+            self._run_phase(channel_tasks, sink, start)
+
+            videos = list(self.manifest["videos"])
+            if self.manifest["comments_on_channel_videos"]:
+                for channel_id in channel_ids:
+                    videos.extend(self.state["videos"].get(channel_id, []))
+            comment_tasks = plan_tasks({**self.manifest, "pull": [p for p in self.manifest["pull"] if p in COMMENT_PULLS]},
+                                       [], dedupe_ids(videos))
+            self._run_phase(comment_tasks, sink, start)
+        finally:
+            if hasattr(sink, "flush"):
+                sink.flush()
+            sink.close()
+
+        elapsed = time.time() - start
+        summary = {
+            "completed": len(self.state["completed"]),
+            "failed": len(self.failed_tasks),
+            "rows": self.rows_written,
+            "quota_used": self.budget.used,
+            "quota_exhausted": self.budget.exhausted,
+            "seconds": round(elapsed, 1),
+        }
+        if self.concurrency is not None:
+            summary["concurrency"] = self.concurrency.stats()
+        if self.profiler is not None:
+            summary["profile"] = self._finish_profile()
+        if self.progress:
+            print(f"Finished: {summary['rows']} rows, {summary['quota_used']} quota units, "
+                  f"{len(self.failed_tasks)} failed tasks in {summary['seconds']}s")
+            if self.budget.exhausted:
+                print("Quota budget reached. Run the job again with more quota to finish the remaining tasks.")
+        return summary
+
+    def _finish_profile(self) -> List[Dict]:
+        """Print the stage breakdown of the run and write the profile files. Returns the stage report."""
+        if self.progress:
+            self.profiler.print_report()
+        profile_dir = self.manifest.get("profile_dir")
+        # Custom client factories may not pass the profiler on, in which case nothing was profiled
+        if profile_dir and self.profiler.method_report():
+            os.makedirs(profile_dir, exist_ok=True)
+            self.profiler.write_folded(os.path.join(profile_dir, "profile.folded"))
+            self.profiler.dump_stats(os.path.join(profile_dir, "profile.pstats"))
+            if self.progress:
+                print(f"Profile written to {profile_dir} (profile.pstats, profile.folded)")
+        self.profiler.close()
+        return self.profiler.report()
+
+    def _run_phase(self, tasks: List[Dict], sink, start: float):
+        completed = set(self.state["completed"])
+        tasks = [task for task in tasks if task["key"] not in completed]
+        if not tasks or self.budget.exhausted:
+            return
+        self._total_tasks = len(completed) + len(tasks)
+        with ThreadPoolExecutor(max_workers=self.manifest["concurrency"]) as pool:
+            futures = {pool.submit(self._run_task, task): task for task in tasks}
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"[Exception] {task['key']}: {e}")
+                    self.failed_tasks.append(task["key"])
+                    continue
+                rows = result["rows"]
+                # Comment crawls come back as a SpillBuffer and are written one batch at a time
+                for batch in (rows.iter_batches() if isinstance(rows, SpillBuffer) else [rows]):
+                    if batch:
+                        sink.write(batch)
+                self.rows_written += len(rows)
+                self._apply_result(task, result)
+                if isinstance(rows, SpillBuffer):
+                    rows.cleanup()
+                self._save_checkpoint()
+                if self.progress:
+                    elapsed = max(time.time() - start, 1e-9)
+                    print(f"[{len(self.state['completed'])}/{self._total_tasks}] {task['key']}: {len(rows)} rows | "
+                          f"quota {self.budget.used}{'' if self.budget.limit == -1 else '/' + str(self.budget.limit)} | "
+                          f"{self.rows_written / elapsed:.1f} rows/s")
+
+    def _client(self):
+        client = getattr(self._thread_local, "client", None)
+        if client is None:
+            client = self._thread_local.client = self.client_factory(self.budget)
+        return client
+
+    def _run_task(self, task: Dict) -> Dict:
+        """Run one task on the worker's client. Returns its rows and any job state it produced,
+        which the main thread applies so the checkpoint is only ever touched from one thread."""
+        client = self._client()
+        client.quota_refused = False
+        failures_before = len(getattr(client, "failures", []))
+        columns = self.manifest["columns"]
+        pull = task["pull"]
+        result = {"rows": []}
+        if pull == "handle":
+            result["channelId"] = client.get_channel_id_from_handle(task["handle"])
+        elif pull == "channel_stats":
+            result["rows"] = client.get_channel_statistics(task["channelId"], columns=columns.get("channel_stats"))
+        elif pull == "video_details":
+            result["rows"] = client.get_all_video_details_for_channel(task["channelId"], columns=columns.get("video_details"))
+        elif pull == "video_stats":
+            result["rows"] = client.crawl_channel(task["channelId"], columns=columns.get("video_stats"))
+        elif pull == "video_stats_batch":
+            result["rows"] = client.get_video_stats(task["videoIds"], columns=columns.get("video_stats"))
+        elif pull == "top_level_comments":
+            limits = {key: value for key, value in self.manifest["comment_limits"].items()
+                      if key != "max_replies_per_thread"}
+            result["rows"] = client.get_top_level_video_comments(task["videoId"], columns=columns.get("comments"),
+                                                                 output_format="stream", **limits)
+        elif pull == "all_comments":
+            result["rows"] = client.get_all_video_comments(task["videoId"], columns=columns.get("comments"),
+                                                           output_format="stream", **self.manifest["comment_limits"])
+        else:
+            result["rows"], result["watermark"] = client.get_new_video_comments(
+                task["videoId"], watermark=self.state["watermarks"].get(task["videoId"]), columns=columns.get("comments"))
+        # A task that was refused quota returned partial rows, and one with failed calls (e.g. a 503 on a videos
+        # call) or an unresolved handle is missing some, so they are left to be run again
+        result["complete"] = not client.quota_refused and len(getattr(client, "failures", [])) == failures_before \
+            and not (pull == "handle" and result["channelId"] is None)
+        return result
+
+    def _apply_result(self, task: Dict, result: Dict):
+        pull = task["pull"]
+        if pull == "handle":
+            if result["complete"]:
+                self.state["channels"][task["handle"]] = result["channelId"]
+            else:
+                print(f"Could not resolve handle {task['handle']}")
+        elif pull in ("video_details", "video_stats"):
+            known = self.state["videos"].get(task["channelId"], [])
+            self.state["videos"][task["channelId"]] = dedupe_ids(
+                known + [row["videoId"] for row in result["rows"] if "videoId" in row])
+        elif pull == "new_comments" and result["complete"]:
+            self.state["watermarks"][task["videoId"]] = result["watermark"]
+        if result["complete"]:
+            self.state["completed"].append(task["key"])
+        # Quota spent over every run of the job, the budget only covers this run
+        self.state["quota_used"] = self._quota_before + self.budget.used
+
+    def _load_checkpoint(self) -> Dict:
+        state = {"completed": [], "channels": {}, "videos": {}, "watermarks": {}, "quota_used": 0}
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                state.update(json.load(f))
+        return state
+
+    def reset_completed(self):
+        """Forget finished tasks so the job runs in full again. Comment watermarks are kept."""
+        self.state["completed"] = []
+        self._save_checkpoint()
+
+    def _save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        # Write to a temporary file first so an interrupted write never corrupts the checkpoint
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.checkpoint_path)
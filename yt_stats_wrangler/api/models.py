@@ -0,0 +1,63 @@
+# Response models for googleapiclient that decode API responses with a faster JSON parser
+import json
+from typing import Callable, Tuple
+
+from googleapiclient.model import JsonModel
+
+JSON_DECODERS = ("auto", "orjson", "msgspec", "json")
+
+
+def load_json_decoder(name: str = "auto") -> Tuple[str, Callable]:
+    """
+    Return (name, loads) for a JSON decoder. 'auto' picks orjson, then msgspec, then the standard library.
+    Both orjson and msgspec decode UTF-8 bytes directly, so the response body is never copied into a str first.
+    """
+    if name not in JSON_DECODERS:
+        raise ValueError(f"Invalid decoder '{name}'. Choose from: {', '.join(JSON_DECODERS)}.")
+
+    if name in ("auto", "orjson"):
+        try:
+            import orjson
+            return "orjson", orjson.loads
+        except ImportError:
+            if name == "orjson":
+                raise ImportError(
+                    "Optional dependency 'orjson' is not installed. Install it with:\n"
+                    "pip install yt-stats-wrangler[fast-json]"
+                )
+
+    if name in ("auto", "msgspec"):
+        try:
+            import msgspec
+            return "msgspec", msgspec.json.Decoder().decode
+        except ImportError:
+            if name == "msgspec":
+                raise ImportError("Install msgspec with: pip install msgspec")
+
+    return "json", json.loads
+
+
+class FastJsonModel(JsonModel):
+    """
+    Drop-in replacement for googleapiclient's JsonModel that decodes responses with orjson or msgspec.
+    Responses are decoded into the same plain dicts and lists as the default model, so nothing else changes.
+
+        client = YouTubeDataClient(api_key, model=FastJsonModel())
+
+    The client already trims responses down to the requested columns with fields masks, so the remaining
+    cost per page is parsing, which is what this model speeds up.
+    """
+
+    def __init__(self, decoder: str = "auto", data_wrapper: bool = False):
+        super().__init__(data_wrapper=data_wrapper)
+        self.decoder, self._loads = load_json_decoder(decoder)
+
+    def deserialize(self, content):
+        try:
+            body = self._loads(content)
+        except ValueError:
+            # Bodies that are not JSON are returned as text, like JsonModel does
+            return content.decode("utf-8") if isinstance(content, bytes) else content
+        if self._data_wrapper and isinstance(body, dict) and "data" in body:
+            body = body["data"]
+        return body
@@ -0,0 +1,242 @@
+# Wall time, CPU time and allocations of client calls, broken down by stage and by method
+import cProfile
+import functools
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from yt_stats_wrangler.utils.helpers import convert_to_library
+
+# Stages in report order. 'client' is the time methods spend outside every other stage, in their own loops
+STAGES = ("request", "decode", "extract", "sinks", "format_keys", "convert", "client")
+
+_active = threading.local() # the Profiler timing the current thread, used by profiled_stage()
+
+
+def profiled_stage(name: str, func: Callable) -> Callable:
+    """Wrap a helper so that calls made while a Profiler is timing the current thread count as stage name.
+    Without an active profiler the wrapper only costs a thread-local lookup."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = getattr(_active, "profiler", None)
+        if profiler is None:
+            return func(*args, **kwargs)
+        with profiler.stage(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class Profiler:
+    """
+    Profiles client calls while they run. Give one to a client with YouTubeDataClient(profiler=...) and every
+    fetch method call is timed, along with the stages of its work:
+
+        request      waiting on the API (and on the AdaptiveConcurrency limit, if the client has one)
+        decode       parsing the JSON responses
+        extract      the compiled row extractors
+        sinks        writing rows to the client's sinks
+        format_keys  format_dict_keys
+        convert      convert_to_library
+        client       everything else the methods do, e.g. their paging loops
+
+    Stage figures are self times: a stage excludes the stages nested in it, so the stages of a call add up to
+    its wall time. Method figures include everything under the call. Each figure has wall time, CPU time of the
+    thread and, with trace_allocations, the net bytes allocated by tracemalloc's count. Allocations are counted
+    process-wide, so they are only exact when one thread is crawling. crawl_channel runs its videos requests on
+    worker threads, whose request stages overlap the calling thread's time.
+
+    cprofile=True also runs cProfile during method calls, for stats(), dump_stats() and print_stats().
+    write_folded() writes the stage stacks in the folded format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, trace_allocations: bool = True, cprofile: bool = False):
+        self.trace_allocations = trace_allocations
+        self.cprofile = cprofile
+        self._stages: Dict[str, List[float]] = {} # name -> [calls, wall, cpu, alloc]
+        self._methods: Dict[str, List[float]] = {}
+        self._folded: Dict[tuple, float] = {} # stack of frame names -> self wall seconds
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profile = cProfile.Profile() if cprofile else None
+        self._profiling_thread = None # the thread that has cProfile enabled
+        self._profiled_calls = 0 # calls run under cProfile, pstats cannot load an empty profile
+        self._started_tracing = False
+
+    def _stack(self) -> List:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _allocated(self) -> int:
+        # (0, 0) when tracemalloc is not tracing
+        return tracemalloc.get_traced_memory()[0] if self.trace_allocations else 0
+
+    def _push(self, name: str, is_method: bool):
+        stack = self._stack()
+        if not stack:
+            _active.profiler = self
+            if self.trace_allocations and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+        if is_method and self._profile is not None:
+            with self._lock:
+                enable = self._profiling_thread is None
+                if enable:
+                    self._profiling_thread = threading.get_ident()
+            if enable:
+                self._profiled_calls += 1
+                self._profile.enable()
+        # name, is_method, wall, cpu, allocated at the start, then the wall, cpu and allocations of nested frames
+        stack.append([name, is_method, time.perf_counter(), time.thread_time(), self._allocated(), 0.0, 0.0, 0])
+
+    def _pop(self):
+        stack = self._stack()
+        name, is_method, wall_start, cpu_start, alloc_start, child_wall, child_cpu, child_alloc = stack.pop()
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        alloc = self._allocated() - alloc_start
+        path = tuple(frame[0] for frame in stack) + (name,)
+        with self._lock:
+            _add(self._stages, "client" if is_method else name, wall - child_wall, cpu - child_cpu, alloc - child_alloc)
+            if is_method:
+                _add(self._methods, name, wall, cpu, alloc)
+            self._folded[path] = self._folded.get(path, 0.0) + wall - child_wall
+            disable = is_method and self._profiling_thread == threading.get_ident() and \
+                not any(frame[1] for frame in stack)
+            if disable:
+                self._profiling_thread = None
+        if disable:
+            self._profile.disable()
+        if stack:
+            parent = stack[-1]
+            parent[5] += wall
+            parent[6] += cpu
+            parent[7] += alloc
+        else:
+            _active.profiler = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the block as a stage."""
+        self._push(name, False)
+        try:
+            yield
+        finally:
+            self._pop()
+
+    @contextmanager
+    def method(self, name: str):
+        """Time the block as a call to a client method."""
+        self._push(name, True)
+        try:
+            yield
+        finally:
+            self._pop()
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """Return func timed as stage name, e.g. the decoding step of a googleapiclient request."""
+        if getattr(func, "_profiled_stage", None) == name:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+        wrapper._profiled_stage = name
+        return wrapper
+
+    def report(self, output_format: str = "raw"):
+        """One row per stage with its calls, wall and CPU seconds, net bytes allocated and share of the wall time."""
+        with self._lock:
+            stages = {name: list(totals) for name, totals in self._stages.items()}
+        total_wall = sum(totals[1] for totals in stages.values()) or 1.0
+        order = [name for name in STAGES if name in stages] + sorted(name for name in stages if name not in STAGES)
+        rows = [{"stage": name, "calls": int(stages[name][0]), "wall_seconds": stages[name][1],
+                 "cpu_seconds": stages[name][2], "alloc_bytes": int(stages[name][3]),
+                 "wall_share": stages[name][1] / total_wall} for name in order]
+        return convert_to_library(rows, output_format)
+
+    def method_report(self, output_format: str = "raw"):
+        """One row per client method, slowest first, with its calls, wall and CPU seconds and net bytes allocated."""
+        with self._lock:
+            methods = {name: list(totals) for name, totals in self._methods.items()}
+        rows = [{"method": name, "calls": int(calls), "wall_seconds": wall, "cpu_seconds": cpu,
+                 "alloc_bytes": int(alloc), "wall_per_call": wall / calls}
+                for name, (calls, wall, cpu, alloc) in methods.items()]
+        rows.sort(key=lambda row: row["wall_seconds"], reverse=True)
+        return convert_to_library(rows, output_format)
+
+    def print_report(self):
+        print(f"{'stage':<14}{'calls':>9}{'wall s':>11}{'cpu s':>11}{'alloc MB':>11}{'wall %':>9}")
+        for row in self.report():
+            print(f"{row['stage']:<14}{row['calls']:>9}{row['wall_seconds']:>11.3f}{row['cpu_seconds']:>11.3f}"
+                  f"{row['alloc_bytes'] / 1e6:>11.2f}{row['wall_share'] * 100:>8.1f}%")
+        print()
+        print(f"{'method':<40}{'calls':>7}{'wall s':>11}{'cpu s':>11}{'alloc MB':>11}")
+        for row in self.method_report():
+            print(f"{row['method']:<40}{row['calls']:>7}{row['wall_seconds']:>11.3f}{row['cpu_seconds']:>11.3f}"
+                  f"{row['alloc_bytes'] / 1e6:>11.2f}")
+
+    def folded(self) -> List[str]:
+        """Stage stacks as folded lines ('crawl_channels;crawl_channel;request 51234'), weighted in microseconds."""
+        with self._lock:
+            folded = dict(self._folded)
+        return [f"{';'.join(path)} {int(seconds * 1e6)}" for path, seconds in sorted(folded.items())
+                if int(seconds * 1e6) > 0]
+
+    def write_folded(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.folded()) + "\n")
+
+    def allocation_sites(self, limit: int = 10, output_format: str = "raw"):
+        """The source lines holding the most traced memory right now, with their bytes and block counts."""
+        if not tracemalloc.is_tracing():
+            raise ValueError("Allocation sites need trace_allocations=True and a profiled call.")
+        statistics = tracemalloc.take_snapshot().statistics("lineno")[:limit]
+        rows = [{"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "bytes": stat.size,
+                 "blocks": stat.count} for stat in statistics]
+        return convert_to_library(rows, output_format)
+
+    def stats(self) -> pstats.Stats:
+        """The cProfile statistics, as a pstats.Stats (e.g. stats().sort_stats('cumulative').print_stats(20))."""
+        if self._profile is None:
+            raise ValueError("cProfile statistics need Profiler(cprofile=True).")
+        if not self._profiled_calls:
+            raise ValueError("No calls have been profiled yet.")
+        return pstats.Stats(self._profile)
+
+    def dump_stats(self, path: str):
+        """Write the cProfile statistics to a file for pstats, snakeviz or gprof2dot."""
+        self.stats().dump_stats(path)
+
+    def print_stats(self, sort: str = "cumulative", limit: int = 30):
+        self.stats().sort_stats(sort).print_stats(limit)
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._methods = {}
+            self._folded = {}
+        if self._profile is not None and self._profiling_thread is None:
+            self._profile = cProfile.Profile()
+            self._profiled_calls = 0
+
+    def close(self):
+        """Stop tracemalloc if this profiler started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+def _add(table: Dict[str, List[float]], name: str, wall: float, cpu: float, alloc: int):
+    totals = table.get(name)
+    if totals is None:
+        totals = table[name] = [0, 0.0, 0.0, 0]
+    totals[0] += 1
+    totals[1] += wall
+    totals[2] += cpu
+    totals[3] += alloc
@@ -0,0 +1,179 @@
+# Adaptive polling of video statistics on top of YouTubeDataClient.get_video_stats
+import math
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from yt_stats_wrangler.utils.helpers import convert_to_library, dedupe_ids, format_dict_keys
+
+# videos.list accepts up to 50 IDs per request, each request costs 1 quota unit
+BATCH_SIZE = 50
+
+
+class VideoRefreshScheduler:
+    """
+    Decides which tracked videos are due for a stats refresh and polls them with get_video_stats().
+
+    Every video gets its own refresh interval. New videos and videos that are gaining views quickly are
+    refreshed close to `min_interval`, while old videos whose counts barely move drift out towards
+    `max_interval`. Due videos are packed into full 50-ID requests (topped up with the videos that are due
+    soonest) and no more than `quota_per_hour` requests are made in any rolling hour. Videos the API leaves
+    out of a response (deleted or private) are checked back after `max_interval`, while videos whose request
+    failed (e.g. a 503) are retried after `retry_delay`.
+
+    Example:
+        scheduler = VideoRefreshScheduler(client, quota_per_hour=200, store=SnapshotStore("stats.db"))
+        scheduler.track(video_ids)
+        while True:
+            scheduler.run_due()
+            time.sleep(60)
+    """
+
+    def __init__(self, client, quota_per_hour: int = 100, min_interval: float = 3600,
+                 max_interval: float = 7 * 24 * 3600, store=None, columns: Optional[List[str]] = None,
+                 retry_delay: float = 300):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Intervals must satisfy 0 < min_interval <= max_interval.")
+        self.client = client
+        self.quota_per_hour = quota_per_hour
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.retry_delay = retry_delay
+        # Optional SnapshotStore that every polled batch is recorded into
+        self.store = store
+        # The scheduler needs views and publish dates to size the intervals, whatever else is asked for
+        if columns is not None:
+            columns = list(dict.fromkeys(list(columns) + ["viewCount", "publishedAt"]))
+        self.columns = columns
+        self.videos: Dict[str, Dict] = {}
+        self._request_times = deque()
+
+    def track(self, video_ids: List[str]):
+        """Start tracking videos. New videos are due immediately."""
+        for video_id in dedupe_ids(video_ids):
+            self.videos.setdefault(video_id, {
+                "publishedAt": None,
+                "lastRefreshed": None,
+                "lastViews": None,
+                "viewsPerHour": 0.0,
+                "nextRefresh": 0.0,
+            })
+
+    def untrack(self, video_ids: List[str]):
+        for video_id in video_ids:
+            self.videos.pop(video_id, None)
+
+    def due_videos(self, now: Optional[float] = None) -> List[str]:
+        """Return the IDs of videos whose next refresh has passed, most overdue first."""
+        now = time.time() if now is None else now
+        due = [video_id for video_id, state in self.videos.items() if state["nextRefresh"] <= now]
+        return sorted(due, key=lambda video_id: self.videos[video_id]["nextRefresh"])
+
+    def remaining_budget(self, now: Optional[float] = None) -> int:
+        """Number of requests that can still be made in the current rolling hour."""
+        now = time.time() if now is None else now
+        while self._request_times and self._request_times[0] <= now - 3600:
+            self._request_times.popleft()
+        return max(self.quota_per_hour - len(self._request_times), 0)
+
+    def plan_batches(self, now: Optional[float] = None) -> List[List[str]]:
+        """Pack due videos into 50-ID batches that fit in the remaining hourly budget. The last batch is
+        topped up with the videos that will be due next, since a partial request costs the same quota."""
+        now = time.time() if now is None else now
+        budget = self.remaining_budget(now)
+        if budget == 0:
+            return []
+        due = self.due_videos(now)[:budget * BATCH_SIZE]
+        if not due:
+            return []
+        spare = -len(due) % BATCH_SIZE
+        if spare:
+            due_set = set(due)
+            upcoming = sorted((video_id for video_id in self.videos if video_id not in due_set),
+                              key=lambda video_id: self.videos[video_id]["nextRefresh"])
+            due.extend(upcoming[:spare])
+        return [due[i:i + BATCH_SIZE] for i in range(0, len(due), BATCH_SIZE)]
+
+    def run_due(self, now: Optional[float] = None, key_format: str = "raw", output_format: str = "raw"):
+        """Refresh every video that is due (within the hourly budget) and reschedule it.
+        Returns the polled get_video_stats() rows."""
+        now = time.time() if now is None else now
+        polled = []
+        for batch in self.plan_batches(now):
+            quota_before = self.client.quota_used
+            failures_before = len(getattr(self.client, "failures", []))
+            # Memoized counts would read as no change, so every refresh goes to the API
+            rows = self.client.get_video_stats(batch, columns=self.columns, use_cache=False)
+            failed = {failure.entity_id for failure in getattr(self.client, "failures", [])[failures_before:]
+                      if failure.method == "get_video_stats"}
+            # Only count requests that actually used quota
+            for _ in range(self.client.quota_used - quota_before):
+                self._request_times.append(now)
+            if self.client.quota_used == quota_before and not rows:
+                # The client refused the request (e.g. its own max_quota was hit), try again next run
+                break
+            self._update(batch, rows, now, failed)
+            polled.extend(rows)
+
+        if self.store is not None and polled:
+            self.store.record_video_stats(polled)
+        if key_format != "raw":
+            polled = format_dict_keys(polled, case=key_format)
+        return convert_to_library(polled, output_format)
+
+    def get_schedule(self, output_format: str = "raw"):
+        """Return the current refresh plan for every tracked video."""
+        schedule = [
+            {
+                "videoId": video_id,
+                "nextRefresh": str(datetime.fromtimestamp(state["nextRefresh"])) if state["nextRefresh"] else None,
+                "viewsPerHour": state["viewsPerHour"],
+                "lastViews": state["lastViews"],
+            }
+            for video_id, state in self.videos.items()
+        ]
+        return convert_to_library(schedule, output_format)
+
+    def next_interval(self, state: Dict, now: float) -> float:
+        """
+        Interval (seconds) until the next refresh of a video. The interval grows linearly with the video's
+        age in days and shrinks with the log of its recent views per hour, clamped to [min_interval, max_interval].
+        """
+        age_hours = 0.0
+        if state["publishedAt"] is not None:
+            age_hours = max((now - state["publishedAt"]) / 3600, 0.0)
+        age_factor = 1 + age_hours / 24
+        activity_factor = 1 + math.log10(1 + max(state["viewsPerHour"], 0.0))
+        interval = self.min_interval * age_factor / activity_factor
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _update(self, batch: List[str], rows: List[Dict], now: float, failed: Optional[set] = None):
+        returned = {row["videoId"]: row for row in rows}
+        for video_id in batch:
+            state = self.videos.get(video_id)
+            if state is None:
+                continue
+            row = returned.get(video_id)
+            if row is None and failed and video_id in failed:
+                # The request failed rather than the video missing from the response, try again soon
+                state["nextRefresh"] = now + self.retry_delay
+                continue
+            if row is None:
+                # Deleted or private videos are not returned, check back rarely
+                state["nextRefresh"] = now + self.max_interval
+                continue
+            if state["publishedAt"] is None and row.get("publishedAt"):
+                state["publishedAt"] = _parse_published_at(row["publishedAt"])
+            views = row.get("viewCount", 0)
+            if state["lastViews"] is not None and state["lastRefreshed"] is not None and now > state["lastRefreshed"]:
+                hours = (now - state["lastRefreshed"]) / 3600
+                state["viewsPerHour"] = max(views - state["lastViews"], 0) / hours
+            state["lastViews"] = views
+            state["lastRefreshed"] = now
+            state["nextRefresh"] = now + self.next_interval(state, now)
+
+
+def _parse_published_at(value: str) -> float:
+    # The API returns RFC 3339 timestamps such as 2024-01-31T12:00:00Z
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
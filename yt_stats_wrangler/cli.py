@@ -0,0 +1,86 @@
+# Command line entry point: yt-stats-wrangler <manifest> [options]
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from yt_stats_wrangler.api.jobs import CrawlJob, estimate_job, load_manifest
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="yt-stats-wrangler",
+        description="Run a YouTube Data API crawl described by a JSON or YAML job manifest.",
+    )
+    parser.add_argument("manifest", help="Path to the job manifest (.json, .yaml or .yml)")
+    parser.add_argument("--api-key", help="YouTube Data API v3 key. Defaults to the environment variable "
+                                          "named by the manifest's api_key_env (YOUTUBE_API_V3_KEY).")
+    parser.add_argument("--concurrency", type=int, help="Number of worker threads (overrides the manifest)")
+    parser.add_argument("--adaptive-concurrency", action="store_true",
+                        help="Tune the requests in flight from latency and rate limits, up to --concurrency")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print the time, CPU and memory of every stage and method at the end of the run")
+    parser.add_argument("--quota", type=int, help="Quota budget for this run, -1 for no limit (overrides the manifest)")
+    parser.add_argument("--checkpoint", help="Checkpoint file used to resume the job (overrides the manifest)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Run every task again instead of resuming. Comment watermarks are kept.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the estimated requests and quota of the job without calling the API")
+    parser.add_argument("--quiet", action="store_true", help="Only print the final summary")
+    return parser
+
+
+def print_estimate(manifest) -> int:
+    summary = estimate_job(manifest)
+    estimates = manifest["estimates"]
+    print(f"Estimates assume {estimates['videos_per_channel']} videos per channel and "
+          f"{estimates['comment_threads_per_video']} comment threads per video (set 'estimates' in the manifest).")
+    print(f"{'pull':<20}{'tasks':>8}{'requests':>10}{'quota':>10}")
+    total_requests = total_quota = 0
+    for pull, entry in summary.items():
+        print(f"{pull:<20}{entry['tasks']:>8}{entry['requests']:>10}{entry['quota']:>10}")
+        total_requests += entry["requests"]
+        total_quota += entry["quota"]
+    print(f"{'total':<20}{'':>8}{total_requests:>10}{total_quota:>10}")
+    if manifest["quota"] != -1 and total_quota > manifest["quota"]:
+        print(f"The estimate exceeds the quota budget of {manifest['quota']}. The job will stop at the budget "
+              f"and can be resumed from its checkpoint.")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        manifest = load_manifest(args.manifest)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"Could not load manifest {args.manifest}: {e}", file=sys.stderr)
+        return 2
+    if args.concurrency is not None:
+        manifest["concurrency"] = max(args.concurrency, 1)
+    if args.adaptive_concurrency:
+        manifest["adaptive_concurrency"] = True
+    if args.profile:
+        manifest["profile"] = True
+    if args.quota is not None:
+        manifest["quota"] = args.quota
+
+    if args.dry_run:
+        return print_estimate(manifest)
+
+    api_key = args.api_key or manifest.get("api_key") or os.getenv(manifest.get("api_key_env", "YOUTUBE_API_V3_KEY"))
+    if not api_key:
+        print("No API key given. Pass --api-key or set the YOUTUBE_API_V3_KEY environment variable.", file=sys.stderr)
+        return 2
+
+    job = CrawlJob(manifest, api_key=api_key, checkpoint=args.checkpoint, progress=not args.quiet)
+    if args.restart:
+        job.reset_completed()
+    summary = job.run()
+    if args.quiet:
+        print(f"Finished: {summary['rows']} rows, {summary['quota_used']} quota units, "
+              f"{summary['failed']} failed tasks in {summary['seconds']}s")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
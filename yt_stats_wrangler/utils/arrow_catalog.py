@@ -0,0 +1,235 @@
+# Crawl results stored as uncompressed Arrow IPC files that readers memory-map instead of loading
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional
+
+from yt_stats_wrangler.utils.helpers import convert_to_library
+
+ARROW_OUTPUT_FORMATS = ("arrow", "pandas", "polars", "polars_lazy")
+
+_COMMIT_SUFFIX = "_commit_time"
+_PART_PATTERN = re.compile(r"^part-\d+-\d+-\d+\.arrow$")
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "Optional dependency 'pyarrow' is not installed. Install it with:\n"
+            "pip install yt-stats-wrangler[arrow]"
+        )
+    return pa
+
+
+def _check_name(name: str, what: str) -> str:
+    # Job IDs and record types are folder names, so they cannot climb out of the catalog
+    if not name or name in (".", "..") or "/" in name or "\\" in name:
+        raise ValueError(f"Invalid {what} '{name}'.")
+    return name
+
+
+def record_type_of(row) -> str:
+    """Record type of a row, from its commit time column (e.g. videoStats_commit_time -> 'videoStats')."""
+    return next((key[:-len(_COMMIT_SUFFIX)] for key in row.keys() if key.endswith(_COMMIT_SUFFIX)), "rows")
+
+
+def _rows_to_table(rows: List):
+    """Arrow table of a batch of rows. Rows may have different keys (comments and replies), missing ones are null."""
+    pa = _import_pyarrow()
+    names = list(dict.fromkeys(key for row in rows for key in row.keys()))
+    return pa.table({name: [row.get(name) for row in rows] for name in names})
+
+
+def _concat_tables(tables: List):
+    pa = _import_pyarrow()
+    if len(tables) == 1:
+        return tables[0]
+    try:
+        return pa.concat_tables(tables, promote_options="default")
+    except TypeError:
+        # pyarrow < 14
+        return pa.concat_tables(tables, promote=True)
+
+
+class ArrowCatalog:
+    """
+    A folder of crawl results keyed by job ID and record type, stored as uncompressed Arrow IPC files:
+
+        <directory>/<job_id>/<record_type>/part-<ms>-<pid>-<n>.arrow
+
+    Readers memory-map the files, so opening a result reads no rows up front, and every process on the
+    host that opens the same result shares the operating system's single cached copy of it. Parts are
+    written to a temporary name and renamed when complete, so readers never see half-written files and
+    several writers can add parts to the same job.
+
+        catalog = ArrowCatalog("results")
+        client = YouTubeDataClient(api_key, sinks=[catalog.sink("daily-2025-06-01")])
+        client.crawl_channels(channel_ids, output_format="stream")
+
+        # in any process
+        stats = ArrowCatalog("results").open("daily-2025-06-01", "videoStats", output_format="polars")
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._sequence = 0
+
+    def jobs(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory) if os.path.isdir(os.path.join(self.directory, name)))
+
+    def record_types(self, job_id: str) -> List[str]:
+        job_directory = os.path.join(self.directory, _check_name(job_id, "job_id"))
+        if not os.path.isdir(job_directory):
+            return []
+        return sorted(name for name in os.listdir(job_directory) if self.files(job_id, name))
+
+    def files(self, job_id: str, record_type: str) -> List[str]:
+        """Paths of the parts of a result, oldest first."""
+        directory = os.path.join(self.directory, _check_name(job_id, "job_id"), _check_name(record_type, "record_type"))
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if _PART_PATTERN.match(name)]
+
+    def entries(self, output_format: str = "raw"):
+        """One row per job and record type, with its number of files, rows and bytes on disk."""
+        pa = _import_pyarrow()
+        entries = []
+        for job_id in self.jobs():
+            for record_type in self.record_types(job_id):
+                paths = self.files(job_id, record_type)
+                rows = 0
+                for path in paths:
+                    reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+                    rows += sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+                entries.append({"job_id": job_id, "record_type": record_type, "files": len(paths), "rows": rows,
+                                "bytes": sum(os.path.getsize(path) for path in paths)})
+        return convert_to_library(entries, output_format)
+
+    def write(self, job_id: str, data, record_type: Optional[str] = None) -> List[str]:
+        """
+        Store rows under a job as new parts, one per record type. data can be a list of rows (split by
+        record type unless record_type is given), a SpillBuffer or a pyarrow Table, pandas or polars
+        DataFrame (these need record_type). Returns the paths written.
+        """
+        pa = _import_pyarrow()
+        module = type(data).__module__
+        if isinstance(data, pa.Table) or module.startswith(("pandas", "polars")):
+            if record_type is None:
+                raise ValueError("record_type is needed to store a table or DataFrame.")
+            if isinstance(data, pa.Table):
+                table = data
+            elif module.startswith("pandas"):
+                table = pa.Table.from_pandas(data, preserve_index=False)
+            else:
+                table = (data.collect() if hasattr(data, "collect") else data).to_arrow()
+            return [self._write_table(job_id, record_type, table)]
+
+        if hasattr(data, "iter_batches"):
+            paths = []
+            for batch in data.iter_batches():
+                paths.extend(self.write(job_id, batch, record_type))
+            return paths
+
+        by_type: Dict[str, List] = {}
+        for row in data:
+            by_type.setdefault(record_type or record_type_of(row), []).append(row)
+        return [self._write_table(job_id, rtype, _rows_to_table(rows)) for rtype, rows in by_type.items()]
+
+    def _write_table(self, job_id: str, record_type: str, table) -> str:
+        pa = _import_pyarrow()
+        directory = os.path.join(self.directory, _check_name(job_id, "job_id"), _check_name(record_type, "record_type"))
+        os.makedirs(directory, exist_ok=True)
+        self._sequence += 1
+        name = f"part-{int(time.time() * 1000):013d}-{os.getpid()}-{self._sequence:06d}.arrow"
+        path = os.path.join(directory, name)
+        temp_path = path + ".tmp"
+        # Uncompressed, so readers can use the mapped buffers directly
+        with pa.OSFile(temp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(temp_path, path)
+        return path
+
+    def open(self, job_id: str, record_type: str, output_format: str = "arrow"):
+        """
+        Open a stored result over memory-mapped files. 'arrow' returns a pyarrow Table and 'polars' a polars
+        DataFrame, both backed by the mapped buffers. 'pandas' returns a DataFrame with Arrow-backed
+        (pd.ArrowDtype) columns over the same buffers, so no column is converted to numpy objects.
+        Rows are only paged in from disk as they are read.
+        """
+        if output_format not in ARROW_OUTPUT_FORMATS:
+            raise ValueError(f"Invalid output_format '{output_format}'. Choose from: {', '.join(ARROW_OUTPUT_FORMATS)}.")
+        pa = _import_pyarrow()
+        paths = self.files(job_id, record_type)
+        if not paths:
+            raise KeyError(f"No '{record_type}' results for job '{job_id}' in {self.directory}.")
+        # The tables keep their memory maps open for as long as they are in use
+        table = _concat_tables([pa.ipc.open_file(pa.memory_map(path, "r")).read_all() for path in paths])
+
+        if output_format == "arrow":
+            return table
+        if output_format == "pandas":
+            try:
+                import pandas as pd
+            except ImportError:
+                raise ImportError(
+                    "Optional dependency 'pandas' is not installed. Install it with:\n"
+                    "pip install yt-stats-wrangler[pandas]"
+                )
+            return table.to_pandas(types_mapper=pd.ArrowDtype)
+        from yt_stats_wrangler.utils.polars_utils import _import_polars
+        frame = _import_polars().from_arrow(table, rechunk=False)
+        return frame.lazy() if output_format == "polars_lazy" else frame
+
+    def drop(self, job_id: str, record_type: Optional[str] = None):
+        """Delete the stored results of a job, or of one of its record types."""
+        record_types = [record_type] if record_type is not None else self.record_types(job_id)
+        job_directory = os.path.join(self.directory, _check_name(job_id, "job_id"))
+        for rtype in record_types:
+            for path in self.files(job_id, rtype):
+                os.remove(path)
+            directory = os.path.join(job_directory, rtype)
+            if os.path.isdir(directory) and not os.listdir(directory):
+                os.rmdir(directory)
+        if os.path.isdir(job_directory) and not os.listdir(job_directory):
+            os.rmdir(job_directory)
+
+    def sink(self, job_id: str, batch_size: int = 50_000) -> "ArrowCatalogSink":
+        return ArrowCatalogSink(self, job_id, batch_size=batch_size)
+
+
+class ArrowCatalogSink:
+    """Client sink that buffers rows per record type and stores every batch_size rows as a new part of a
+    job in an ArrowCatalog. close() (or flush()) stores what is left."""
+
+    def __init__(self, catalog: ArrowCatalog, job_id: str, batch_size: int = 50_000):
+        _import_pyarrow()
+        self.catalog = catalog
+        self.job_id = _check_name(job_id, "job_id")
+        self.batch_size = batch_size
+        self._buffers: Dict[str, List] = {}
+
+    def write(self, rows: Iterable) -> int:
+        written = 0
+        for row in rows:
+            record_type = record_type_of(row)
+            buffer = self._buffers.setdefault(record_type, [])
+            buffer.append(row)
+            if len(buffer) >= self.batch_size:
+                self.catalog.write(self.job_id, buffer, record_type)
+                self._buffers[record_type] = []
+            written += 1
+        return written
+
+    def flush(self):
+        for record_type, buffer in self._buffers.items():
+            if buffer:
+                self.catalog.write(self.job_id, buffer, record_type)
+        self._buffers = {}
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,52 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class EntityCache:
+    """
+    Bounded in-memory LRU memo of API response items (videos, channels, handle lookups).
+    Entries are keyed by the entity ID together with the part/fields that were requested,
+    so a cached stats-only response is never served to a call that needs the full snippet.
+    Entries older than `ttl` seconds are treated as missing. A ttl of None keeps entries
+    until they are evicted by newer ones.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive number of entries.")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for a key, or None if it is missing or stale."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, value = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when the cache is full."""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
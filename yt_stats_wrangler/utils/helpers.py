@@ -3,9 +3,13 @@ from datetime import datetime
 from typing import List, Dict
 
 
+def commit_timestamp() -> str:
+    """The commit time value stamped onto rows, taken once per API response"""
+    return str(datetime.now())
+
 def current_commit_time(prefix: str) -> str:
     """Used to create a customized commit time for each API call"""
-    return {f"{prefix}_commit_time": str(datetime.now())}
+    return {f"{prefix}_commit_time": commit_timestamp()}
 
 def format_column_friendly_string(name: str, case: str = 'upper') -> str:
     """Helper function to format column names in a more column-friendly format for the user. Adds underscores between
@@ -28,21 +32,46 @@ def format_dict_keys(data: List[Dict], case: str = 'upper') -> List[Dict]:
         for item in data
     ]
 
+def dedupe_ids(ids: List[str]) -> List[str]:
+    """Remove duplicate IDs from a list while keeping the order they first appeared in."""
+    return list(dict.fromkeys(ids))
+
 def convert_to_library(data: List[Dict], output_format: str = "raw"):
     """
     Converts a list of dictionaries to a specified data format from a popular python data library.
 
     Supported formats:
     - 'raw': returns list of dictionaries (default). This is the JSON format returned by YouTube API v3
+    - 'records': returns a list of compact namedtuple records with interned string values
     - 'pandas': returns as a pandas DataFrame
-
-    Future formats (not yet implemented):
-    - 'polars'
-    - 'pyspark'
+    - 'polars': returns as a polars DataFrame
+    - 'polars_lazy': returns as a polars LazyFrame
+    - 'pyspark': returns as a PySpark DataFrame
+    - 'stream': returns a SpillBuffer to iterate over, one batch of rows at a time
     """
     if output_format == "raw":
         return data
 
+    if output_format == "stream":
+        from yt_stats_wrangler.utils.spill import SpillBuffer
+        if isinstance(data, SpillBuffer):
+            return data
+        buffer = SpillBuffer()
+        buffer.write_batch(list(data))
+        return buffer
+
+    if output_format == "records":
+        from yt_stats_wrangler.utils.records import to_compact_records
+        return to_compact_records(data)
+
+    if output_format in ("pandas", "polars", "polars_lazy", "pyspark"):
+        from yt_stats_wrangler.utils.spill import SpillBuffer
+        if isinstance(data, SpillBuffer):
+            return data.result(output_format)
+        from yt_stats_wrangler.utils.records import is_compact, records_to_dicts
+        if is_compact(data):
+            data = records_to_dicts(data)
+
     if output_format == "pandas":
         from yt_stats_wrangler.utils.pandas_utils import to_pandas_df
         return to_pandas_df(data)
@@ -51,11 +80,47 @@ def convert_to_library(data: List[Dict], output_format: str = "raw"):
         from yt_stats_wrangler.utils.polars_utils import to_polars_df
         return to_polars_df(data)
 
+    if output_format == "polars_lazy":
+        from yt_stats_wrangler.utils.polars_utils import to_polars_lazy
+        return to_polars_lazy(data)
+
     if output_format == "pyspark":
         from yt_stats_wrangler.utils.pyspark_utils import to_spark_df
         return to_spark_df(data)
 
     raise ValueError(
-        f"Invalid output_format '{output_format}'. Choose from: 'raw', 'pandas', 'polars', 'pyspark'."
+        f"Invalid output_format '{output_format}'. Choose from: 'raw', 'records', 'pandas', 'polars', 'polars_lazy', 'pyspark', 'stream'."
+    )
+    
+def merge_outputs(original, new, output_format: str = "raw"):
+    """
+    Append one method output onto another of the same output format, e.g. rows recovered by a retry
+    onto the output of the original call. DataFrames with different columns are aligned by name.
+    """
+    if original is None:
+        return new
+    if new is None:
+        return original
+
+    if output_format in ("raw", "records"):
+        return list(original) + list(new)
+
+    if output_format == "stream":
+        original = convert_to_library(original, "stream")
+        original.extend(new)
+        return original
+
+    if output_format == "pandas":
+        from yt_stats_wrangler.utils.pandas_utils import concat_pandas_frames
+        return concat_pandas_frames([original, new])
+
+    if output_format in ("polars", "polars_lazy"):
+        from yt_stats_wrangler.utils.polars_utils import concat_polars_frames
+        return concat_polars_frames([original, new], lazy=output_format == "polars_lazy")
+
+    if output_format == "pyspark":
+        return original.unionByName(new, allowMissingColumns=True)
+
+    raise ValueError(
+        f"Invalid output_format '{output_format}'. Choose from: 'raw', 'records', 'pandas', 'polars', 'polars_lazy', 'pyspark', 'stream'."
     )
-    
\ No newline at end of file
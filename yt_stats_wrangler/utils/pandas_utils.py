@@ -49,4 +49,22 @@ def pandas_parse_datetime_column(df, columns: list):
     for column in columns:
         if column in df.columns:
             df[column] = pd.to_datetime(df[column], errors='coerce')
-    return df
\ No newline at end of file
+    return df
+
+
+def concat_pandas_frames(frames: list):
+    """
+    Concatenate DataFrames whose columns may differ. Missing columns are filled with NaN.
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError(
+            "Optional dependency 'pandas' is not installed. Install it with:\n"
+            "pip install yt-stats-wrangler[pandas]"
+        )
+
+    frames = [df for df in frames if df is not None and not df.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
@@ -1,13 +1,232 @@
-from typing import List, Dict, Optional, Union
+import os
+import shutil
+import tempfile
+import weakref
+from typing import List, Dict, Optional
+
+from yt_stats_wrangler.utils.helpers import format_dict_keys
+
+# Output formats that are built from page batches instead of one list of rows
+POLARS_BATCH_FORMATS = ("polars", "polars_lazy")
+
+
+def _import_polars():
+    try:
+        import polars as pl
+    except ImportError:
+        raise ImportError("Install Polars with: pip install polars")
+    return pl
+
 
 def to_polars_df(data: List[Dict]):
     """
     Converts a list of dictionaries into a Polars DataFrame.
     Requires `polars` to be installed.
     """
-    try:
-        import polars as pl
-    except ImportError:
-        raise ImportError("Install Polars with: pip install polars")
+    pl = _import_polars()
 
     return pl.DataFrame(data)
+
+
+def to_polars_lazy(data: List[Dict]):
+    """
+    Converts a list of dictionaries into a Polars LazyFrame.
+    Requires `polars` to be installed.
+    """
+    return to_polars_df(data).lazy()
+
+
+def concat_polars_frames(frames: List, lazy: bool = False):
+    """
+    Concatenate DataFrames or LazyFrames whose columns may differ (e.g. comment and reply batches).
+    Missing columns are filled with nulls and dtypes are relaxed to a common supertype.
+    """
+    pl = _import_polars()
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        return pl.LazyFrame() if lazy else pl.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    combined = pl.concat(frames, how="diagonal_relaxed")
+    if isinstance(combined, pl.LazyFrame):
+        # The combined frame reads the spilled files of its parts, so it holds their SpilledBatches open
+        parts = [frame.spilled_batches for frame in frames if getattr(frame, "spilled_batches", None) is not None]
+        if parts:
+            combined.spilled_batches = SpilledBatches(parts=parts)
+    return combined
+
+
+def _remove_batch_files(directory: str):
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+class SpilledBatches:
+    """
+    The spilled batch files a LazyFrame reads, attached to it as `frame.spilled_batches`.
+
+    Polars only opens (or memory-maps) the files when the frame is collected, so they have to stay on disk until
+    then. close() deletes them once the frame and the frames derived from it are no longer needed. Files that were
+    never closed are deleted when the holder is garbage collected with the last frame that referenced it.
+    A concatenated frame holds the SpilledBatches of its parts in `parts`, and closing it closes them too.
+    """
+
+    def __init__(self, directory: Optional[str] = None, parts: Optional[List["SpilledBatches"]] = None):
+        self.directory = directory
+        self.parts = list(parts or [])
+        self._finalizer = weakref.finalize(self, _remove_batch_files, directory) if directory is not None else None
+
+    def close(self):
+        """Delete the spilled files, and those of every part."""
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        for part in self.parts:
+            part.close()
+        self.parts = []
+
+
+class PolarsBatchCollector:
+    """
+    Builds a Polars frame from page batches as a crawl runs, instead of from one list of dicts at the end.
+
+    Pages are buffered until batch_rows rows have come in, then turned into one DataFrame. In memory, the
+    batches are concatenated once in frame(). With spill=True every batch is written to a Parquet (or Arrow
+    IPC) file and lazy() returns a LazyFrame that scans the folder with one glob. Projection and filter
+    pushdown reach the stored batches, and the result can be run out-of-core with polars' streaming engine.
+
+    The spilled files are handed to the LazyFrame lazy() returns, as its `spilled_batches` (see SpilledBatches):
+    call its close(), or cleanup() here, once the frame is no longer needed. Files of a collector that never
+    returned a LazyFrame are deleted with the collector.
+    """
+
+    def __init__(self, spill: bool = False, directory: Optional[str] = None, file_format: str = "parquet",
+                 key_format: str = "raw", batch_rows: int = 50_000):
+        if file_format not in ("parquet", "ipc"):
+            raise ValueError(f"Invalid file_format '{file_format}'. Choose from: 'parquet', 'ipc'.")
+        self.pl = _import_polars()
+        self.spill = spill
+        self.file_format = file_format
+        self.key_format = key_format
+        self.batch_rows = batch_rows
+        self.parent_directory = directory
+        self.directory = None # created on the first spilled batch
+        self.rows = [] # rows not turned into a batch yet
+        self.frames = []
+        self.files = []
+        self.rows_written = 0
+        self._schema = None # of the first spilled batch, which later batches are aligned to
+        self._uniform = True # whether every spilled batch has that schema, so one glob scan reads them all
+        self._finalizer = None
+        self.spilled_batches: Optional[SpilledBatches] = None # set once lazy() hands the files over
+
+    def write_batch(self, rows: List[Dict]):
+        """Add one page of rows."""
+        if not rows:
+            return
+        self.rows.extend(rows)
+        self.rows_written += len(rows)
+        if len(self.rows) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        """Turn the buffered rows into a batch, written to a file when spilling."""
+        if not self.rows:
+            return
+        rows = self.rows
+        self.rows = []
+        if self.key_format != "raw":
+            rows = format_dict_keys(rows, case=self.key_format)
+        # Comment pages mix top-level comments and replies, so read every row to find all columns
+        frame = self.pl.DataFrame(rows, infer_schema_length=None)
+        if not self.spill:
+            self.frames.append(frame)
+            return
+        frame = self._align(frame)
+        path = os.path.join(self._spill_directory(), f"batch-{len(self.files):06d}.{self.file_format}")
+        if self.file_format == "parquet":
+            frame.write_parquet(path)
+        else:
+            frame.write_ipc(path, compression="zstd")
+        self.files.append(path)
+
+    def _align(self, frame):
+        """Give a batch the columns and dtypes of the first spilled batch where it can, so the files share a schema."""
+        if self._schema is None:
+            self._schema = frame.schema
+            return frame
+        if set(frame.columns) - set(self._schema):
+            self._uniform = False
+            return frame
+        try:
+            # Strict casts raise instead of turning values they cannot convert into nulls
+            return frame.select([
+                self.pl.col(name).cast(dtype) if name in frame.columns else self.pl.lit(None, dtype).alias(name)
+                for name, dtype in self._schema.items()
+            ])
+        except Exception:
+            self._uniform = False
+            return frame
+
+    def _spill_directory(self) -> str:
+        if self.directory is None:
+            # Each collector gets its own folder (inside `directory` if given) so concurrent crawls never collide
+            if self.parent_directory is not None:
+                os.makedirs(self.parent_directory, exist_ok=True)
+            self.directory = tempfile.mkdtemp(prefix="yt_stats_wrangler_", dir=self.parent_directory)
+            self._finalizer = weakref.finalize(self, _remove_batch_files, self.directory)
+        return self.directory
+
+    def lazy(self):
+        """Return a LazyFrame over every batch written so far. When spilling, the LazyFrame owns the files."""
+        self.flush()
+        if not self.spill:
+            return concat_polars_frames(self.frames).lazy()
+        if not self.files:
+            return self.pl.LazyFrame()
+        scan = self.pl.scan_parquet if self.file_format == "parquet" else self.pl.scan_ipc
+        if self._uniform:
+            lazy = scan(os.path.join(self.directory, f"batch-*.{self.file_format}"))
+        else:
+            lazy = concat_polars_frames([scan(path) for path in self.files], lazy=True)
+        # Hand the files over from the collector to the frame that reads them
+        if self._finalizer is not None and self._finalizer.detach() is not None:
+            self.spilled_batches = SpilledBatches(self.directory)
+        lazy.spilled_batches = self.spilled_batches
+        return lazy
+
+    def frame(self):
+        """Return an eager DataFrame of every batch written so far."""
+        if not self.spill:
+            self.flush()
+            return concat_polars_frames(self.frames)
+        try:
+            return self.lazy().collect()
+        finally:
+            self.cleanup()
+
+    def result(self, output_format: str):
+        """Return the frame for a client output format ('polars' or 'polars_lazy')."""
+        return self.lazy() if output_format == "polars_lazy" else self.frame()
+
+    def cleanup(self):
+        """Delete spilled batch files and their folder, including those handed to a LazyFrame."""
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        if self.spilled_batches is not None:
+            self.spilled_batches.close()
+            self.spilled_batches = None
+        self.files = []
+        self.directory = None
+        self._schema = None
+        self._uniform = True
+
+
+def polars_frame_from_batches(batches, lazy: bool = False):
+    """
+    Build a Polars frame from an iterable of row batches (lists of dictionaries), one small frame per batch.
+    """
+    collector = PolarsBatchCollector()
+    for batch in batches:
+        collector.write_batch(batch)
+    return collector.lazy() if lazy else collector.frame()
@@ -0,0 +1,102 @@
+import sys
+from collections import namedtuple
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+# Class names for each record type, keyed by the prefix of the record's commit time column
+RECORD_NAMES: Dict[str, str] = {
+    "channelStats": "ChannelStatsRecord",
+    "videoDetails": "VideoDetailsRecord",
+    "videoStats": "VideoStatsRecord",
+    "videoTopLevelComments": "TopLevelCommentRecord",
+    "videoAllComments": "CommentRecord",
+}
+
+_NORMALIZED_NAMES = {prefix.lower(): name for prefix, name in RECORD_NAMES.items()}
+
+# Values that repeat across many rows of a crawl. Interning them keeps a single copy of each string.
+INTERNED_FIELDS = {"videoId", "channelId", "channelTitle", "channelName", "author", "parentId",
+                   "categoryId", "definition", "publishedAt"}
+
+
+class CompactRecord(tuple):
+    """
+    Base class of the compact record types. Records are namedtuples, so they carry no per-row dict,
+    but they still support the dict-style access used on regular rows (row["videoId"], row.get(...),
+    keys(), items()) and convert back with to_dict().
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in self._fields else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def items(self):
+        return zip(self._fields, self)
+
+    def to_dict(self) -> Dict:
+        return dict(zip(self._fields, self))
+
+    def __reduce__(self):
+        # Record classes are built at runtime, so pickle them by their fields rather than by class name
+        return _rebuild_record, (self._fields, tuple(self))
+
+
+@lru_cache(maxsize=None)
+def record_class(fields: Tuple[str, ...]) -> type:
+    """Return the compact record class for a set of keys. Classes are created once per key set
+    and named after their record type, e.g. VideoStatsRecord."""
+    name = "Record"
+    for field in fields:
+        if field.lower().endswith("_commit_time"):
+            # Match formatted keys too, e.g. VIDEO_STATS_COMMIT_TIME -> videoStats
+            prefix = field[:-len("_commit_time")].replace("_", "").lower()
+            name = _NORMALIZED_NAMES.get(prefix, name)
+            break
+    base = namedtuple(name, fields)
+    return type(name, (CompactRecord, base), {"__slots__": ()})
+
+
+def _rebuild_record(fields: Tuple[str, ...], values: Tuple) -> CompactRecord:
+    return record_class(fields)._make(values)
+
+
+def to_compact_record(row: Dict) -> CompactRecord:
+    """Convert a single row into its compact record, interning repeated string values."""
+    cls = record_class(tuple(row))
+    return cls._make(
+        sys.intern(value) if isinstance(value, str) and (key in INTERNED_FIELDS or key.lower().endswith("_commit_time")) else value
+        for key, value in row.items()
+    )
+
+
+def to_compact_records(rows: List) -> List[CompactRecord]:
+    """Convert a list of rows into compact records. Rows that are already compact are kept as-is."""
+    return [row if isinstance(row, CompactRecord) else to_compact_record(row) for row in rows]
+
+
+def compact_in_place(rows: List, start: int = 0) -> None:
+    """Replace rows[start:] with compact records. Used by the client to compact each page as it is collected,
+    so a crawl never holds more than one page of dict rows at a time."""
+    for i in range(start, len(rows)):
+        if not isinstance(rows[i], CompactRecord):
+            rows[i] = to_compact_record(rows[i])
+
+
+def records_to_dicts(rows: List) -> List[Dict]:
+    """Convert compact records back into regular dictionaries."""
+    return [row.to_dict() if isinstance(row, CompactRecord) else row for row in rows]
+
+
+def is_compact(rows: List) -> bool:
+    return bool(rows) and isinstance(rows[0], CompactRecord)
@@ -0,0 +1,275 @@
+import json
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from yt_stats_wrangler.utils.helpers import convert_to_library
+
+# How each polled record type is split into an identifier, counters that change between polls,
+# and the commit time column that marks when the row was observed. Everything else is metadata.
+SNAPSHOT_TYPES: Dict[str, Dict] = {
+    "video": {
+        "key": "videoId",
+        "counters": ("viewCount", "likeCount", "commentCount"),
+        "commit_time": "videoStats_commit_time",
+    },
+    "channel": {
+        "key": "channelId",
+        "counters": ("subscribers", "totalChannelViews", "totalPosts"),
+        "commit_time": "channelStats_commit_time",
+    },
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    entity_type TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (entity_type, entity_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS counters (
+    entity_type TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    counter TEXT NOT NULL,
+    observed_at REAL NOT NULL,
+    value INTEGER,
+    PRIMARY KEY (entity_type, entity_id, counter, observed_at)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS latest_counters (
+    entity_type TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    counter TEXT NOT NULL,
+    observed_at REAL NOT NULL,
+    value INTEGER,
+    PRIMARY KEY (entity_type, entity_id, counter)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_latest_counters_recent
+    ON latest_counters (entity_type, counter, observed_at);
+"""
+
+
+class SnapshotStore:
+    """
+    Local SQLite store for repeated polls of get_video_stats() / get_channel_statistics_for_channels().
+    Static metadata (titles, descriptions, tags...) is stored once per entity and only rewritten when
+    it changes. Rows with fewer columns (e.g. polled with columns=['viewCount']) update the metadata they
+    carry and keep the rest. For every poll only the counters whose value moved since the previous poll are written,
+    so the store holds a delta-encoded time-series of each counter.
+
+    Rows are expected to use the raw key format returned by the client.
+
+    Example:
+        store = SnapshotStore("stats.db")
+        store.record_video_stats(client.get_video_stats(video_ids))
+        store.get_history("dQw4w9WgXcQ", counter="viewCount")
+        store.top_growers(hours=24, counter="viewCount", limit=10)
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    def record_video_stats(self, rows: List[Dict], observed_at: Optional[datetime] = None) -> int:
+        """Store a poll of get_video_stats() rows. Returns the number of counter values written."""
+        return self.record("video", rows, observed_at=observed_at)
+
+    def record_channel_stats(self, rows: List[Dict], observed_at: Optional[datetime] = None) -> int:
+        """Store a poll of get_channel_statistics(_for_channels)() rows. Returns the number of counter values written."""
+        return self.record("channel", rows, observed_at=observed_at)
+
+    def record(self, entity_type: str, rows: List[Dict], observed_at: Optional[datetime] = None) -> int:
+        """
+        Store a poll of rows for an entity type ('video' or 'channel'). The observation time is taken from
+        each row's commit time unless observed_at is given. Counters that match the latest stored value are skipped.
+        """
+        spec = self._spec(entity_type)
+        key, counters, commit_column = spec["key"], spec["counters"], spec["commit_time"]
+        rows = [row for row in rows if row.get(key) is not None]
+        if not rows:
+            return 0
+
+        latest = self._latest_values(entity_type, [row[key] for row in rows])
+        stored_metadata = self._stored_metadata(entity_type, [row[key] for row in rows])
+        counter_rows = []
+        entity_rows = []
+        for row in rows:
+            entity_id = row[key]
+            seen_at = _to_timestamp(observed_at or row.get(commit_column))
+            for counter in counters:
+                if counter not in row:
+                    continue
+                value = row[counter]
+                if latest.get((entity_id, counter), _MISSING) != value:
+                    counter_rows.append((entity_type, entity_id, counter, seen_at, value))
+                    latest[(entity_id, counter)] = value
+
+            metadata = {k: v for k, v in row.items() if k != key and k != commit_column and k not in counters}
+            # Rows polled with a column selection carry only some metadata, so merge it into what is stored
+            stored = stored_metadata.get(entity_id)
+            if stored is not None:
+                metadata = {**json.loads(stored), **metadata}
+            encoded = json.dumps(metadata, sort_keys=True, default=str)
+            if stored_metadata.get(entity_id) != encoded:
+                entity_rows.append((entity_type, entity_id, encoded, seen_at, seen_at))
+                stored_metadata[entity_id] = encoded
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO entities (entity_type, entity_id, metadata, first_seen, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (entity_type, entity_id) DO UPDATE SET metadata = excluded.metadata, updated_at = excluded.updated_at",
+                entity_rows,
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO counters (entity_type, entity_id, counter, observed_at, value) VALUES (?, ?, ?, ?, ?)",
+                counter_rows,
+            )
+            self.conn.executemany(
+                "INSERT INTO latest_counters (entity_type, entity_id, counter, observed_at, value) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET observed_at = excluded.observed_at, value = excluded.value "
+                "WHERE excluded.observed_at >= latest_counters.observed_at",
+                counter_rows,
+            )
+        return len(counter_rows)
+
+    def write(self, rows: List[Dict]) -> int:
+        """Sink interface for YouTubeDataClient(sinks=[...]). Video and channel stats rows are recorded,
+        other record types are ignored."""
+        written = 0
+        for entity_type, spec in SNAPSHOT_TYPES.items():
+            matching = [row for row in rows if spec["commit_time"] in row]
+            if matching:
+                written += self.record(entity_type, matching)
+        return written
+
+    def get_history(self, entity_id: str, counter: str = "viewCount", entity_type: str = "video",
+                    since: Optional[datetime] = None, output_format: str = "raw"):
+        """
+        Return the time-series of a counter for one entity, oldest first. Only changes are stored,
+        so each value holds until the next row.
+        """
+        self._check_counter(entity_type, counter)
+        query = ("SELECT observed_at, value FROM counters "
+                 "WHERE entity_type = ? AND entity_id = ? AND counter = ?")
+        params: list = [entity_type, entity_id, counter]
+        if since is not None:
+            query += " AND observed_at >= ?"
+            params.append(_to_timestamp(since))
+        query += " ORDER BY observed_at"
+        history = [
+            {"entityId": entity_id, "observedAt": _to_iso(observed), counter: value}
+            for observed, value in self.conn.execute(query, params)
+        ]
+        return convert_to_library(history, output_format)
+
+    def top_growers(self, hours: float = 24, counter: str = "viewCount", entity_type: str = "video",
+                    limit: int = 10, output_format: str = "raw"):
+        """
+        Rank entities by how much a counter grew over the last N hours. Growth is measured against the last
+        value stored before the window started, or the first value seen if the entity is newer than the window.
+        Only entities whose counter changed inside the window are considered.
+        """
+        self._check_counter(entity_type, counter)
+        cutoff = time.time() - hours * 3600
+        query = """
+            SELECT entity_id, current, current - baseline AS growth FROM (
+                SELECT l.entity_id AS entity_id, l.value AS current, COALESCE(
+                    (SELECT c.value FROM counters c
+                     WHERE c.entity_type = l.entity_type AND c.entity_id = l.entity_id
+                       AND c.counter = l.counter AND c.observed_at <= :cutoff
+                     ORDER BY c.observed_at DESC LIMIT 1),
+                    (SELECT c.value FROM counters c
+                     WHERE c.entity_type = l.entity_type AND c.entity_id = l.entity_id AND c.counter = l.counter
+                     ORDER BY c.observed_at ASC LIMIT 1)
+                ) AS baseline
+                FROM latest_counters l
+                WHERE l.entity_type = :entity_type AND l.counter = :counter AND l.observed_at > :cutoff
+            )
+            ORDER BY growth DESC
+            LIMIT :limit
+        """
+        params = {"cutoff": cutoff, "entity_type": entity_type, "counter": counter, "limit": limit}
+        growers = [
+            {"entityId": entity_id, counter: current, "growth": growth}
+            for entity_id, current, growth in self.conn.execute(query, params)
+        ]
+        return convert_to_library(growers, output_format)
+
+    def get_metadata(self, entity_id: str, entity_type: str = "video") -> Optional[Dict]:
+        """Return the latest stored metadata for an entity, or None if it has never been recorded."""
+        self._spec(entity_type)
+        row = self.conn.execute(
+            "SELECT metadata FROM entities WHERE entity_type = ? AND entity_id = ?", (entity_type, entity_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _latest_values(self, entity_type: str, entity_ids: List[str]) -> Dict[Tuple[str, str], int]:
+        latest = {}
+        for chunk in _chunks(entity_ids, 500):
+            placeholders = ",".join("?" * len(chunk))
+            cursor = self.conn.execute(
+                f"SELECT entity_id, counter, value FROM latest_counters "
+                f"WHERE entity_type = ? AND entity_id IN ({placeholders})",
+                [entity_type, *chunk],
+            )
+            for entity_id, counter, value in cursor:
+                latest[(entity_id, counter)] = value
+        return latest
+
+    def _stored_metadata(self, entity_type: str, entity_ids: List[str]) -> Dict[str, str]:
+        stored = {}
+        for chunk in _chunks(entity_ids, 500):
+            placeholders = ",".join("?" * len(chunk))
+            cursor = self.conn.execute(
+                f"SELECT entity_id, metadata FROM entities WHERE entity_type = ? AND entity_id IN ({placeholders})",
+                [entity_type, *chunk],
+            )
+            stored.update(dict(cursor))
+        return stored
+
+    def _spec(self, entity_type: str) -> Dict:
+        if entity_type not in SNAPSHOT_TYPES:
+            raise ValueError(f"Invalid entity_type '{entity_type}'. Choose from: {', '.join(SNAPSHOT_TYPES)}.")
+        return SNAPSHOT_TYPES[entity_type]
+
+    def _check_counter(self, entity_type: str, counter: str):
+        counters = self._spec(entity_type)["counters"]
+        if counter not in counters:
+            raise ValueError(f"Invalid counter '{counter}' for '{entity_type}'. Choose from: {', '.join(counters)}.")
+
+
+_MISSING = object()
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    unique = list(dict.fromkeys(items))
+    for i in range(0, len(unique), size):
+        yield unique[i:i + size]
+
+
+def _to_timestamp(value) -> float:
+    """Convert a datetime, commit time string or None (now) into epoch seconds."""
+    if value is None:
+        return time.time()
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def _to_iso(timestamp: float) -> str:
+    return str(datetime.fromtimestamp(timestamp))
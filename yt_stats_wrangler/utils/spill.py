@@ -0,0 +1,229 @@
+# Memory-bounded row buffer that spills batches of rows to compressed temp files
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import weakref
+from typing import Dict, Iterator, List, Optional
+
+from yt_stats_wrangler.utils.helpers import convert_to_library, format_dict_keys
+
+SPILL_FORMATS = ("auto", "ipc", "jsonl")
+
+# File extension of each spill format
+_EXTENSIONS = {"ipc": "arrow", "jsonl": "jsonl.gz"}
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def approx_row_bytes(row: Dict) -> int:
+    """Rough in-memory size of a row: the dict plus its values. Keys are shared between rows, so not counted."""
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+
+
+def _write_ipc(path: str, rows: List[Dict]):
+    """Write rows to a zstd compressed Arrow IPC file. Rows can have different keys (comments and replies),
+    so each row's key set is stored too and rows read back with exactly the keys they were written with."""
+    import pyarrow as pa
+
+    keysets: Dict[tuple, int] = {}
+    row_keysets = [keysets.setdefault(tuple(row), len(keysets)) for row in rows]
+    names = list(dict.fromkeys(key for keys in keysets for key in keys))
+    columns = {name: [row.get(name) for row in rows] for name in names}
+    if len(keysets) > 1:
+        columns["_keyset"] = pa.array(row_keysets, type=pa.int16())
+    table = pa.table(columns).replace_schema_metadata({"keysets": json.dumps([list(keys) for keys in keysets])})
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+
+
+def _read_ipc(path: str) -> List[Dict]:
+    import pyarrow as pa
+
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    keysets = json.loads(table.schema.metadata[b"keysets"])
+    columns = {name: table.column(name).to_pylist() for name in table.column_names}
+    row_keysets = columns.pop("_keyset", None) or [0] * table.num_rows
+    keyset_columns = [[columns[key] for key in keys] for keys in keysets]
+    return [dict(zip(keysets[k], [column[i] for column in keyset_columns[k]])) for i, k in enumerate(row_keysets)]
+
+
+def _write_jsonl(path: str, rows: List[Dict]):
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=1) as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str))
+            f.write("\n")
+
+
+def _read_jsonl(path: str) -> List[Dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _remove_spill_files(files: List[str], directory: str):
+    for path in files:
+        if os.path.exists(path):
+            os.remove(path)
+    files.clear()
+    if os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+
+
+class SpillBuffer:
+    """
+    Collects the rows of a crawl in memory up to a row and/or byte budget, then writes them to a compressed
+    temp file and starts over, so a crawl never holds more than one budget of dict rows. Files are zstd
+    compressed Arrow IPC when pyarrow is installed, and gzipped JSON Lines otherwise.
+
+    Rows are read back one spilled batch at a time, in the order they were written:
+
+        for batch in buffer.iter_batches(): ...
+        for row in buffer: ...
+        buffer.result("pandas")   # assembled batch by batch, then the temp files are deleted
+
+    Spilled files are deleted by cleanup(), by result() for every format except 'stream', on leaving a
+    `with` block, or when the buffer is garbage collected.
+    """
+
+    def __init__(self, max_rows: Optional[int] = None, max_bytes: Optional[int] = None,
+                 directory: Optional[str] = None, file_format: str = "auto", key_format: str = "raw"):
+        if file_format not in SPILL_FORMATS:
+            raise ValueError(f"Invalid file_format '{file_format}'. Choose from: {', '.join(SPILL_FORMATS)}.")
+        if file_format == "auto":
+            file_format = "ipc" if _has_pyarrow() else "jsonl"
+        elif file_format == "ipc" and not _has_pyarrow():
+            raise ImportError(
+                "Optional dependency 'pyarrow' is not installed. Install it with:\n"
+                "pip install pyarrow"
+            )
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.parent_directory = directory
+        self.file_format = file_format
+        self.key_format = key_format # applied when rows are read back, they are stored with raw keys
+        self.directory = None # created on the first spill
+        self.rows: List[Dict] = [] # rows not spilled yet
+        self.files: List[str] = []
+        self.rows_spilled = 0
+        self.bytes_spilled = 0
+        self._bytes_buffered = 0
+        self._finalizer = None
+
+    def __len__(self) -> int:
+        return self.rows_spilled + len(self.rows)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for batch in self.iter_batches():
+            yield from batch
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+    def write_batch(self, rows: List[Dict]):
+        """Add a page of rows, spilling everything buffered once the budget is reached."""
+        if not rows:
+            return
+        self.rows.extend(rows)
+        if self.max_bytes is not None:
+            self._bytes_buffered += sum(approx_row_bytes(row) for row in rows)
+        if (self.max_rows is not None and len(self.rows) >= self.max_rows) or \
+                (self.max_bytes is not None and self._bytes_buffered >= self.max_bytes):
+            self.spill()
+
+    def spill(self):
+        """Write the buffered rows to a new temp file."""
+        if not self.rows:
+            return
+        path = os.path.join(self._spill_directory(), f"batch-{len(self.files):06d}.{_EXTENSIONS[self.file_format]}")
+        if self.file_format == "ipc":
+            _write_ipc(path, self.rows)
+        else:
+            _write_jsonl(path, self.rows)
+        self.files.append(path)
+        self.rows_spilled += len(self.rows)
+        self.bytes_spilled += os.path.getsize(path)
+        self.rows = []
+        self._bytes_buffered = 0
+
+    def extend(self, other):
+        """Append another SpillBuffer (taking over its files instead of reading them) or a list of rows."""
+        if not isinstance(other, SpillBuffer):
+            self.write_batch(list(other))
+            return
+        if other.files:
+            # Keep the order: rows buffered here come before the other buffer's files
+            self.spill()
+            for path in other.files:
+                extension = os.path.basename(path).split(".", 1)[1]
+                target = os.path.join(self._spill_directory(), f"batch-{len(self.files):06d}.{extension}")
+                shutil.move(path, target)
+                self.files.append(target)
+            self.rows_spilled += other.rows_spilled
+            self.bytes_spilled += other.bytes_spilled
+            other.files.clear()
+        self.write_batch(other.rows)
+        other.rows = []
+        other.cleanup()
+
+    def iter_batches(self) -> Iterator[List[Dict]]:
+        """Yield the rows one spilled file at a time, then the rows still in memory."""
+        for path in list(self.files):
+            rows = _read_ipc(path) if path.endswith(".arrow") else _read_jsonl(path)
+            yield format_dict_keys(rows, case=self.key_format) if self.key_format != "raw" else rows
+        if self.rows:
+            yield format_dict_keys(self.rows, case=self.key_format) if self.key_format != "raw" else list(self.rows)
+
+    def result(self, output_format: str = "raw"):
+        """
+        Return the rows in a client output format. 'stream' returns the buffer itself, to be iterated without
+        loading everything. DataFrame and 'records' outputs are built one batch at a time, so the full list of
+        dict rows is never held in memory for them. The temp files are deleted afterwards, except for 'stream'.
+        """
+        if output_format == "stream":
+            return self
+        try:
+            if output_format == "raw":
+                return [row for batch in self.iter_batches() for row in batch]
+            if output_format == "records":
+                from yt_stats_wrangler.utils.records import to_compact_records
+                return [record for batch in self.iter_batches() for record in to_compact_records(batch)]
+            if output_format == "pandas":
+                from yt_stats_wrangler.utils.pandas_utils import to_pandas_df, concat_pandas_frames
+                return concat_pandas_frames([to_pandas_df(batch) for batch in self.iter_batches()])
+            if output_format in ("polars", "polars_lazy"):
+                from yt_stats_wrangler.utils.polars_utils import polars_frame_from_batches
+                return polars_frame_from_batches(self.iter_batches(), lazy=output_format == "polars_lazy")
+            return convert_to_library([row for batch in self.iter_batches() for row in batch], output_format)
+        finally:
+            self.cleanup()
+
+    def cleanup(self):
+        """Delete the spilled files and their folder. Rows still in memory are kept."""
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        self.directory = None
+        self.rows_spilled = 0
+        self.bytes_spilled = 0
+
+    def _spill_directory(self) -> str:
+        if self.directory is None:
+            # Each buffer gets its own folder (inside `directory` if given) so concurrent crawls never collide
+            if self.parent_directory is not None:
+                os.makedirs(self.parent_directory, exist_ok=True)
+            self.directory = tempfile.mkdtemp(prefix="yt_stats_wrangler_spill_", dir=self.parent_directory)
+            self._finalizer = weakref.finalize(self, _remove_spill_files, self.files, self.directory)
+        return self.directory
@@ -0,0 +1,193 @@
+import json
+import sqlite3
+from typing import Dict, List, Optional
+
+from yt_stats_wrangler.api.fields import COLUMN_FIELDS
+
+# One table per record type. Record types are recognised by the prefix of the row's commit time column.
+# Comment rows from the top-level and all-comments methods (including replies) share one table.
+WAREHOUSE_TABLES: Dict[str, Dict] = {
+    "channelStats": {
+        "table": "channel_stats",
+        "fields": "channelStats",
+        "primary_key": ("channelId", "channelStats_commit_time"),
+        "indexes": (("channelId",),),
+    },
+    "videoDetails": {
+        "table": "video_details",
+        "fields": "videoDetails",
+        "primary_key": ("videoId",),
+        "indexes": (("channelId",), ("publishedAt",)),
+    },
+    "videoStats": {
+        "table": "video_stats",
+        "fields": "videoStats",
+        "primary_key": ("videoId",),
+        "indexes": (("channelId",), ("publishedAt",)),
+    },
+    "videoTopLevelComments": {
+        "table": "comments",
+        "fields": "comments",
+        "primary_key": ("commentId",),
+        "indexes": (("videoId",), ("publishedAt",)),
+    },
+    "videoAllComments": {
+        "table": "comments",
+        "fields": "comments",
+        "primary_key": ("commentId",),
+        "indexes": (("videoId",), ("publishedAt",)),
+    },
+}
+
+_INTEGER_COLUMNS = {"subscribers", "totalChannelViews", "totalPosts", "viewCount", "likeCount", "commentCount",
+                    "duration_seconds", "replyCount"}
+_BOOLEAN_COLUMNS = {"isShort"}
+
+
+class WarehouseSink:
+    """
+    Writes client output into a local SQLite or DuckDB database with one table per record type
+    (channel_stats, video_details, video_stats, comments). Rows are upserted by primary key
+    (videoId, commentId, or channelId + commit time for channel stats) so reruns never duplicate rows,
+    and tables are indexed on channelId/videoId and publishedAt.
+
+    Rows are buffered and written in batched transactions. Pass the sink to the client to have every
+    page written straight from the extraction loops:
+
+        sink = WarehouseSink("youtube.duckdb", backend="duckdb")
+        client = YouTubeDataClient(api_key, sinks=[sink])
+        client.get_all_comments_for_video_ids(video_ids)
+        sink.close()
+
+    Rows must use the raw key format. Tags are stored as JSON text.
+    """
+
+    def __init__(self, path: str = ":memory:", backend: str = "sqlite", batch_size: int = 5000):
+        if backend == "sqlite":
+            self.conn = sqlite3.connect(path)
+            # Each flush is its own explicit transaction
+            self.conn.isolation_level = None
+        elif backend == "duckdb":
+            try:
+                import duckdb
+            except ImportError:
+                raise ImportError(
+                    "Optional dependency 'duckdb' is not installed. Install it with:\n"
+                    "pip install yt-stats-wrangler[duckdb]"
+                )
+            self.conn = duckdb.connect(path)
+        else:
+            raise ValueError(f"Invalid backend '{backend}'. Choose from: 'sqlite', 'duckdb'.")
+        self.path = path
+        self.backend = backend
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self._buffers: Dict[str, List[Dict]] = {}
+        self._created = set()
+
+    def write(self, rows: List[Dict]):
+        """Buffer rows, flushing any record type whose buffer reaches batch_size."""
+        for row in rows:
+            record_type = _record_type(row)
+            if record_type is None:
+                continue
+            buffer = self._buffers.setdefault(record_type, [])
+            buffer.append(row)
+            if len(buffer) >= self.batch_size:
+                self._flush_type(record_type)
+
+    def flush(self):
+        """Write every buffered row."""
+        for record_type in list(self._buffers):
+            self._flush_type(record_type)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def table_name(self, record_type: str) -> str:
+        return WAREHOUSE_TABLES[record_type]["table"]
+
+    def _flush_type(self, record_type: str):
+        rows = self._buffers.pop(record_type, [])
+        if not rows:
+            return
+        spec = WAREHOUSE_TABLES[record_type]
+        self._ensure_table(record_type)
+        primary_key = spec["primary_key"]
+
+        # Rows with the same key inside one batch collapse to the last one, as they would across batches
+        deduped = {}
+        for row in rows:
+            deduped[tuple(row.get(col) for col in primary_key)] = row
+
+        # Group by column set, since a column selection or replies vs top-level comments change the keys present
+        by_columns: Dict[tuple, List[tuple]] = {}
+        for row in deduped.values():
+            by_columns.setdefault(tuple(row), []).append(tuple(_to_db_value(value) for value in row.values()))
+
+        self.conn.execute("BEGIN TRANSACTION")
+        try:
+            for columns, values in by_columns.items():
+                self.conn.executemany(_upsert_sql(spec["table"], columns, primary_key), values)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.rows_written += len(deduped)
+
+    def _ensure_table(self, record_type: str):
+        spec = WAREHOUSE_TABLES[record_type]
+        if spec["table"] in self._created:
+            return
+        columns = list(COLUMN_FIELDS[spec["fields"]])
+        if spec["table"] == "comments":
+            # Top-level comment and reply rows land in the same table with their own commit times
+            columns += ["videoTopLevelComments_commit_time", "videoAllComments_commit_time"]
+        else:
+            columns.append(f"{record_type}_commit_time")
+        definitions = ", ".join(f'"{col}" {_column_type(col)}' for col in columns)
+        key = ", ".join(f'"{col}"' for col in spec["primary_key"])
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS {spec["table"]} ({definitions}, PRIMARY KEY ({key}))')
+        for index_columns in spec["indexes"]:
+            index_name = f'idx_{spec["table"]}_{"_".join(index_columns)}'
+            index_cols = ", ".join(f'"{col}"' for col in index_columns)
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {spec["table"]} ({index_cols})')
+        self._created.add(spec["table"])
+
+
+def _record_type(row: Dict) -> Optional[str]:
+    for key in row:
+        if key.endswith("_commit_time"):
+            prefix = key[:-len("_commit_time")]
+            return prefix if prefix in WAREHOUSE_TABLES else None
+    return None
+
+
+def _column_type(column: str) -> str:
+    if column in _INTEGER_COLUMNS:
+        return "BIGINT"
+    if column in _BOOLEAN_COLUMNS:
+        return "BOOLEAN"
+    return "TEXT"
+
+
+def _to_db_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def _upsert_sql(table: str, columns: tuple, primary_key: tuple) -> str:
+    quoted = ", ".join(f'"{col}"' for col in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    key = ", ".join(f'"{col}"' for col in primary_key)
+    updates = ", ".join(f'"{col}" = excluded."{col}"' for col in columns if col not in primary_key)
+    action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    return f"INSERT INTO {table} ({quoted}) VALUES ({placeholders}) ON CONFLICT ({key}) {action}"